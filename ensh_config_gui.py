@@ -1,17 +1,43 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import json
+import csv
 import os
 import shutil
+import shlex
+import socket
+import subprocess
 from datetime import datetime
 import sys
 import re
 import random 
+import argparse
+import asyncio
+import functools
+import itertools
+import threading
+import time
+import contextlib
+import hashlib
+import mmap
+import bisect
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+try: import fcntl
+except ImportError: fcntl = None # Windows: msvcrt below
+try: import msvcrt
+except ImportError: msvcrt = None
+try: import sqlite3
+except ImportError: sqlite3 = None # Fleet store is optional; everything else works without it
 
 # --- Constants ---
 JSON_FILE = "enshrouded_server.json"
 README_FILE = "enshrouded_server_readme.txt" 
 BACKUP_DIR = "old"
+BACKUP_RETENTION_FILE = "retention.json" # Lives inside BACKUP_DIR, holds the policy and pinned backups
+BACKUP_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S_%f" # Microseconds, so backups taken in the same second never collide
+BACKUP_NAME_PATTERN = re.compile(r"_(\d{8}_\d{6})(?:_(\d{6}))?(?:-\d+)?(?:_(.*))?\.old$") # Also matches older second-resolution names
 LOG_LEVEL = "INFO" 
 FALLBACK_GAME_VERSION = "Unknown (Readme not found/parsable)"
 APP_TITLE_BASE = "Enshrouded Server Config Editor"
@@ -20,6 +46,87 @@ NANOSECONDS_PER_SECOND = 1_000_000_000
 SECONDS_PER_MINUTE = 60
 NANOSECONDS_PER_MINUTE = NANOSECONDS_PER_SECOND * SECONDS_PER_MINUTE
 
+# --- Backup Retention (0 disables a rule) ---
+DEFAULT_BACKUP_RETENTION_POLICY = {
+    "keep_last": 20,        # Always keep the N newest backups
+    "keep_daily": 7,        # Newest backup of each of the last N days that have backups
+    "keep_weekly": 4,       # Newest backup of each of the last N ISO weeks that have backups
+    "keep_monthly": 6,      # Newest backup of each of the last N months that have backups
+    "max_total_bytes": 0,   # Cap on total size of kept (unpinned) backups; oldest go first
+}
+BACKUP_SNAPSHOT_CACHE_SIZE = 128 # Parsed backups kept in memory for the compare pane
+
+# --- World Save Snapshots (stored per config backup under BACKUP_DIR) ---
+SAVE_SNAPSHOT_DIR = "saves"
+SAVE_SNAPSHOT_MANIFEST = "manifest.json"
+SAVE_SNAPSHOT_HASH_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+SAVE_SNAPSHOT_HASH_CHUNK = 1024 * 1024
+
+# --- Crash-Recovery Journal of unsaved GUI edits ---
+EDIT_JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".enshrouded_config_editor", "journals") # User-local, one journal per editor instance
+EDIT_JOURNAL_OWNER_SUFFIX = ".owner" # Kept locked by the running editor; an unlocked journal is an orphan from a crash
+EDIT_JOURNAL_FSYNC_INTERVAL = 1.0 # Seconds; appends are flushed immediately, fsync is batched
+
+# --- Multi-Writer Safety (advisory lock file next to the config) ---
+CONFIG_LOCK_SUFFIX = ".lock"
+CONFIG_LOCK_TIMEOUT = 2.0 # Seconds; the lock only covers backup+write, so a longer wait means a stuck writer
+CONFIG_LOCK_POLL_INTERVAL = 0.01
+CONFIG_SAVE_ATTEMPTS = 3 # Merge/retry rounds when the file keeps changing under us
+MERGE_KEYED_LISTS = {("userGroups",): "name"} # Lists merged entry by entry, matched on this field
+
+# --- Config Migrations ---
+CONFIG_VERSION_KEY = "_configVersion" # Game version the config was last migrated to
+
+# --- Layered Config Templates ---
+TEMPLATE_STATE_FILE = ".template_build_state.json" # Next to the manifest; input digest per generated server
+
+# --- User Group Import/Export (CSV or JSON Lines, streamed row by row) ---
+USER_GROUP_FIELDS = ("name", "password", "canKickBan", "canAccessInventories", "canEditBase", "canExtendBase", "reservedSlots")
+USER_GROUP_BOOL_FIELDS = ("canKickBan", "canAccessInventories", "canEditBase", "canExtendBase")
+USER_GROUP_IMPORT_MAX_ERRORS = 50 # Rejected rows kept for the report; all of them are counted
+
+# --- Fleet Settings Store (optional SQLite index of many servers' configs and backups) ---
+FLEET_DB_FILE = "fleet.sqlite3"
+FLEET_QUERY_LIMIT = 1000
+
+# --- Server Supervisor ---
+SUPERVISOR_POLL_SECONDS = 1.0 # Config and process checks
+SUPERVISOR_SAMPLE_SECONDS = 5.0 # /proc CPU/RSS sampling
+SUPERVISOR_METRICS_SAMPLES = 720 # Rolling buffer: one hour at the default sample interval
+SUPERVISOR_METRICS_FILE = "supervisor_metrics.json" # Written to the server root
+SUPERVISOR_STOP_TIMEOUT = 30.0 # Seconds to wait after SIGTERM before killing
+SUPERVISOR_CRASH_BACKOFF = (1, 5, 15, 60) # Seconds before restarting after consecutive crashes
+SUPERVISOR_STABLE_UPTIME = 300.0 # Seconds of uptime after which the crash backoff starts over
+SUPERVISOR_DEFAULT_QUIET_MINUTES = 10 # No player joins for this long before a scheduled restart
+SUPERVISOR_RESTART_EXEMPT_PATHS = {(CONFIG_VERSION_KEY,)} # Changes here never need a restart; extend with --no-restart-path
+
+# --- Settings API Server ---
+API_DEFAULT_HOST = "127.0.0.1" # Localhost only: the API has no authentication
+API_DEFAULT_PORT = 8765
+API_MAX_BODY_BYTES = 1024 * 1024
+API_IDLE_TIMEOUT = 30 # Seconds an idle keep-alive connection is held open
+
+# --- JSON Patch (RFC 6902) ---
+JSON_PATCH_OPS = ("add", "remove", "replace", "move", "copy", "test")
+JSON_PATCH_FILE_WORKERS = min(8, (os.cpu_count() or 2) * 2) # Files patched in parallel by --apply-patch
+JSON_PATCH_BACKUP_REASON = "pre_patch" # Backup name suffix, so the restore dialog lists patched files' previous state
+
+# --- Log Viewer ---
+LOG_FILE_EXTENSIONS = (".log", ".txt")
+LOG_EVENT_PATTERNS = { # Indexed in the background so these searches never rescan the file; matched against lowercased text
+    "Player Joins": rb"logged in|joined|player connected",
+    "Errors": rb"error",
+    "Crashes": rb"crash|fatal|unhandled exception|access violation",
+}
+LOG_TIMESTAMP_PATTERN = rb"(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}|\d{2}:\d{2}:\d{2})"
+LOG_LINE_CHECKPOINT_EVERY = 128 # Byte offset kept for every Nth line; lookups scan forward from the nearest one
+LOG_TIMESTAMP_EVERY_N_LINES = 1024 # Sparse timestamp checkpoints, enough to orient a jump in a huge log; a multiple of the above
+LOG_INDEX_CHUNK_BYTES = 16 * 1024 * 1024
+LOG_VIEWER_TAIL_BYTES = 64 * 1024
+LOG_VIEWER_MAX_LINES = 5000
+LOG_VIEWER_MAX_RESULTS = 1000
+LOG_VIEWER_POLL_MS = 1000
+
 # --- Path Definitions ---
 DAY_DURATION_PATH = ["gameSettings", "dayTimeDuration"]
 NIGHT_DURATION_PATH = ["gameSettings", "nightTimeDuration"]
@@ -171,14 +278,1200 @@ def percent_str_to_float(p_str):
         return round(percent / 100.0, 6) 
     except ValueError: return None
 
+SETTING_CONFIG_BY_PATH = {}
+for _setting_type, _configs in (("factor", FACTOR_SETTINGS_CONFIG), ("string_choice", STRING_CHOICE_SETTINGS_CONFIG), ("duration", DURATION_SETTINGS_CONFIG)):
+    for _config in _configs.values(): SETTING_CONFIG_BY_PATH[tuple(_config["path"])] = (_setting_type, _config)
+
 def get_setting_config_by_path(path_keys):
-    for _, config in DURATION_SETTINGS_CONFIG.items():
-        if config["path"] == path_keys: return "duration", config
-    for _, config in STRING_CHOICE_SETTINGS_CONFIG.items():
-        if config["path"] == path_keys: return "string_choice", config
-    for _, config in FACTOR_SETTINGS_CONFIG.items():
-        if config["path"] == path_keys: return "factor", config
-    return None, None
+    return SETTING_CONFIG_BY_PATH.get(tuple(path_keys), (None, None))
+
+def path_to_str(path_keys): return ".".join(map(str, path_keys))
+
+def sha256_file(filepath):
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(SAVE_SNAPSHOT_HASH_CHUNK), b""): h.update(block)
+    return h.hexdigest()
+
+def scan_directory_files(root_dir):
+    # {relative posix path: os.stat_result} for every regular file below root_dir.
+    found = {}
+    for dirpath, _, filenames in os.walk(root_dir):
+        for fname in filenames:
+            full = os.path.join(dirpath, fname)
+            try: found[os.path.relpath(full, root_dir).replace(os.sep, "/")] = os.stat(full)
+            except OSError: pass
+    return found
+
+def compute_subtree_hashes(node, path=(), hashes=None):
+    # Fills hashes[path] with a digest for every dict/list/leaf so diffs can skip identical subtrees.
+    if hashes is None: hashes = {}
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(node, dict):
+        h.update(b"{")
+        for key in sorted(node): h.update(json.dumps(key).encode()); h.update(compute_subtree_hashes(node[key], path + (key,), hashes)[path + (key,)])
+    elif isinstance(node, list):
+        h.update(b"[")
+        for idx, item in enumerate(node): h.update(compute_subtree_hashes(item, path + (idx,), hashes)[path + (idx,)])
+    else: h.update(json.dumps(node).encode())
+    hashes[path] = h.digest()
+    return hashes
+
+def diff_settings(old, new, old_hashes=None, new_hashes=None, path=()):
+    # Returns [(path_tuple, kind, old_value, new_value)] with kind in "added", "removed", "changed".
+    if old_hashes is not None and new_hashes is not None and path in old_hashes and old_hashes.get(path) == new_hashes.get(path): return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        diffs = []
+        for key in old:
+            if key not in new: diffs.append((path + (key,), "removed", old[key], None))
+            else: diffs.extend(diff_settings(old[key], new[key], old_hashes, new_hashes, path + (key,)))
+        diffs.extend((path + (key,), "added", None, new[key]) for key in new if key not in old)
+        return diffs
+    if isinstance(old, list) and isinstance(new, list):
+        diffs = []
+        for idx in range(max(len(old), len(new))):
+            if idx >= len(new): diffs.append((path + (idx,), "removed", old[idx], None))
+            elif idx >= len(old): diffs.append((path + (idx,), "added", None, new[idx]))
+            else: diffs.extend(diff_settings(old[idx], new[idx], old_hashes, new_hashes, path + (idx,)))
+        return diffs
+    if old == new and type(old) == type(new): return []
+    return [(path, "changed", old, new)]
+
+def format_settings_diff(diffs):
+    if not diffs: return "No differences."
+    fmt = lambda v: json.dumps(v) if not isinstance(v, (dict, list)) else json.dumps(v)[:80]
+    lines = []
+    for path, kind, old, new in diffs:
+        if kind == "changed": lines.append(f"~ {path_to_str(path)}: {fmt(old)} -> {fmt(new)}")
+        elif kind == "added": lines.append(f"+ {path_to_str(path)}: {fmt(new)}")
+        else: lines.append(f"- {path_to_str(path)}: {fmt(old)}")
+    return "\n".join(lines)
+
+# --- Config File Locking and Merging ---
+@contextlib.contextmanager
+def config_file_lock(json_path, timeout=CONFIG_LOCK_TIMEOUT):
+    # Exclusive advisory lock on "<config>.lock", shared by every editor and API instance. Raises TimeoutError,
+    # or another OSError (e.g. PermissionError) when the lock file cannot be opened.
+    lock_file = open(json_path + CONFIG_LOCK_SUFFIX, "a+b")
+    deadline = time.monotonic() + timeout
+    try:
+        while not try_lock_file(lock_file):
+            if time.monotonic() >= deadline: raise TimeoutError(f"'{json_path}' is locked by another editor.")
+            time.sleep(CONFIG_LOCK_POLL_INTERVAL)
+        yield
+    finally:
+        unlock_file(lock_file); lock_file.close()
+
+def try_lock_file(lock_file):
+    # Non-blocking exclusive lock on an open file; released by unlock_file or when the process dies.
+    try:
+        if fcntl: fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        elif msvcrt: lock_file.seek(0); msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError: return False
+
+def unlock_file(lock_file):
+    try:
+        if fcntl: fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        elif msvcrt: lock_file.seek(0); msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    except OSError: pass
+
+_MISSING = object() # Key absent on one side of a three-way merge
+
+def _keyed_entries(value, key_field):
+    # {key: entry} for a list of objects with unique string keys, else None.
+    if not isinstance(value, list): return None
+    entries = OrderedDict()
+    for entry in value:
+        key = entry.get(key_field) if isinstance(entry, dict) else None
+        if not isinstance(key, str) or key in entries: return None
+        entries[key] = entry
+    return entries
+
+def three_way_merge(base, mine, theirs, prefer_mine=False, path=()):
+    # Field-level merge of two edits of `base`. Lists in MERGE_KEYED_LISTS (userGroups) are merged entry by entry,
+    # other lists as a whole. Returns (merged, conflicts) where conflicts are (path, base, mine, theirs) for
+    # fields both sides changed differently, resolved by prefer_mine. Keyed entries appear in paths by key.
+    same = lambda a, b: a is b or (type(a) is type(b) and a == b)
+    if same(mine, theirs) or same(base, mine): return theirs, []
+    if same(base, theirs): return mine, []
+    key_field = MERGE_KEYED_LISTS.get(path)
+    if key_field:
+        base_entries, my_entries, their_entries = (_keyed_entries([] if v is _MISSING else v, key_field) for v in (base, mine, theirs))
+        if base_entries is not None and my_entries is not None and their_entries is not None:
+            merged, conflicts = [], []
+            for key in list(their_entries) + [k for k in my_entries if k not in their_entries]: # Their order, then groups only I added
+                value, sub = three_way_merge(base_entries.get(key, _MISSING), my_entries.get(key, _MISSING), their_entries.get(key, _MISSING), prefer_mine, path + (key,))
+                conflicts.extend(sub)
+                if value is not _MISSING: merged.append(value)
+            return merged, conflicts
+    if isinstance(mine, dict) and isinstance(theirs, dict) and isinstance(base, dict) or (base is _MISSING and isinstance(mine, dict) and isinstance(theirs, dict)):
+        base = base if isinstance(base, dict) else {}
+        merged, conflicts = {}, []
+        for key in list(theirs) + [k for k in mine if k not in theirs]:
+            value, sub = three_way_merge(base.get(key, _MISSING), mine.get(key, _MISSING), theirs.get(key, _MISSING), prefer_mine, path + (key,))
+            conflicts.extend(sub)
+            if value is not _MISSING: merged[key] = value
+        return merged, conflicts
+    return (mine if prefer_mine else theirs), [(path, base, mine, theirs)]
+
+def format_merge_conflicts(conflicts, limit=15):
+    fmt = lambda v: "(removed)" if v is _MISSING else json.dumps(v)[:60]
+    lines = [f"- {path_to_str(path)}: yours {fmt(mine)}, theirs {fmt(theirs)}" for path, _, mine, theirs in conflicts[:limit]]
+    if len(conflicts) > limit: lines.append(f"... and {len(conflicts) - limit} more")
+    return "\n".join(lines)
+
+# --- Defaults and Merging ---
+def get_hardcoded_defaults():
+    defaults = {
+        "name": "Enshrouded Server", "saveDirectory": "./savegame", "logDirectory": "./logs",
+        "ip": "0.0.0.0", "queryPort": 15637, "slotCount": 16,
+        "enableVoiceChat": False, "enableTextChat": False,
+    }
+    defaults["gameSettings"] = {}
+    for key, conf in DURATION_SETTINGS_CONFIG.items():
+        defaults["gameSettings"][key] = minutes_to_nanoseconds_gui(str(conf["normal_minutes"]))
+    
+    for key_conf_name, conf in STRING_CHOICE_SETTINGS_CONFIG.items():
+        target_key = conf["path"][-1]
+        if conf["path"][0] == "gameSettings": defaults["gameSettings"][target_key] = conf["normal"]
+        else: defaults[target_key] = conf["normal"]
+    
+    for key_conf_name, conf in FACTOR_SETTINGS_CONFIG.items():
+        target_key = conf["path"][-1]
+        defaults["gameSettings"][target_key] = conf.get("normal_float", 1.0)
+
+    defaults["userGroups"] = [
+        {"name": "Admin", "password": "AdminPassword", "canKickBan": True, "canAccessInventories": True, "canEditBase": True, "canExtendBase": True, "reservedSlots": 0},
+        {"name": "Friend", "password": "FriendPassword", "canKickBan": False, "canAccessInventories": True, "canEditBase": True, "canExtendBase": False, "reservedSlots": 0},
+        {"name": "Guest", "password": "GuestPassword", "canKickBan": False, "canAccessInventories": False, "canEditBase": False, "canExtendBase": False, "reservedSlots": 0}
+    ]
+    return defaults
+
+def parse_readme_file(readme_path=README_FILE, log=log_message_gui):
+    try:
+        with open(readme_path, "r", encoding="utf-8") as f: readme_content = f.read()
+    except Exception as e: log(f"Error reading readme: {e}", "ERROR"); return None, FALLBACK_GAME_VERSION
+    version = FALLBACK_GAME_VERSION
+    v_match = re.search(r"^Version:\s*(\S+)", readme_content, re.MULTILINE)
+    if v_match: version = v_match.group(1)
+    json_match = re.search(r"DEFAULT enshrouded_server\.json(?: / VERSION \S+)?\s*(\{[\s\S]*?\n\})", readme_content, re.MULTILINE)
+    if json_match:
+        try: return json.loads(json_match.group(1)), version
+        except json.JSONDecodeError as e: log(f"Error decoding JSON from readme: {e}", "ERROR"); return None, version
+    log("Could not find default JSON block in readme.", "WARNING"); return None, version
+
+def recursive_merge(default, existing):
+    # Fills keys missing from existing with values from default; existing values always win.
+    for key, val in default.items():
+        if key not in existing: existing[key] = val
+        elif isinstance(val, dict) and isinstance(existing.get(key), dict): recursive_merge(val, existing[key])
+
+def parse_backup_name(fname):
+    # "<base>_<YYYYmmdd_HHMMSS>[_<microseconds>][-<n>][_<reason>].old" -> (datetime or None, reason or None)
+    match = BACKUP_NAME_PATTERN.search(fname)
+    if not match: return None, None
+    try: taken_at = datetime.strptime(match.group(1) + "_" + (match.group(2) or "000000"), BACKUP_TIMESTAMP_FORMAT)
+    except ValueError: taken_at = None
+    return taken_at, match.group(3)
+
+def copy_file_atomic(src, dst):
+    # Readers never see a half-copied file: copy next to dst, then swap it in.
+    tmp_path = f"{dst}.tmp{os.getpid()}"
+    shutil.copy2(src, tmp_path); os.replace(tmp_path, dst)
+
+def write_json_atomic(data, filepath):
+    os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+    tmp_path = f"{filepath}.tmp{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f: json.dump(data, f, indent=4)
+    os.replace(tmp_path, filepath)
+
+# --- Config Migrations ---
+# Registered with register_migration(version, description, *ops): the ops run when a config is brought from a
+# version below `version` up to `version` or later. Ops only act when their source settings are present (and
+# convert ops when `when` accepts the value), so unstamped configs can safely run the full chain.
+MIGRATIONS = []
+
+def parse_game_version(version):
+    # "0.7.3.0" -> (0, 7, 3, 0); None for missing or unparsable versions (e.g. FALLBACK_GAME_VERSION).
+    numbers = re.findall(r"\d+", version) if isinstance(version, str) else []
+    return tuple(int(n) for n in numbers) if numbers else None
+
+def register_migration(version, description, *ops):
+    version_key = parse_game_version(version)
+    if version_key is None: raise ValueError(f"Migration '{description}' needs a numeric game version, got {version!r}")
+    MIGRATIONS.append((version_key, version, description, ops))
+    MIGRATIONS.sort(key=lambda m: m[0]); plan_migrations.cache_clear()
+
+def _pop_setting(settings, path_keys):
+    parent = settings
+    for key in path_keys[:-1]:
+        parent = parent.get(key) if isinstance(parent, dict) else None
+    if isinstance(parent, dict) and path_keys[-1] in parent: return True, parent.pop(path_keys[-1])
+    return False, None
+
+def _get_setting(settings, path_keys):
+    node = settings
+    for key in path_keys:
+        if not (isinstance(node, dict) and key in node): return False, None
+        node = node[key]
+    return True, node
+
+def _put_setting(settings, path_keys, value):
+    node = settings
+    for key in path_keys[:-1]: node = node.setdefault(key, {})
+    node[path_keys[-1]] = value
+
+def rename_setting(old_path, new_path):
+    old_path, new_path = tuple(old_path), tuple(new_path)
+    def op(settings):
+        if not _get_setting(settings, old_path)[0] or _get_setting(settings, new_path)[0]: return None
+        _put_setting(settings, new_path, _pop_setting(settings, old_path)[1])
+        return f"renamed {path_to_str(old_path)} -> {path_to_str(new_path)}"
+    return op
+
+def convert_setting(path_keys, convert, when=None):
+    path_keys = tuple(path_keys)
+    def op(settings):
+        found, value = _get_setting(settings, path_keys)
+        if not found or (when is not None and not when(value)): return None
+        _put_setting(settings, path_keys, convert(value))
+        return f"converted {path_to_str(path_keys)}"
+    return op
+
+def split_setting(path_keys, targets):
+    # targets: {new_path_tuple: func(old_value) -> new_value}; the old setting is removed.
+    path_keys = tuple(path_keys)
+    def op(settings):
+        found, value = _pop_setting(settings, path_keys)
+        if not found: return None
+        for new_path, derive in targets.items(): _put_setting(settings, tuple(new_path), derive(value))
+        return f"split {path_to_str(path_keys)} -> {', '.join(path_to_str(p) for p in targets)}"
+    return op
+
+def merge_settings(paths, new_path, combine):
+    # combine receives the old values in `paths` order; the old settings are removed.
+    paths, new_path = [tuple(p) for p in paths], tuple(new_path)
+    def op(settings):
+        if not all(_get_setting(settings, p)[0] for p in paths): return None
+        _put_setting(settings, new_path, combine(*[_pop_setting(settings, p)[1] for p in paths]))
+        return f"merged {', '.join(path_to_str(p) for p in paths)} -> {path_to_str(new_path)}"
+    return op
+
+@functools.lru_cache(maxsize=64)
+def plan_migrations(from_version, to_version):
+    # Flat, ordered op list for one (from, to) pair; cached so a fleet upgrade plans each pair only once.
+    to_key = parse_game_version(to_version)
+    if to_key is None: return ()
+    from_key = parse_game_version(from_version) or ()
+    return tuple((version, description, op) for key, version, description, ops in MIGRATIONS
+                 if from_key < key <= to_key for op in ops)
+
+def stamp_config_version(settings, version):
+    if parse_game_version(version) is not None: settings[CONFIG_VERSION_KEY] = version
+
+def migrate_settings(settings, to_version):
+    # Applies the cached plan in place and stamps the target version. Returns the change descriptions.
+    # Only moves forward: a config already at or past to_version (e.g. opened with an older readme) is left alone.
+    to_key, from_key = parse_game_version(to_version), parse_game_version(settings.get(CONFIG_VERSION_KEY))
+    if to_key is None or (from_key is not None and from_key >= to_key): return []
+    applied = []
+    for version, description, op in plan_migrations(settings.get(CONFIG_VERSION_KEY), to_version):
+        change = op(settings)
+        if change: applied.append(f"{version}: {description} ({change})")
+    stamp_config_version(settings, to_version)
+    return applied
+
+def migrate_config_files(paths, to_version=None, dry_run=False):
+    if to_version is None: to_version = parse_readme_file(README_FILE)[1]
+    if parse_game_version(to_version) is None:
+        log_message_gui(f"Cannot migrate: target game version '{to_version}' is not a version number.", "ERROR"); return 1
+    failed = migrated = 0
+    for path in paths:
+        try:
+            with config_file_lock(path):
+                with open(path, "r", encoding="utf-8") as f: original = json.load(f)
+                settings = json.loads(json.dumps(original)); applied = migrate_settings(settings, to_version)
+                if not applied: continue # Like the editor: a stamp alone is not worth rewriting (and backing up) the file
+                for change in applied: log_message_gui(f"{path}: {change}")
+                if not dry_run:
+                    if not backup_config_file(path, f"pre_migration_{to_version}"): raise OSError("backup failed, file left unchanged")
+                    write_json_atomic(settings, path)
+            migrated += 1
+        except Exception as e: failed += 1; log_message_gui(f"Could not migrate '{path}': {e}", "ERROR")
+    verb = "would be migrated" if dry_run else "migrated"
+    log_message_gui(f"Migration to {to_version}: {migrated} {verb}, {len(paths) - migrated - failed} unchanged, {failed} failed.")
+    return 1 if failed else 0
+
+# --- Settings Validation ---
+def validate_settings(settings, defaults=None):
+    # Returns a list of (path_tuple, message). Ranges come from the setting configs; other scalar
+    # settings must keep the JSON type of their default.
+    if not isinstance(settings, dict): return [((), "settings must be a JSON object")]
+    errors = []
+    is_number = lambda v: isinstance(v, (int, float)) and not isinstance(v, bool)
+    for conf in FACTOR_SETTINGS_CONFIG.values():
+        found, value = _get_setting(settings, conf["path"])
+        if not found: continue
+        if not is_number(value): errors.append((tuple(conf["path"]), "must be a number"))
+        elif not conf["min_float"] <= value <= conf["max_float"]: errors.append((tuple(conf["path"]), f"must be between {conf['min_float']} and {conf['max_float']}"))
+    for conf in DURATION_SETTINGS_CONFIG.values():
+        found, value = _get_setting(settings, conf["path"])
+        if not found: continue
+        if not is_number(value): errors.append((tuple(conf["path"]), "must be a duration in nanoseconds"))
+        elif not conf["min_minutes"] <= value / NANOSECONDS_PER_MINUTE <= conf["max_minutes"]:
+            errors.append((tuple(conf["path"]), f"must be between {conf['min_minutes']} and {conf['max_minutes']} minutes"))
+    for conf in STRING_CHOICE_SETTINGS_CONFIG.values():
+        found, value = _get_setting(settings, conf["path"])
+        if found and value not in conf["options"]: errors.append((tuple(conf["path"]), f"must be one of {', '.join(conf['options'])}"))
+    for path_keys, low, high in ((("queryPort",), 1, 65535), (("slotCount",), 1, 16)):
+        found, value = _get_setting(settings, path_keys)
+        if found and not (isinstance(value, int) and not isinstance(value, bool) and low <= value <= high): errors.append((path_keys, f"must be an integer between {low} and {high}"))
+    checked = {path for path, _ in errors} | {tuple(c["path"]) for c in (*FACTOR_SETTINGS_CONFIG.values(), *DURATION_SETTINGS_CONFIG.values(), *STRING_CHOICE_SETTINGS_CONFIG.values())}
+    def check_types(node, default, path):
+        for key, default_value in default.items():
+            if key not in node or (*path, key) in checked or key == "userGroups": continue
+            value = node[key]
+            if isinstance(default_value, dict):
+                if isinstance(value, dict): check_types(value, default_value, (*path, key))
+                else: errors.append(((*path, key), "must be an object"))
+            elif isinstance(default_value, bool) and not isinstance(value, bool): errors.append(((*path, key), "must be true or false"))
+            elif is_number(default_value) and not is_number(value): errors.append(((*path, key), "must be a number"))
+            elif isinstance(default_value, str) and not isinstance(value, str): errors.append(((*path, key), "must be a string"))
+    if isinstance(defaults, dict): check_types(settings, defaults, ())
+    user_groups = settings.get("userGroups", [])
+    if not isinstance(user_groups, list): errors.append((("userGroups",), "must be a list")); user_groups = []
+    seen_names = set()
+    for idx, group in enumerate(user_groups):
+        if not isinstance(group, dict): errors.append((("userGroups", idx), "must be an object")); continue
+        name = group.get("name")
+        if not isinstance(name, str) or not name.strip(): errors.append((("userGroups", idx, "name"), "must be a non-empty string"))
+        elif name in seen_names: errors.append((("userGroups", idx, "name"), f"duplicate group name '{name}'"))
+        else: seen_names.add(name)
+        for key in ("canKickBan", "canAccessInventories", "canEditBase", "canExtendBase"):
+            if key in group and not isinstance(group[key], bool): errors.append((("userGroups", idx, key), "must be true or false"))
+        slots = group.get("reservedSlots", 0)
+        if not (isinstance(slots, int) and not isinstance(slots, bool) and slots >= 0): errors.append((("userGroups", idx, "reservedSlots"), "must be a non-negative integer"))
+    return errors
+
+# --- User Group Import/Export ---
+def _user_group_file_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv": return "csv"
+    if ext in (".jsonl", ".ndjson"): return "jsonl"
+    raise ValueError(f"Unsupported user group file '{path}': use .csv or .jsonl")
+
+def iter_user_group_rows(path):
+    # Yields (line_number, row_dict) without reading the whole file; unparsable JSON lines yield (line, None).
+    if _user_group_file_format(path) == "csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            for row in reader: yield reader.line_num, {k: v for k, v in row.items() if k is not None and v not in (None, "")}
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip(): continue
+                try: row = json.loads(line)
+                except json.JSONDecodeError: yield line_no, None; continue
+                yield line_no, row if isinstance(row, dict) else None
+
+def parse_user_group_row(row, existing=None):
+    # Validates one row against the userGroups schema. Missing fields keep the existing group's values (or the
+    # add_user_group defaults for a new group). Returns (group, error_message).
+    if row is None: return None, "not a JSON object"
+    unknown = sorted(set(row) - set(USER_GROUP_FIELDS))
+    if unknown: return None, f"unknown field(s): {', '.join(unknown)}"
+    name = row.get("name")
+    if not isinstance(name, str) or not name.strip(): return None, "name is required"
+    if existing is None and "password" not in row: return None, f"password is required for new group '{name.strip()}'"
+    group = dict(existing) if existing else {"name": name.strip(), "password": "", "canKickBan": False, "canAccessInventories": False,
+                                             "canEditBase": False, "canExtendBase": False, "reservedSlots": 0}
+    group["name"] = name.strip()
+    if "password" in row:
+        if not isinstance(row["password"], str) or not row["password"]: return None, "password must be a non-empty string"
+        group["password"] = row["password"]
+    for key in USER_GROUP_BOOL_FIELDS:
+        if key not in row: continue
+        value = row[key]
+        if isinstance(value, str) and value.strip().lower() in ("true", "yes", "y", "1"): value = True
+        elif isinstance(value, str) and value.strip().lower() in ("false", "no", "n", "0"): value = False
+        if not isinstance(value, bool): return None, f"{key} must be true or false"
+        group[key] = value
+    if "reservedSlots" in row:
+        value = row["reservedSlots"]
+        if isinstance(value, str) and value.strip().isdigit(): value = int(value)
+        if not (isinstance(value, int) and not isinstance(value, bool) and value >= 0): return None, "reservedSlots must be a non-negative integer"
+        group["reservedSlots"] = value
+    return group, None
+
+def plan_user_group_import(path, existing_groups):
+    # Streams the file and returns (new_user_groups, report) without touching existing_groups. Groups are matched
+    # by name: existing ones are updated in place, new ones appended in file order, later rows win over earlier.
+    # Matched groups whose normalized values end up identical are reported as unchanged, not updated.
+    groups = list(existing_groups)
+    index = {g.get("name"): i for i, g in enumerate(groups) if isinstance(g, dict)}
+    report = {"added": 0, "updated": 0, "unchanged": 0, "duplicates": 0, "rejected": 0, "errors": []}
+    touched = set()
+    for line_no, row in iter_user_group_rows(path):
+        name = row.get("name").strip() if isinstance(row, dict) and isinstance(row.get("name"), str) else None
+        position = index.get(name)
+        group, error = parse_user_group_row(row, groups[position] if position is not None else None)
+        if error:
+            report["rejected"] += 1
+            if len(report["errors"]) < USER_GROUP_IMPORT_MAX_ERRORS: report["errors"].append(f"line {line_no}: {error}")
+            continue
+        if position is None:
+            index[name] = len(groups); groups.append(group); report["added"] += 1
+        else:
+            if name in touched: report["duplicates"] += 1
+            groups[position] = group
+        touched.add(name)
+    matched = {index[name] for name in touched if index[name] < len(existing_groups)}
+    report["updated"] = sum(1 for i in matched if groups[i] != existing_groups[i]) # Compared once per group, so duplicate rows count once
+    report["unchanged"] = len(matched) - report["updated"]
+    return groups, report
+
+def export_user_groups(user_groups, path):
+    # Writes one row per group to a temp file, then swaps it in. Returns the number of groups written.
+    file_format = _user_group_file_format(path); tmp_path = f"{path}.tmp{os.getpid()}"; count = 0
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=USER_GROUP_FIELDS, extrasaction="ignore") if file_format == "csv" else None
+        if writer: writer.writeheader()
+        for group in user_groups:
+            if not isinstance(group, dict): continue
+            if writer: writer.writerow({k: (str(v).lower() if isinstance(v, bool) else v) for k, v in group.items()})
+            else: f.write(json.dumps({k: group[k] for k in USER_GROUP_FIELDS if k in group}) + "\n")
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+# --- Fleet Settings Store ---
+FLEET_QUERY_PATTERN = re.compile(r"^\s*(?P<path>[^<>=!~]+?)\s*(?:(?P<op>>=|<=|!=|=|>|<|~)\s*(?P<value>.*?))?\s*$")
+FLEET_GROUP_PATH_PATTERN = re.compile(r"^userGroups\[(?P<group>[^\]]+)\]\.(?P<field>\w+)$")
+
+def fleet_setting_paths():
+    # The settings the editor knows about (menu defs); user group fields are stored per group name.
+    paths = []
+    for menu_def in (general_settings_menu_def, player_settings_menu_def, world_settings_menu_def, enemy_settings_menu_def,
+                     resource_settings_menu_def, experience_settings_menu_def):
+        paths.extend(tuple(path_keys) for path_keys, _, _ in menu_def.values())
+    return tuple(dict.fromkeys(paths))
+
+def flatten_settings_for_fleet(settings):
+    # Rows of (path, group_name, value_num, value_text); numbers go to value_num, strings to value_text, bools to both.
+    def row(path, group, value):
+        if isinstance(value, bool): return (path, group, int(value), "true" if value else "false")
+        if isinstance(value, (int, float)): return (path, group, value, None)
+        if isinstance(value, str): return (path, group, None, value)
+        return (path, group, None, json.dumps(value))
+    rows = []
+    for path_keys in fleet_setting_paths():
+        found, value = _get_setting(settings, path_keys)
+        if found: rows.append(row(path_to_str(path_keys), None, value))
+    for group in settings.get("userGroups") or []:
+        if not isinstance(group, dict): continue
+        rows.extend(row(f"userGroups.{key}", str(group.get("name")), group[key]) for key in USER_GROUP_FIELDS if key in group)
+    return rows
+
+class FleetStore:
+    # SQLite index of flattened settings for many server roots and their backup history. Ingest is incremental:
+    # files with the same size/mtime are skipped without reading, files with the same hash without re-flattening.
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, server TEXT NOT NULL, path TEXT NOT NULL UNIQUE, kind TEXT NOT NULL,
+                                          taken_at TEXT, size INTEGER, mtime_ns INTEGER, sha256 TEXT);
+        CREATE TABLE IF NOT EXISTS settings (file_id INTEGER NOT NULL, path TEXT NOT NULL, group_name TEXT, value_num REAL, value_text TEXT);
+        CREATE INDEX IF NOT EXISTS settings_by_num ON settings (path, value_num);
+        CREATE INDEX IF NOT EXISTS settings_by_text ON settings (path, value_text);
+        CREATE INDEX IF NOT EXISTS settings_by_file ON settings (file_id);
+        CREATE INDEX IF NOT EXISTS files_by_server ON files (server, kind);
+    """
+
+    def __init__(self, db_path=FLEET_DB_FILE, log=log_message_gui):
+        if sqlite3 is None: raise RuntimeError("The fleet store needs Python's sqlite3 module, which is not available.")
+        self.db_path = db_path; self.log = log
+        conn = self._connect()
+        try: conn.executescript(self.SCHEMA)
+        finally: conn.close()
+
+    def _connect(self):
+        # One short-lived connection per call, so the GUI thread and ingest workers never share one.
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def _candidate_files(root_dir, include_backups):
+        json_path = os.path.join(root_dir, JSON_FILE)
+        if os.path.isfile(json_path): yield json_path, "config", datetime.fromtimestamp(os.path.getmtime(json_path))
+        backup_dir = os.path.join(root_dir, BACKUP_DIR)
+        if not include_backups or not os.path.isdir(backup_dir): return
+        prefix = os.path.splitext(JSON_FILE)[0]
+        for entry in os.scandir(backup_dir):
+            if not (entry.is_file() and entry.name.startswith(prefix) and entry.name.endswith(".old")): continue
+            taken_at = parse_backup_name(entry.name)[0] or datetime.fromtimestamp(entry.stat().st_mtime)
+            yield entry.path, "backup", taken_at
+
+    def ingest(self, roots, include_backups=True):
+        # roots: {server_name: root_dir}. Returns counts of scanned/ingested/unchanged/removed/failed files.
+        stats = {"scanned": 0, "ingested": 0, "unchanged": 0, "removed": 0, "failed": 0}
+        conn = self._connect()
+        try:
+            with conn:
+                for server, root_dir in roots.items():
+                    known = {row[0]: row[1:] for row in conn.execute("SELECT path, id, size, mtime_ns, sha256 FROM files WHERE server = ?", (server,))}
+                    seen = set()
+                    for path, kind, taken_at in self._candidate_files(os.path.abspath(root_dir), include_backups):
+                        seen.add(path); stats["scanned"] += 1
+                        try: st = os.stat(path)
+                        except OSError: continue
+                        prev = known.get(path) or conn.execute("SELECT id, size, mtime_ns, sha256 FROM files WHERE path = ?", (path,)).fetchone()
+                        if prev and path not in known: # Indexed under another server name (root renamed or listed twice): it moves to this one
+                            conn.execute("UPDATE files SET server = ? WHERE id = ?", (server, prev[0]))
+                        if prev and prev[1] == st.st_size and prev[2] == st.st_mtime_ns: stats["unchanged"] += 1; continue
+                        digest = sha256_file(path)
+                        if prev and prev[3] == digest:
+                            conn.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?", (st.st_size, st.st_mtime_ns, prev[0])); stats["unchanged"] += 1; continue
+                        try:
+                            with open(path, "r", encoding="utf-8") as f: settings = json.load(f)
+                            if not isinstance(settings, dict): raise ValueError("not a JSON object")
+                        except (OSError, ValueError) as e: self.log(f"Fleet ingest skipped '{path}': {e}", "WARNING"); stats["failed"] += 1; continue
+                        if prev: conn.execute("DELETE FROM settings WHERE file_id = ?", (prev[0],)); conn.execute("DELETE FROM files WHERE id = ?", (prev[0],))
+                        file_id = conn.execute("INSERT INTO files (server, path, kind, taken_at, size, mtime_ns, sha256) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                               (server, path, kind, taken_at.isoformat(timespec="seconds"), st.st_size, st.st_mtime_ns, digest)).lastrowid
+                        conn.executemany("INSERT INTO settings (file_id, path, group_name, value_num, value_text) VALUES (?, ?, ?, ?, ?)",
+                                         [(file_id, *row) for row in flatten_settings_for_fleet(settings)])
+                        stats["ingested"] += 1
+                    for path in known.keys() - seen: # Evicted backups, deleted configs
+                        conn.execute("DELETE FROM settings WHERE file_id = ?", (known[path][0],)); conn.execute("DELETE FROM files WHERE id = ?", (known[path][0],))
+                        stats["removed"] += 1
+        finally: conn.close()
+        return stats
+
+    def query(self, expression, include_history=False, limit=FLEET_QUERY_LIMIT):
+        # expression: "path", "path OP value" with OP in = != > >= < <= ~ (substring), e.g. "gameSettings.enemyDamageFactor > 2",
+        # "userGroups[Admin].password = AdminPassword" or "userGroups.canKickBan = true". Returns a list of dicts.
+        match = FLEET_QUERY_PATTERN.match(expression or "")
+        if not match: raise ValueError(f"Cannot parse query '{expression}'.")
+        path, op, raw_value = match.group("path").strip(), match.group("op"), match.group("value")
+        group_match = FLEET_GROUP_PATH_PATTERN.match(path)
+        sql = ["SELECT f.server, f.kind, f.taken_at, s.path, s.group_name, s.value_num, s.value_text FROM settings s JOIN files f ON f.id = s.file_id WHERE s.path = ?"]
+        params = [f"userGroups.{group_match.group('field')}" if group_match else path]
+        if group_match: sql.append("AND s.group_name = ?"); params.append(group_match.group("group"))
+        if not include_history: sql.append("AND f.kind = 'config'")
+        if op == "~": # Case-insensitive substring; wildcards in the value are matched literally
+            sql.append("AND s.value_text LIKE ? ESCAPE '\\'"); params.append("%" + re.sub(r"([\\%_])", r"\\\1", raw_value) + "%")
+        elif op:
+            try: value = json.loads(raw_value)
+            except ValueError: value = raw_value
+            if isinstance(value, bool): value = "true" if value else "false"
+            column = "s.value_num" if isinstance(value, (int, float)) else "s.value_text"
+            sql.append(f"AND {column} {op} ?"); params.append(value if isinstance(value, (int, float, str)) else json.dumps(value))
+        sql.append("ORDER BY f.server, f.kind DESC, f.taken_at DESC LIMIT ?"); params.append(limit)
+        conn = self._connect()
+        try: rows = conn.execute(" ".join(sql), params).fetchall()
+        finally: conn.close()
+        results = []
+        for server, kind, taken_at, setting_path, group_name, value_num, value_text in rows:
+            value = value_text if value_text is not None else (int(value_num) if value_num is not None and float(value_num).is_integer() else value_num)
+            setting = f"userGroups[{group_name}].{setting_path.split('.', 1)[1]}" if group_name is not None else setting_path
+            results.append({"server": server, "kind": kind, "taken_at": taken_at, "setting": setting, "value": value})
+        return results
+
+def run_fleet_command(db_path, roots=None, query=None, include_history=False):
+    try: store = FleetStore(db_path)
+    except (RuntimeError, OSError) as e: log_message_gui(str(e), "ERROR"); return 1
+    if roots:
+        stats = store.ingest(roots)
+        log_message_gui(f"Fleet ingest: {stats['ingested']} ingested, {stats['unchanged']} unchanged, {stats['removed']} removed, {stats['failed']} failed.")
+    if query:
+        try: results = store.query(query, include_history=include_history)
+        except (ValueError, sqlite3.Error) as e: log_message_gui(f"Fleet query failed: {e}", "ERROR"); return 1
+        for r in results: print(f"{r['server']}\t{r['kind']}\t{r['taken_at']}\t{r['setting']}\t{json.dumps(r['value'])}")
+        log_message_gui(f"Fleet query: {len(results)} match(es){' (limit reached)' if len(results) >= FLEET_QUERY_LIMIT else ''}.")
+    return 0
+
+# --- JSON Patch (RFC 6902) ---
+def parse_json_pointer(pointer):
+    # "/userGroups/0/name" -> ("userGroups", "0", "name"); "" is the whole document.
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")): raise ValueError(f"invalid JSON pointer {pointer!r}")
+    return tuple(token.replace("~1", "/").replace("~0", "~") for token in pointer.split("/")[1:]) if pointer else ()
+
+def to_json_pointer(path_keys): return "".join("/" + str(k).replace("~", "~0").replace("/", "~1") for k in path_keys)
+
+def compile_json_patch(patch):
+    # Checks the patch once and pre-parses its pointers: [(op, path_tokens, from_tokens, value, raw_op)].
+    # The compiled form is immutable and can be applied to any number of documents.
+    if not isinstance(patch, list): raise ValueError("a JSON patch must be a list of operations")
+    compiled = []
+    for idx, operation in enumerate(patch):
+        where = f"operation {idx}"
+        if not isinstance(operation, dict) or operation.get("op") not in JSON_PATCH_OPS:
+            raise ValueError(f"{where}: 'op' must be one of {', '.join(JSON_PATCH_OPS)}")
+        op = operation["op"]
+        if "path" not in operation: raise ValueError(f"{where} ({op}): missing 'path'")
+        path = parse_json_pointer(operation["path"])
+        source = None
+        if op in ("move", "copy"):
+            if "from" not in operation: raise ValueError(f"{where} ({op}): missing 'from'")
+            source = parse_json_pointer(operation["from"])
+            if op == "move" and path[:len(source)] == source and path != source: raise ValueError(f"{where}: cannot move a value into itself")
+        if op in ("add", "replace", "test") and "value" not in operation: raise ValueError(f"{where} ({op}): missing 'value'")
+        compiled.append((op, path, source, json.dumps(operation.get("value")), operation))
+    return tuple(compiled)
+
+def _json_equal(a, b):
+    # RFC 6902 "test" equality: numbers compare by value, but true/false never equal 1/0.
+    if isinstance(a, bool) or isinstance(b, bool): return type(a) is type(b) and a == b
+    if isinstance(a, dict) and isinstance(b, dict): return a.keys() == b.keys() and all(_json_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list): return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)): return a == b
+    return type(a) is type(b) and a == b
+
+def _json_patch_index(container, token, adding=False):
+    if token == "-" and adding: return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")): raise ValueError(f"'{token}' is not an array index")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not adding): raise ValueError(f"array index {index} out of range")
+    return index
+
+def _json_patch_resolve(document, tokens):
+    for depth, token in enumerate(tokens):
+        if isinstance(document, dict) and token in document: document = document[token]
+        elif isinstance(document, list): document = document[_json_patch_index(document, token)]
+        else: raise ValueError(f"path '{to_json_pointer(tokens[:depth + 1])}' does not exist")
+    return document
+
+def _json_patch_add(document, tokens, value):
+    if not tokens: return value
+    parent = _json_patch_resolve(document, tokens[:-1])
+    if isinstance(parent, dict): parent[tokens[-1]] = value
+    elif isinstance(parent, list): parent.insert(_json_patch_index(parent, tokens[-1], adding=True), value)
+    else: raise ValueError(f"'{to_json_pointer(tokens[:-1])}' is not an object or array")
+    return document
+
+def _json_patch_remove(document, tokens):
+    if not tokens: raise ValueError("cannot remove the whole document")
+    parent = _json_patch_resolve(document, tokens[:-1])
+    if isinstance(parent, dict) and tokens[-1] in parent: return parent.pop(tokens[-1])
+    if isinstance(parent, list): return parent.pop(_json_patch_index(parent, tokens[-1]))
+    raise ValueError(f"path '{to_json_pointer(tokens)}' does not exist")
+
+def apply_json_patch(document, compiled):
+    # Applies every operation to a copy and returns it; the input is never modified, so a failing
+    # operation (raised as ValueError) leaves the caller's settings untouched.
+    result = json.loads(json.dumps(document))
+    for idx, (op, path, source, value_json, _) in enumerate(compiled):
+        try:
+            if op == "add": result = _json_patch_add(result, path, json.loads(value_json))
+            elif op == "remove": _json_patch_remove(result, path)
+            elif op == "replace": # In place, so object key order (and the saved file's layout) is kept
+                if not path: result = json.loads(value_json); continue
+                parent = _json_patch_resolve(result, path[:-1])
+                if isinstance(parent, dict) and path[-1] in parent: parent[path[-1]] = json.loads(value_json)
+                elif isinstance(parent, list): parent[_json_patch_index(parent, path[-1])] = json.loads(value_json)
+                else: raise ValueError(f"path '{to_json_pointer(path)}' does not exist")
+            elif op == "test":
+                if not _json_equal(_json_patch_resolve(result, path), json.loads(value_json)): raise ValueError("test failed")
+            elif op == "move":
+                if path != source: result = _json_patch_add(result, path, _json_patch_remove(result, source))
+            elif op == "copy": result = _json_patch_add(result, path, json.loads(json.dumps(_json_patch_resolve(result, source))))
+        except ValueError as e: raise ValueError(f"operation {idx} ({op} {to_json_pointer(path)}): {e}") from None
+    return result
+
+def settings_to_json_patch(old, new, with_tests=False):
+    # Minimal patch turning `old` into `new`, from diff_settings. Trailing list removals run from the end so
+    # indices stay valid; with_tests guards each replace/remove with a "test" of the value being overwritten.
+    patch, removals = [], []
+    for path, kind, old_value, new_value in diff_settings(old, new, compute_subtree_hashes(old), compute_subtree_hashes(new)):
+        pointer = to_json_pointer(path)
+        if kind == "added": patch.append({"op": "add", "path": pointer, "value": new_value}); continue
+        ops = [{"op": "test", "path": pointer, "value": old_value}] if with_tests else []
+        ops.append({"op": "replace", "path": pointer, "value": new_value} if kind == "changed" else {"op": "remove", "path": pointer})
+        if kind == "removed" and isinstance(path[-1], int): removals.append(ops)
+        else: patch.extend(ops)
+    for ops in reversed(removals): patch.extend(ops)
+    return patch
+
+def apply_json_patch_to_file(json_path, compiled, defaults=None, dry_run=False):
+    # All-or-nothing per file under the shared config lock: the file is rewritten atomically only if every
+    # operation succeeds and the result adds no validation errors. The backup goes through backup_config_file,
+    # so the folder's retention policy applies. Returns (status, message).
+    try:
+        with config_file_lock(json_path):
+            with open(json_path, "r", encoding="utf-8") as f: settings = json.load(f)
+            patched = apply_json_patch(settings, compiled)
+            before = validate_settings(settings, defaults)
+            new_errors = [e for e in validate_settings(patched, defaults) if e not in before]
+            if new_errors: return "invalid", "; ".join(f"{path_to_str(p)} {m}" for p, m in new_errors[:5])
+            if patched == settings: return "unchanged", "already up to date"
+            if dry_run: return "changed", "would be patched"
+            if not backup_config_file(json_path, JSON_PATCH_BACKUP_REASON): return "failed", "backup failed, file left unchanged"
+            write_json_atomic(patched, json_path)
+            return "changed", "patched"
+    except (OSError, ValueError, TimeoutError) as e: return "failed", str(e)
+
+def apply_json_patch_to_files(patch_path, config_paths, dry_run=False):
+    try:
+        with open(patch_path, "r", encoding="utf-8") as f: compiled = compile_json_patch(json.load(f))
+    except (OSError, ValueError) as e: log_message_gui(f"Cannot load patch '{patch_path}': {e}", "ERROR"); return 1
+    defaults = get_hardcoded_defaults()
+    with ThreadPoolExecutor(max_workers=JSON_PATCH_FILE_WORKERS) as pool:
+        results = list(pool.map(lambda p: apply_json_patch_to_file(p, compiled, defaults, dry_run), config_paths))
+    counts = {}
+    for path, (status, message) in zip(config_paths, results):
+        counts[status] = counts.get(status, 0) + 1
+        log_message_gui(f"{path}: {message}", "ERROR" if status in ("failed", "invalid") else "INFO")
+    log_message_gui(f"Patch '{os.path.basename(patch_path)}' ({len(compiled)} operation(s)): " + ", ".join(f"{n} {status}" for status, n in sorted(counts.items())) + (" (dry run)" if dry_run else "") + ".")
+    return 1 if counts.get("failed") or counts.get("invalid") else 0
+
+# --- Edit Journal ---
+class EditJournal:
+    # Append-only JSON-lines log of field-level edits made since the last save. Each append is one small
+    # write+flush; fsync runs at most once per EDIT_JOURNAL_FSYNC_INTERVAL on a timer thread.
+    # Every editor instance has its own journal, "<config key>_<host>_<pid>_<id>.journal" in a user-local
+    # directory, and holds a lock on "<journal>.owner" while it runs. Journals for the same config whose owner
+    # lock can be taken were left by an editor that crashed; only those are offered for replay.
+    def __init__(self, json_path, journal_dir=EDIT_JOURNAL_DIR):
+        self.journal_dir = journal_dir
+        self.prefix = f"{hashlib.sha256(os.path.abspath(json_path).encode('utf-8')).hexdigest()[:16]}_{socket.gethostname()}_"
+        self.filepath = os.path.join(journal_dir, f"{self.prefix}{os.getpid()}_{id(self):x}.journal")
+        self._file = None; self._dirty = False; self._timer = None
+        self._lock = threading.Lock()
+        self._orphans = [] # (journal_path, locked owner file) claimed by orphaned_records()
+        self._owner = self._claim(self.filepath)
+
+    @staticmethod
+    def _claim(journal_path):
+        try:
+            os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+            owner = open(journal_path + EDIT_JOURNAL_OWNER_SUFFIX, "a+b")
+        except OSError as e: log_message_gui(f"Could not create edit journal '{journal_path}': {e}", "WARNING"); return None
+        if try_lock_file(owner): return owner
+        owner.close(); return None
+
+    @staticmethod
+    def _release(journal_path, owner, remove_journal):
+        unlock_file(owner); owner.close()
+        for path in ((journal_path,) if remove_journal else ()) + (journal_path + EDIT_JOURNAL_OWNER_SUFFIX,):
+            try:
+                if os.path.exists(path): os.remove(path)
+            except OSError as e: log_message_gui(f"Could not remove '{path}': {e}", "WARNING")
+
+    def append(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            try:
+                if self._file is None: self._file = open(self.filepath, "a", encoding="utf-8")
+                self._file.write(line); self._file.flush(); self._dirty = True
+            except (OSError, TypeError, ValueError) as e: log_message_gui(f"Could not journal edit: {e}", "WARNING"); return
+            if self._timer is None:
+                self._timer = threading.Timer(EDIT_JOURNAL_FSYNC_INTERVAL, self.sync); self._timer.daemon = True; self._timer.start()
+
+    def sync(self):
+        with self._lock:
+            self._timer = None
+            if self._file is not None and self._dirty:
+                try: os.fsync(self._file.fileno()); self._dirty = False
+                except OSError as e: log_message_gui(f"Could not sync edit journal: {e}", "WARNING")
+
+    @staticmethod
+    def _read_records(journal_path):
+        # A torn final line (crash mid-write) is ignored.
+        records = []
+        try:
+            with open(journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try: records.append(json.loads(line))
+                    except json.JSONDecodeError: break
+        except FileNotFoundError: pass
+        except OSError as e: log_message_gui(f"Could not read edit journal '{journal_path}': {e}", "WARNING")
+        return [r for r in records if isinstance(r, dict) and r.get("op")]
+
+    def orphaned_records(self):
+        # Claims the journals of crashed editors on this config (oldest first) and returns their records.
+        # The claim is held until discard_orphans(), so two editors starting together never replay the same edits.
+        try: names = [n for n in os.listdir(self.journal_dir) if n.startswith(self.prefix) and n.endswith(".journal")]
+        except OSError: return []
+        candidates = sorted((os.path.join(self.journal_dir, n) for n in names if os.path.join(self.journal_dir, n) != self.filepath), key=os.path.getmtime)
+        records = []
+        for journal_path in candidates:
+            owner = self._claim(journal_path)
+            if owner is None: continue # Its editor is still running
+            self._orphans.append((journal_path, owner)); records.extend(self._read_records(journal_path))
+        return records
+
+    def discard_orphans(self):
+        # Called once claimed records are replayed into this journal (or declined).
+        for journal_path, owner in self._orphans: self._release(journal_path, owner, remove_journal=True)
+        self._orphans = []
+
+    def compact(self):
+        # Called once the edits are on disk (or deliberately discarded): nothing is pending any more.
+        with self._lock:
+            if self._timer is not None: self._timer.cancel(); self._timer = None
+            if self._file is not None: self._file.close(); self._file = None
+            self._dirty = False
+            try:
+                if os.path.exists(self.filepath): os.remove(self.filepath)
+            except OSError as e: log_message_gui(f"Could not clear edit journal: {e}", "WARNING")
+
+    def close(self):
+        # Clean exit: an empty journal is removed with its owner file; one with records stays for the next editor.
+        self.sync()
+        with self._lock:
+            if self._file is not None: self._file.close(); self._file = None
+            if self._owner is not None:
+                self._release(self.filepath, self._owner, remove_journal=not self._read_records(self.filepath)); self._owner = None
+
+# --- Layered Config Templates ---
+class ConfigTemplateBuilder:
+    # Resolves readme defaults -> org base -> group overlay -> server overlay into concrete per-server configs,
+    # using recursive_merge semantics (upper layers win, lists are replaced whole). Manifest format:
+    #   {"readme": "enshrouded_server_readme.txt", "base": "base.json", "groups": {"eu": "groups/eu.json"},
+    #    "servers": {"eu-1": {"group": "eu", "overlay": "servers/eu-1.json", "output": "eu-1/enshrouded_server.json"}}}
+    # Layers may be file paths (relative to the manifest) or inline objects. Only servers whose inputs changed are rewritten.
+    def __init__(self, manifest_path, log=log_message_gui):
+        self.manifest_path = manifest_path; self.log = log
+        self.base_dir = os.path.dirname(os.path.abspath(manifest_path))
+        self._file_cache = {}  # abs path -> ((mtime_ns, size), digest, data)
+        self._chain_cache = {} # chain digest -> resolved layer stack (never mutated once cached)
+
+    def _resolve_path(self, path): return path if os.path.isabs(path) else os.path.join(self.base_dir, path)
+
+    def _load_layer(self, spec, label):
+        if spec is None: return "-", {}
+        if isinstance(spec, dict): return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest(), spec
+        path = self._resolve_path(spec); st = os.stat(path); stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._file_cache.get(path)
+        if cached and cached[0] == stamp: return cached[1], cached[2]
+        with open(path, "rb") as f: raw = f.read()
+        data = json.loads(raw)
+        if not isinstance(data, dict): raise ValueError(f"{label} '{spec}' must contain a JSON object.")
+        digest = hashlib.sha256(raw).hexdigest()
+        self._file_cache[path] = (stamp, digest, data)
+        return digest, data
+
+    @staticmethod
+    def _chain_digest(digests): return hashlib.sha256("|".join(digests).encode()).hexdigest()
+
+    def _resolve_chain(self, layers):
+        # layers: [(digest, data)], lowest first. Every prefix of the stack is cached, so a group shared
+        # by hundreds of servers is merged over the base exactly once.
+        resolved, digests = None, []
+        for digest, data in layers:
+            digests.append(digest); key = self._chain_digest(digests)
+            cached = self._chain_cache.get(key)
+            if cached is None:
+                cached = json.loads(json.dumps(data))
+                if resolved is not None: recursive_merge(resolved, cached) # Shares untouched subtrees with the lower layer
+                self._chain_cache[key] = cached
+            resolved = cached
+        return resolved
+
+    def build(self, force=False):
+        with open(self.manifest_path, "r", encoding="utf-8") as f: manifest = json.load(f)
+        readme_defaults, _ = parse_readme_file(self._resolve_path(manifest.get("readme", README_FILE)), self.log)
+        if readme_defaults is None: self.log("Template build: using hardcoded fallback defaults.", "WARNING"); readme_defaults = get_hardcoded_defaults()
+        defaults_layer = (hashlib.sha256(json.dumps(readme_defaults, sort_keys=True).encode()).hexdigest(), readme_defaults)
+        base_layer = self._load_layer(manifest.get("base"), "Base layer")
+        groups = manifest.get("groups", {})
+        state_path = os.path.join(self.base_dir, TEMPLATE_STATE_FILE)
+        state = {}
+        if os.path.exists(state_path):
+            try:
+                with open(state_path, "r", encoding="utf-8") as f: state = json.load(f)
+            except Exception as e: self.log(f"Ignoring unreadable template state '{state_path}': {e}", "WARNING")
+        results = {"written": [], "unchanged": [], "errors": []}
+        group_layers = {}
+        for name, server in manifest.get("servers", {}).items():
+            try:
+                group_name = server.get("group")
+                if group_name is not None and group_name not in groups: raise ValueError(f"Unknown group '{group_name}'.")
+                if group_name not in group_layers: group_layers[group_name] = self._load_layer(groups.get(group_name), f"Group '{group_name}'")
+                layers = [defaults_layer, base_layer, group_layers[group_name]]
+                server_digest, server_data = self._load_layer(server.get("overlay"), f"Server '{name}' overlay")
+                output_path = self._resolve_path(server.get("output") or os.path.join(name, JSON_FILE))
+                input_digest = self._chain_digest([d for d, _ in layers] + [server_digest, output_path])
+                if not force and state.get(name) == input_digest and os.path.exists(output_path): results["unchanged"].append(name); continue
+                config = json.loads(json.dumps(server_data))
+                recursive_merge(self._resolve_chain(layers), config)
+                write_json_atomic(config, output_path)
+                state[name] = input_digest; results["written"].append(name)
+            except Exception as e: results["errors"].append((name, str(e))); self.log(f"Template build failed for '{name}': {e}", "ERROR")
+        try: write_json_atomic(state, state_path)
+        except Exception as e: self.log(f"Could not save template state '{state_path}': {e}", "WARNING")
+        return results
+
+def build_config_templates(manifest_path, force=False):
+    try: results = ConfigTemplateBuilder(manifest_path).build(force=force)
+    except Exception as e: log_message_gui(f"Template build failed: {e}", "ERROR"); return 1
+    log_message_gui(f"Template build: {len(results['written'])} written, {len(results['unchanged'])} unchanged, {len(results['errors'])} failed.")
+    return 1 if results["errors"] else 0
+
+# --- Backup Snapshot Cache ---
+class BackupSnapshotCache:
+    # LRU of parsed backup files plus their subtree hashes, invalidated by (mtime_ns, size).
+    def __init__(self, max_entries=BACKUP_SNAPSHOT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, filepath):
+        try: st = os.stat(filepath)
+        except OSError: return None, None
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(filepath)
+            if entry and entry[0] == stamp: self._entries.move_to_end(filepath); return entry[1], entry[2]
+        try:
+            with open(filepath, "r", encoding="utf-8") as f: data = json.load(f)
+        except Exception as e: log_message_gui(f"Could not parse backup '{filepath}': {e}", "WARNING"); return None, None
+        hashes = compute_subtree_hashes(data)
+        with self._lock:
+            self._entries[filepath] = (stamp, data, hashes); self._entries.move_to_end(filepath)
+            while len(self._entries) > self.max_entries: self._entries.popitem(last=False)
+        return data, hashes
+
+# --- Log File Index ---
+class LogFileIndex:
+    # Sparse line checkpoints, event lines and sparse timestamps for one log file, built incrementally by byte offset
+    # over a read-only memory map so multi-GB logs are never loaded into memory. The indexer only holds _lock while
+    # publishing a chunk, so lookups from the Tk thread never wait for a whole indexing pass.
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._event_res = {kind: re.compile(p) for kind, p in LOG_EVENT_PATTERNS.items()}
+        self._ts_re = re.compile(LOG_TIMESTAMP_PATTERN)
+        self._lock = threading.Lock() # Guards the index state below
+        self._update_lock = threading.Lock() # One indexing pass at a time
+        self._reset()
+
+    def _reset(self):
+        self.checkpoints = array("Q", [0]) # Start offset of every LOG_LINE_CHECKPOINT_EVERY-th line
+        self.line_count = 0; self.indexed_to = 0; self.timestamps = [] # (line_no, timestamp_str)
+        self.events = {kind: array("Q") for kind in LOG_EVENT_PATTERNS}
+
+    def _map(self):
+        f = open(self.filepath, "rb")
+        try:
+            size = os.fstat(f.fileno()).st_size
+            return f, (mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None), size
+        except Exception: f.close(); raise
+
+    def update(self):
+        # Indexes bytes appended since the last call; returns the number of new complete lines.
+        with self._update_lock:
+            f, mm, size = self._map()
+            try:
+                with self._lock:
+                    if size < self.indexed_to: self._reset() # Truncated or rotated
+                    start_lines, indexed_to = self.line_count, self.indexed_to
+                if mm is None: return 0
+                while indexed_to < size:
+                    chunk_end = min(size, indexed_to + LOG_INDEX_CHUNK_BYTES)
+                    last_nl = mm.rfind(b"\n", indexed_to, chunk_end)
+                    if last_nl < 0:
+                        if chunk_end == size: break # Only a partial trailing line left
+                        last_nl = mm.find(b"\n", chunk_end)
+                        if last_nl < 0: break
+                    chunk = mm[indexed_to:last_nl + 1]; lowered = chunk.lower()
+                    first_line = self.line_count; new_checkpoints = array("Q"); new_timestamps = []
+                    newlines = re.finditer(b"\n", chunk); line_no = first_line
+                    next_checkpoint = len(self.checkpoints) * LOG_LINE_CHECKPOINT_EVERY
+                    while True: # islice skips to the newline that starts the next checkpoint line without a Python-level loop
+                        nl = next(itertools.islice(newlines, next_checkpoint - line_no - 1, None), None)
+                        if nl is None: break
+                        line_no = next_checkpoint; next_checkpoint += LOG_LINE_CHECKPOINT_EVERY
+                        new_checkpoints.append(indexed_to + nl.end())
+                    new_events = {kind: array("Q", self._lines_of(chunk, (m.start() for m in event_re.finditer(lowered)), first_line))
+                                  for kind, event_re in self._event_res.items()}
+                    line_count = first_line + chunk.count(b"\n")
+                    first_ts = -(-first_line // LOG_TIMESTAMP_EVERY_N_LINES) * LOG_TIMESTAMP_EVERY_N_LINES
+                    for ts_line in range(first_ts, line_count, LOG_TIMESTAMP_EVERY_N_LINES): # Multiples of the checkpoint stride
+                        cp_idx = ts_line // LOG_LINE_CHECKPOINT_EVERY
+                        line_start = self.checkpoints[cp_idx] if cp_idx < len(self.checkpoints) else new_checkpoints[cp_idx - len(self.checkpoints)]
+                        ts_match = self._ts_re.search(mm, line_start, mm.find(b"\n", line_start) + 1)
+                        if ts_match: new_timestamps.append((ts_line, ts_match.group(1).decode("ascii", "replace")))
+                    indexed_to = last_nl + 1
+                    with self._lock:
+                        self.checkpoints.extend(new_checkpoints); self.timestamps.extend(new_timestamps)
+                        for kind, lines in new_events.items(): self.events[kind].extend(lines)
+                        self.line_count = line_count; self.indexed_to = indexed_to
+                return self.line_count - start_lines
+            finally:
+                if mm is not None: mm.close()
+                f.close()
+
+    @staticmethod
+    def _lines_of(data, offsets, first_line=0, pos=0):
+        # Line numbers for ascending offsets into data, counting newlines between consecutive offsets.
+        line_no = first_line
+        for offset in offsets:
+            line_no += data.count(b"\n", pos, offset); pos = offset
+            yield line_no
+
+    def read_lines(self, start_line, count):
+        with self._lock:
+            start_line = max(0, min(start_line, self.line_count))
+            end_line = min(self.line_count, start_line + count)
+            if end_line <= start_line: return []
+            cp_idx = min(start_line // LOG_LINE_CHECKPOINT_EVERY, len(self.checkpoints) - 1)
+            cp_line, offset = cp_idx * LOG_LINE_CHECKPOINT_EVERY, self.checkpoints[cp_idx]
+        with open(self.filepath, "rb") as f:
+            f.seek(offset)
+            for _ in range(start_line - cp_line): f.readline()
+            return [(line_no, f.readline().rstrip(b"\n").rstrip(b"\r").decode("utf-8", "replace")) for line_no in range(start_line, end_line)]
+
+    def timestamp_near(self, line_no):
+        with self._lock:
+            idx = bisect.bisect_right(self.timestamps, (line_no, "\uffff")) - 1
+            return self.timestamps[idx][1] if idx >= 0 else None
+
+    def search(self, query, max_results=LOG_VIEWER_MAX_RESULTS):
+        # Indexed event kinds are answered from the index; anything else is a regex scan over the mmap.
+        if query in self.events:
+            with self._lock: line_nos = list(dict.fromkeys(self.events[query]))[-max_results:]
+            return [line for n in line_nos for line in self.read_lines(n, 1)]
+        try: query_re = re.compile(query.encode("utf-8"), re.IGNORECASE)
+        except re.error: query_re = re.compile(re.escape(query.encode("utf-8")), re.IGNORECASE)
+        with self._lock: limit = self.indexed_to
+        f, mm, _ = self._map()
+        try:
+            if mm is None: return []
+            results, pos, line_no = [], 0, 0
+            for m in query_re.finditer(mm, 0, limit):
+                with self._lock: cp_idx = bisect.bisect_right(self.checkpoints, m.start()) - 1; cp_offset = self.checkpoints[cp_idx]
+                if cp_offset > pos: pos, line_no = cp_offset, cp_idx * LOG_LINE_CHECKPOINT_EVERY # Jump ahead instead of counting through the gap
+                line_no += mm[pos:m.start()].count(b"\n"); pos = m.start()
+                if results and results[-1] == line_no: continue
+                results.append(line_no)
+                if len(results) >= max_results: break
+        finally:
+            if mm is not None: mm.close()
+            f.close()
+        return [line for n in results for line in self.read_lines(n, 1)]
+
+    def read_new_bytes(self, from_offset, max_bytes=LOG_VIEWER_TAIL_BYTES):
+        # Tail helper: returns (text, new_offset); restarts at 0 if the file shrank.
+        with open(self.filepath, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < from_offset: from_offset = 0
+            if size - from_offset > max_bytes: from_offset = size - max_bytes
+            f.seek(from_offset); data = f.read(size - from_offset)
+        return data.decode("utf-8", "replace"), from_offset + len(data)
+
+# --- Field Bindings ---
+class FieldBinding:
+    # One bound GUI field. Path, descriptor and codec are resolved once; load/save/randomize iterate these directly.
+    __slots__ = ("path", "label", "tooltip", "tab", "setting_type", "config", "codec", "var", "widget")
+
+    def __init__(self, path_keys, label, tooltip, tab, current_value=None):
+        self.path = tuple(path_keys); self.label = label; self.tooltip = tooltip; self.tab = tab
+        self.setting_type, self.config = get_setting_config_by_path(path_keys)
+        self.codec = self._resolve_codec(tooltip.lower(), current_value)
+        self.var = None; self.widget = None
+
+    def _resolve_codec(self, hint, current_value):
+        if "(path)" in hint: return "path"
+        if self.setting_type == "string_choice" and self.config: return "choice"
+        if self.setting_type == "factor" and self.config: return "factor"
+        if self.setting_type == "duration": return "duration"
+        if "true/false" in hint or isinstance(current_value, bool): return "bool"
+        if "integer" in hint or isinstance(current_value, int): return "int"
+        if "float" in hint or isinstance(current_value, float): return "float"
+        if "string" in hint or isinstance(current_value, str) or current_value is None: return "str"
+        return "readonly" # Nested dicts/lists are shown but never written back
+
+    def to_gui(self, value):
+        if self.codec == "duration" and isinstance(value, (int, float)): return str(nanoseconds_to_minutes_gui(value))
+        if self.codec == "factor" and isinstance(value, (int, float)): return float_to_percent_str(value)
+        if self.codec == "bool": return bool(value) if value is not None else False
+        if self.codec == "readonly": return str(value)[:50]
+        return str(value) if value is not None else ""
+
+    def from_gui(self):
+        # Returns the JSON value for the current GUI input; raises ValueError with a user-facing message.
+        if self.codec == "bool": return bool(self.var.get())
+        gui_val_str = str(self.var.get())
+        if self.codec == "duration":
+            if not gui_val_str.strip(): raise ValueError(f"Minutes for {self.label} empty.")
+            final_value = minutes_to_nanoseconds_gui(gui_val_str)
+            if final_value is None: raise ValueError(f"Invalid minutes for {self.label}: '{gui_val_str}'.")
+            mins = int(gui_val_str)
+            if not (self.config["min_minutes"] <= mins <= self.config["max_minutes"]): raise ValueError(f"{self.label} ({mins} min) out of range.")
+            return final_value
+        if self.codec == "factor":
+            if not gui_val_str.strip(): raise ValueError(f"Percentage for {self.label} empty.")
+            final_value = percent_str_to_float(gui_val_str)
+            if final_value is None: raise ValueError(f"Invalid percent for {self.label}: '{gui_val_str}'.")
+            if not (self.config["min_float"] <= final_value <= self.config["max_float"]):
+                raise ValueError(f"{self.label} ({gui_val_str}%) out of range ({int(self.config['min_float']*100)}%-{int(self.config['max_float']*100)}%).")
+            return final_value
+        try:
+            if self.codec == "int": return int(gui_val_str) if gui_val_str.strip() else 0
+            if self.codec == "float": return float(gui_val_str) if gui_val_str.strip() else 0.0
+        except ValueError as e: raise ValueError(f"Invalid value for {self.label}: '{gui_val_str}'. Error: {e}")
+        return gui_val_str
+
+# --- Settings Search Index ---
+class SettingsSearchIndex:
+    # Inverted 1/2/3-gram index over labels, tooltips, JSON paths and user group names.
+    FIELD_WEIGHTS = (("label", 100, 60), ("group", 55, 50), ("path", 45, 40), ("tooltip", 25, 20)) # (field, prefix score, substring score)
+
+    def __init__(self, tabs_config, user_groups):
+        self.entries = [] # dicts with tab, path, label, tooltip, group
+        self.postings = {}
+        self._gram_cache = {} # Group tooltips repeat for every group, so grams are computed once per distinct text
+        for tab_name, menu_def in tabs_config.items():
+            if menu_def == "user_groups_tab":
+                for group_idx, group_data in enumerate(user_groups if isinstance(user_groups, list) else []):
+                    if not isinstance(group_data, dict): continue
+                    group_name = str(group_data.get("name", f"Group {group_idx+1}"))
+                    for _, (sub_path, label_text, tooltip_text) in sorted(user_groups_settings_def_template.items()):
+                        self._add(tab_name, ["userGroups", group_idx] + sub_path, f"{label_text} ({group_name})", tooltip_text, group_name)
+            else:
+                for _, (path_keys, label_text, tooltip_text) in sorted(menu_def.items()): self._add(tab_name, path_keys, label_text, tooltip_text, "")
+
+    def _add(self, tab_name, path_keys, label_text, tooltip_text, group_name):
+        entry_id = len(self.entries)
+        entry = {"tab": tab_name, "path_keys": tuple(path_keys), "path": path_to_str(path_keys), "label": label_text, "tooltip": tooltip_text, "group": group_name}
+        entry["_lower"] = {field: entry[field].lower() for field, _, _ in self.FIELD_WEIGHTS}
+        self.entries.append(entry)
+        entry_grams = set()
+        for text in entry["_lower"].values():
+            grams = self._gram_cache.get(text)
+            if grams is None: grams = self._gram_cache[text] = self._grams(text)
+            entry_grams |= grams
+        for gram in entry_grams: self.postings.setdefault(gram, set()).add(entry_id)
+
+    @staticmethod
+    def _grams(text):
+        # All trigrams, plus 1-2 character word prefixes so very short queries still narrow the candidates.
+        grams = {text[i:i+3] for i in range(len(text) - 2)}
+        for word in re.findall(r"[a-z0-9]+", text): grams.update((word[:1], word[:2]))
+        return grams
+
+    def search(self, query, limit=25):
+        words = query.lower().split()
+        if not words: return []
+        candidates = None
+        for word in words:
+            for gram in ({word[i:i+3] for i in range(len(word) - 2)} or {word}): # Trigrams, or the whole word if shorter
+                ids = self.postings.get(gram, set())
+                candidates = set(ids) if candidates is None else candidates & ids
+                if not candidates: return []
+        scored = []
+        for entry_id in candidates:
+            lowered, score = self.entries[entry_id]["_lower"], 0
+            for word in words:
+                word_score = 0
+                for field, prefix_score, substring_score in self.FIELD_WEIGHTS:
+                    pos = lowered[field].find(word)
+                    if pos == 0 or (pos > 0 and not lowered[field][pos-1].isalnum()): word_score = max(word_score, prefix_score)
+                    elif pos > 0: word_score = max(word_score, substring_score)
+                if not word_score: break # Grams matched but the word itself does not occur anywhere
+                score += word_score
+            else: scored.append((-score, entry_id))
+        return [self.entries[entry_id] for _, entry_id in sorted(scored)[:limit]]
 
 # --- Tooltip Class ---
 class ToolTip:
@@ -207,73 +1500,67 @@ class ToolTip:
 
 # --- SettingsManager Class ---
 class SettingsManager:
-    def __init__(self, status_var=None):
+    # root_dir=None keeps the editor's historical cwd-relative paths. interactive=False (API server, batch tools)
+    # logs instead of showing dialogs, answers every question with "no", and never touches the GUI's edit journal.
+    # load=False skips reading (and migrating) the config, for callers that only need backups and retention.
+    def __init__(self, status_var=None, root_dir=None, interactive=True, load=True):
+        self.root_dir = root_dir; self.interactive = interactive
+        self.json_path = os.path.join(root_dir, JSON_FILE) if root_dir else JSON_FILE
+        self.backup_dir = os.path.join(root_dir, BACKUP_DIR) if root_dir else BACKUP_DIR
+        self.readme_path = os.path.join(root_dir, README_FILE) if root_dir else README_FILE
         self.settings = {}
         self.game_version = FALLBACK_GAME_VERSION
         self.status_var = status_var
         self.readme_defaults = None
-        self.initialize_or_update_settings_file()
-
-    def _log(self, message, level="INFO"): log_message_gui(message, level, self.status_var)
+        self._eviction_lock = threading.Lock(); self._eviction_running = False; self._eviction_pending = False; self._eviction_thread = None
+        self.snapshot_cache = BackupSnapshotCache()
+        self.journal = EditJournal(self.json_path) if interactive else None
+        self.base_settings = None; self.loaded_sha256 = None # What was on disk when loaded/last saved
+        self.last_save_merged = False
+        self.recovered_edits = False
+        if load:
+            self.initialize_or_update_settings_file()
+            self.recovered_edits = self.offer_journal_replay()
+
+    def _log(self, message, level="INFO"):
+        # Background workers (backup eviction, snapshots) share these methods; only the main thread may touch Tk.
+        log_message_gui(message, level, self.status_var if threading.current_thread() is threading.main_thread() else None)
+    def _notify(self, kind, title, message):
+        if self.interactive: {"info": messagebox.showinfo, "warning": messagebox.showwarning, "error": messagebox.showerror}[kind](title, message)
+        elif kind != "info": self._log(f"{title}: {message}", kind.upper())
+    def _ask(self, title, message): return messagebox.askyesno(title, message) if self.interactive else False
+    def _ask_choice(self, title, message): return messagebox.askyesnocancel(title, message) if self.interactive else None
+    def _fatal(self, title, message):
+        if not self.interactive: raise RuntimeError(f"{title}: {message}")
+        messagebox.showerror(title, message); sys.exit(1)
+    def _compact_journal(self):
+        if self.journal: self.journal.compact()
+    def resolve_path(self, path):
+        path = str(path or "")
+        return os.path.join(self.root_dir, path) if path and self.root_dir and not os.path.isabs(path) else path
     def _load_json(self, fp):
         try:
             with open(fp, "r", encoding="utf-8") as f: return json.load(f)
         except Exception as e: self._log(f"Error loading '{fp}': {e}", "ERROR"); return None
     def _save_json(self, data, fp):
         try:
-            with open(fp, "w", encoding="utf-8") as f: json.dump(data, f, indent=4)
+            write_json_atomic(data, fp) # Other editors never see a half-written file
             self._log(f"Successfully saved to '{fp}'."); return True
         except Exception as e: self._log(f"Error saving to '{fp}': {e}", "ERROR"); return False
 
     def _get_hardcoded_defaults(self):
         self._log("Using hardcoded fallback default settings.", "WARNING")
-        defaults = {
-            "name": "Enshrouded Server", "saveDirectory": "./savegame", "logDirectory": "./logs",
-            "ip": "0.0.0.0", "queryPort": 15637, "slotCount": 16,
-            "enableVoiceChat": False, "enableTextChat": False,
-        }
-        defaults["gameSettings"] = {}
-        for key, conf in DURATION_SETTINGS_CONFIG.items():
-            defaults["gameSettings"][key] = minutes_to_nanoseconds_gui(str(conf["normal_minutes"]))
-        
-        for key_conf_name, conf in STRING_CHOICE_SETTINGS_CONFIG.items():
-            target_key = conf["path"][-1]
-            if conf["path"][0] == "gameSettings": defaults["gameSettings"][target_key] = conf["normal"]
-            else: defaults[target_key] = conf["normal"]
-        
-        for key_conf_name, conf in FACTOR_SETTINGS_CONFIG.items():
-            target_key = conf["path"][-1]
-            defaults["gameSettings"][target_key] = conf.get("normal_float", 1.0)
-
-        defaults["userGroups"] = [
-            {"name": "Admin", "password": "AdminPassword", "canKickBan": True, "canAccessInventories": True, "canEditBase": True, "canExtendBase": True, "reservedSlots": 0},
-            {"name": "Friend", "password": "FriendPassword", "canKickBan": False, "canAccessInventories": True, "canEditBase": True, "canExtendBase": False, "reservedSlots": 0},
-            {"name": "Guest", "password": "GuestPassword", "canKickBan": False, "canAccessInventories": False, "canEditBase": False, "canExtendBase": False, "reservedSlots": 0}
-        ]
-        return defaults
-
-    def parse_readme(self): 
-        try:
-            with open(README_FILE, "r", encoding="utf-8") as f: readme_content = f.read()
-        except Exception as e: self._log(f"Error reading readme: {e}", "ERROR"); return None, FALLBACK_GAME_VERSION
-        version = FALLBACK_GAME_VERSION
-        v_match = re.search(r"^Version:\s*(\S+)", readme_content, re.MULTILINE)
-        if v_match: version = v_match.group(1)
-        json_match = re.search(r"DEFAULT enshrouded_server\.json(?: / VERSION \S+)?\s*(\{[\s\S]*?\n\})", readme_content, re.MULTILINE)
-        if json_match:
-            try: return json.loads(json_match.group(1)), version
-            except json.JSONDecodeError as e: self._log(f"Error decoding JSON from readme: {e}", "ERROR"); return None, version
-        self._log("Could not find default JSON block in readme.", "WARNING"); return None, version
+        return get_hardcoded_defaults()
+
+    def parse_readme(self): return parse_readme_file(self.readme_path, self._log)
     
-    def _recursive_merge(self, default, existing):
-        for key, val in default.items():
-            if key not in existing: existing[key] = val
-            elif isinstance(val, dict) and isinstance(existing.get(key), dict): self._recursive_merge(val, existing[key])
+    def _recursive_merge(self, default, existing): recursive_merge(default, existing)
 
     def _find_structural_differences(self, current, default, path=""):
         diffs = []
         for k, v_curr in current.items():
             p = f"{path}.{k}" if path else k
+            if k == CONFIG_VERSION_KEY and not path: continue
             if k not in default:
                 diffs.append(f"Obsolete/Custom Key: '{p}'")
             elif isinstance(v_curr, dict) and isinstance(default.get(k), dict):
@@ -283,36 +1570,48 @@ class SettingsManager:
                     diffs.append(f"Type Mismatch: '{p}' (User: {type(v_curr).__name__}, Default: {type(default[k]).__name__})")
         return diffs
 
-    def initialize_or_update_settings_file(self):
+    def load_readme_defaults(self):
         self.readme_defaults, self.game_version = self.parse_readme()
         if self.readme_defaults is None:
             self.readme_defaults = self._get_hardcoded_defaults()
+        stamp_config_version(self.readme_defaults, self.game_version)
 
-        if not os.path.exists(JSON_FILE):
-            self._log(f"'{JSON_FILE}' not found. Creating with defaults.")
-            if self._save_json(self.readme_defaults, JSON_FILE):
-                self.settings = json.loads(json.dumps(self.readme_defaults))
+    def initialize_or_update_settings_file(self):
+        self.load_readme_defaults()
+
+        if not os.path.exists(self.json_path):
+            self._log(f"'{self.json_path}' not found. Creating with defaults.")
+            if self._save_json(self.readme_defaults, self.json_path):
+                self.settings = json.loads(json.dumps(self.readme_defaults)); self._remember_disk_state()
             else:
                 self._log("Failed to create default config. Exiting.", "FATAL")
-                messagebox.showerror("Fatal Error", "Could not create default configuration file. Exiting.")
-                sys.exit(1)
+                self._fatal("Fatal Error", "Could not create default configuration file. Exiting.")
             return
 
-        existing_settings = self._load_json(JSON_FILE)
+        existing_settings = self._load_json(self.json_path)
         if existing_settings is None: 
-            self._log(f"Could not load '{JSON_FILE}'. It might be corrupted.", "WARNING")
-            if messagebox.askyesno("Corrupted File", f"Could not load '{JSON_FILE}'. Replace with defaults?"):
-                self.backup_file(JSON_FILE, reason="corrupted_original_gui")
-                if self._save_json(self.readme_defaults, JSON_FILE):
-                    self.settings = json.loads(json.dumps(self.readme_defaults))
+            self._log(f"Could not load '{self.json_path}'. It might be corrupted.", "WARNING")
+            if self._ask("Corrupted File", f"Could not load '{self.json_path}'. Replace with defaults?"):
+                self.backup_file(self.json_path, reason="corrupted_original_gui")
+                if self._save_json(self.readme_defaults, self.json_path):
+                    self.settings = json.loads(json.dumps(self.readme_defaults)); self._remember_disk_state()
                     self._log("Replaced corrupted file with defaults.")
-                else: messagebox.showerror("Error", "Failed to replace corrupted file."); sys.exit(1)
-            else: messagebox.showinfo("Exiting", f"Please check '{JSON_FILE}' manually."); sys.exit(1)
+                else: self._fatal("Error", "Failed to replace corrupted file.")
+            else: self._fatal("Exiting", f"Please check '{self.json_path}' manually.")
             return
         
+        migrated_settings = json.loads(json.dumps(existing_settings))
+        migrations = migrate_settings(migrated_settings, self.game_version)
+        if migrations: # The file is only rewritten (and stamped) when a migration actually changed something
+            if not self.backup_file(self.json_path, reason="pre_migration"): self._log("Backup before migration failed; the migrated settings are only saved with your next save.", "WARNING")
+            elif self._save_json(migrated_settings, self.json_path): self._log(f"Migrated '{self.json_path}' to game version {self.game_version}.")
+            for change in migrations: self._log(f"Migrated setting: {change}")
+            self._notify("info", "Configuration Migrated", f"Your configuration was migrated to game version {self.game_version}:\n\n" +
+                                "\n".join(f"- {c}" for c in migrations) + "\n\nA backup of the previous file was made.")
+            existing_settings = migrated_settings
         original_existing_settings_copy = json.loads(json.dumps(existing_settings)) # For accurate comparison after merge
-        merged_settings = json.loads(json.dumps(existing_settings)) 
-        self._recursive_merge(self.readme_defaults, merged_settings) 
+        merged_settings = json.loads(json.dumps(original_existing_settings_copy)) 
+        self._recursive_merge({k: v for k, v in self.readme_defaults.items() if k != CONFIG_VERSION_KEY}, merged_settings) # Stamping is the migrations' job
 
         diffs = self._find_structural_differences(original_existing_settings_copy, self.readme_defaults) 
         new_keys_added = (merged_settings != original_existing_settings_copy)
@@ -325,15 +1624,15 @@ class SettingsManager:
                       "\n\nThis can happen if your file contains older settings, custom additions, or if a setting's expected type has changed in the template." + \
                       "\nNew settings from the template (if any) have been merged. Your values for existing settings are preserved." + \
                       "\nIt's recommended to review your settings, especially those listed above."
-                messagebox.showwarning(title, msg)
+                self._notify("warning", title, msg)
             elif new_keys_added: # Only new keys added, no other diffs
                 title = "Configuration Updated"
                 msg = "Your configuration has been updated with new default settings from the latest template. " + \
                       "Your existing customizations have been preserved. You may want to review new options available."
-                messagebox.showinfo(title, msg)
+                self._notify("info", title, msg)
             
             if new_keys_added: # If merge resulted in changes (even if no "diffs" were found, e.g. adding brand new keys)
-                if self._save_json(merged_settings, JSON_FILE):
+                if self._save_json(merged_settings, self.json_path):
                     self.settings = merged_settings
                     self._log("Configuration updated and merged with new defaults.")
                 else: 
@@ -343,8 +1642,33 @@ class SettingsManager:
                 self.settings = original_existing_settings_copy
         else: # No structural diffs and no changes from merge
             self.settings = existing_settings
+        self._remember_disk_state()
         self._log(f"Settings loaded. Detected game version: {self.game_version}")
 
+    def _read_disk_state(self):
+        # (settings, sha256) of the config as it is on disk right now, from a single read; (None, None) if unreadable.
+        try:
+            with open(self.json_path, "rb") as f: raw = f.read()
+            return json.loads(raw), hashlib.sha256(raw).hexdigest()
+        except (OSError, ValueError): return None, None
+
+    def _remember_disk_state(self):
+        self.base_settings, self.loaded_sha256 = self._read_disk_state()
+
+    def reload_settings(self):
+        # Re-reads the config from disk (other editors or the API may have changed it). False if unreadable.
+        loaded, sha = self._read_disk_state()
+        if not isinstance(loaded, dict): self._log(f"Error loading '{self.json_path}'.", "ERROR"); return False
+        self.settings = loaded; self.base_settings = json.loads(json.dumps(loaded)); self.loaded_sha256 = sha
+        return True
+
+    def apply_json_patch(self, compiled):
+        # All-or-nothing: self.settings is replaced only when every operation succeeds. Raises ValueError.
+        patched = apply_json_patch(self.settings, compiled)
+        if not isinstance(patched, dict): raise ValueError("the patched settings must be a JSON object")
+        self.settings = patched
+        return patched
+
     def get_setting_value(self, path_keys, default_value=None, target_dict=None):
         val = target_dict if target_dict is not None else self.settings
         try:
@@ -376,78 +1700,328 @@ class SettingsManager:
         else: s[last_key] = new_value
 
     def save_all_settings(self):
-        if self.backup_file(JSON_FILE, reason="before_gui_save"):
-            if self._save_json(self.settings, JSON_FILE):
-                self._log("All settings saved successfully."); messagebox.showinfo("Save", "Settings saved successfully!"); return True
-            else: messagebox.showerror("Save Error", "Failed to save settings to file.")
-        else: 
-            if messagebox.askyesno("Backup Failed", "Backup failed. Still save changes?"):
-                 if self._save_json(self.settings, JSON_FILE):
-                    self._log("All settings saved (backup failed)."); messagebox.showwarning("Save", "Settings saved, but backup failed."); return True
-                 else: messagebox.showerror("Save Error", "Failed to save settings to file.")
-            else: self._log("Save cancelled due to failed backup.")
+        # Optimistic concurrency: if another editor saved since we loaded, merge their edits first (prompting only
+        # for fields both sides changed). The file lock is held just for the backup+write, never across a prompt.
+        self.last_save_merged = False; allow_without_backup = False
+        for _ in range(CONFIG_SAVE_ATTEMPTS):
+            _, disk_sha = self._read_disk_state()
+            if self.loaded_sha256 and disk_sha and disk_sha != self.loaded_sha256 and not self._merge_external_changes(): return False
+            outcome = None
+            try:
+                with config_file_lock(self.json_path):
+                    if self.loaded_sha256 and self._read_disk_state()[1] not in (None, self.loaded_sha256): continue # Changed again while merging
+                    if not self.backup_file(self.json_path, reason="before_gui_save") and not allow_without_backup: outcome = "backup_failed"
+                    elif self._save_json(self.settings, self.json_path): self._remember_disk_state(); outcome = "saved"
+                    else: outcome = "failed"
+            except TimeoutError as e: self._log(f"Save failed: {e}", "ERROR"); self._notify("error", "Save Error", f"{e}\nTry again in a moment."); return False
+            except OSError as e: self._log(f"Save failed: {e}", "ERROR"); self._notify("error", "Save Error", f"Failed to save settings to file: {e}"); return False
+            if outcome == "saved":
+                self._compact_journal()
+                if allow_without_backup: self._log("All settings saved (backup failed)."); self._notify("warning", "Save", "Settings saved, but backup failed."); return True
+                self._log("All settings saved successfully."); self._notify("info", "Save", "Settings saved successfully!"); return True
+            if outcome == "failed": self._notify("error", "Save Error", "Failed to save settings to file."); return False
+            if not self._ask("Backup Failed", "Backup failed. Still save changes?"): self._log("Save cancelled due to failed backup."); return False
+            allow_without_backup = True
+        self._log("Save failed: the file kept changing on disk.", "ERROR"); self._notify("error", "Save Error", "The settings file kept changing on disk. Try again.")
         return False
 
-    def backup_file(self, file_to_backup, reason=""):
+    def _merge_external_changes(self):
+        theirs, theirs_sha = self._read_disk_state()
+        if not isinstance(theirs, dict) or self.base_settings is None: return True # Nothing to merge with: overwrite as before
+        merged, conflicts = three_way_merge(self.base_settings, self.settings, theirs)
+        if conflicts:
+            msg = (f"'{self.json_path}' was changed by someone else since you loaded it. Their other changes will be kept.\n"
+                   f"These settings were changed on both sides:\n\n{format_merge_conflicts(conflicts)}\n\n"
+                   "Yes: keep your values.  No: keep theirs.  Cancel: don't save.")
+            choice = self._ask_choice("Conflicting Changes", msg)
+            if choice is None: self._log("Save cancelled: conflicting changes on disk."); return False
+            if choice: merged, _ = three_way_merge(self.base_settings, self.settings, theirs, prefer_mine=True)
+        self.settings = merged; self.base_settings = theirs; self.loaded_sha256 = theirs_sha; self.last_save_merged = True
+        self._log(f"Merged changes saved by another editor ({len(conflicts)} conflicting field(s)).")
+        return True
+
+    def backup_file(self, file_to_backup, reason="", schedule_eviction=True):
         if not os.path.exists(file_to_backup): self._log(f"File '{file_to_backup}' not found. Nothing to backup.", "INFO"); return False
         try:
-            os.makedirs(BACKUP_DIR, exist_ok=True)
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+            os.makedirs(self.backup_dir, exist_ok=True)
+            ts = datetime.now().strftime(BACKUP_TIMESTAMP_FORMAT)
             rs = f"_{reason.replace(' ', '_')}" if reason else ""
             base, _ = os.path.splitext(os.path.basename(file_to_backup))
-            backup_filename = f"{base}_{ts}{rs}.old" 
-            backup_path = os.path.join(BACKUP_DIR, backup_filename)
-            shutil.copy2(file_to_backup, backup_path)
-            self._log(f"File '{file_to_backup}' backed up to '{backup_path}'."); return backup_path
+            for attempt in range(100):
+                backup_path = os.path.join(self.backup_dir, f"{base}_{ts}{f'-{attempt}' if attempt else ''}{rs}.old")
+                try: dest = open(backup_path, "xb") # O_EXCL: an existing backup is never overwritten
+                except FileExistsError: continue
+                with dest, open(file_to_backup, "rb") as src: shutil.copyfileobj(src, dest)
+                shutil.copystat(file_to_backup, backup_path); break
+            else: raise FileExistsError(f"no free backup name for '{base}_{ts}{rs}.old'")
+            self._log(f"File '{file_to_backup}' backed up to '{backup_path}'.")
+            if schedule_eviction: self._schedule_backup_eviction()
+            return backup_path
         except Exception as e: self._log(f"Backup failed for '{file_to_backup}': {e}", "ERROR"); return False
 
+    # --- Backup Retention ---
+    def _read_retention_file(self):
+        path = os.path.join(self.backup_dir, BACKUP_RETENTION_FILE)
+        state = self._load_json(path) if os.path.exists(path) else None
+        return state if isinstance(state, dict) else {}
+
+    def load_retention_state(self):
+        # Until a policy is saved the defaults are only a suggestion for the dialog; see retention_policy_enabled().
+        policy, pinned = dict(DEFAULT_BACKUP_RETENTION_POLICY), set()
+        state = self._read_retention_file()
+        for key, val in (state.get("policy") or {}).items():
+            if key in policy and isinstance(val, int) and val >= 0: policy[key] = val
+        pinned = {p for p in state.get("pinned", []) if isinstance(p, str)}
+        return policy, pinned
+
+    def retention_policy_enabled(self):
+        # Automatic eviction only runs once the user saved a policy, so upgrading never deletes existing backup history.
+        return isinstance(self._read_retention_file().get("policy"), dict)
+
+    def save_retention_state(self, policy, pinned):
+        # policy=None keeps the folder without a policy (e.g. when only pins change).
+        try: os.makedirs(self.backup_dir, exist_ok=True)
+        except Exception as e: self._log(f"Could not create '{self.backup_dir}': {e}", "ERROR"); return False
+        state = {"pinned": sorted(pinned)}
+        if policy is not None: state["policy"] = policy
+        return self._save_json(state, os.path.join(self.backup_dir, BACKUP_RETENTION_FILE))
+
+    def set_backup_pinned(self, backup_filename, pinned=True):
+        policy, pinned_set = self.load_retention_state()
+        if pinned: pinned_set.add(backup_filename)
+        else: pinned_set.discard(backup_filename)
+        return self.save_retention_state(policy if self.retention_policy_enabled() else None, pinned_set)
+
+    def plan_backup_eviction(self):
+        # Returns (kept, evicted): lists of (fname, dt, size, reasons), newest first.
+        policy, pinned = self.load_retention_state()
+        backups = self.list_backup_files()
+        if not backups: return [], []
+        try: sizes = {e.name: e.stat().st_size for e in os.scandir(self.backup_dir) if e.is_file()}
+        except OSError as e: self._log(f"Error scanning backups: {e}", "ERROR"); return [], []
+        reasons = {fname: [] for fname, _ in backups}
+        for idx, (fname, _) in enumerate(backups):
+            if fname in pinned: reasons[fname].append("pinned")
+            if idx == 0: reasons[fname].append("newest")
+            if idx < policy["keep_last"]: reasons[fname].append(f"last {policy['keep_last']}")
+        tiers = (("keep_daily", "daily", lambda dt: dt.date()), ("keep_weekly", "weekly", lambda dt: dt.isocalendar()[:2]),
+                 ("keep_monthly", "monthly", lambda dt: (dt.year, dt.month)))
+        for policy_key, tier_name, bucket_of in tiers:
+            seen_buckets = set()
+            for fname, dt in backups: # Newest first, so the first backup seen in a bucket is the one kept
+                bucket = bucket_of(dt)
+                if bucket in seen_buckets: continue
+                if len(seen_buckets) >= policy[policy_key]: break
+                seen_buckets.add(bucket); reasons[fname].append(tier_name)
+        kept = [(f, dt, sizes.get(f, 0), reasons[f]) for f, dt in backups if reasons[f]]
+        evicted = [(f, dt, sizes.get(f, 0), ["expired"]) for f, dt in backups if not reasons[f]]
+        if policy["max_total_bytes"]:
+            total = sum(size for f, _, size, r in kept if "pinned" not in r)
+            for entry in reversed(kept[1:]): # Oldest first; the newest backup always survives
+                if total <= policy["max_total_bytes"]: break
+                if "pinned" in entry[3]: continue
+                kept.remove(entry); total -= entry[2]
+                evicted.append((entry[0], entry[1], entry[2], ["over size budget"]))
+            evicted.sort(key=lambda item: item[1], reverse=True)
+        return kept, evicted
+
+    def evict_old_backups(self, dry_run=False):
+        kept, evicted = self.plan_backup_eviction()
+        if dry_run: return kept, evicted
+        removed = 0
+        for fname, _, _, _ in evicted:
+            try: os.remove(os.path.join(self.backup_dir, fname)); removed += 1
+            except OSError as e: log_message_gui(f"Could not evict backup '{fname}': {e}", "ERROR"); continue
+            if os.path.isdir(self.save_snapshot_path(fname)): shutil.rmtree(self.save_snapshot_path(fname), ignore_errors=True) # Hardlinks keep shared files alive
+        if removed: log_message_gui(f"Backup retention: evicted {removed} backup(s), kept {len(kept)}.")
+        return kept, evicted
+
+    def _schedule_backup_eviction(self):
+        # Eviction runs off the GUI thread; everything it calls logs through _log, which leaves status_var alone there.
+        def worker():
+            while True:
+                try:
+                    if self.retention_policy_enabled(): self.evict_old_backups()
+                except Exception as e: log_message_gui(f"Backup retention failed: {e}", "ERROR")
+                with self._eviction_lock:
+                    if not self._eviction_pending: self._eviction_running = False; return
+                    self._eviction_pending = False
+        with self._eviction_lock:
+            if self._eviction_running: self._eviction_pending = True; return
+            self._eviction_running = True
+            self._eviction_thread = threading.Thread(target=worker, name="backup-eviction", daemon=True)
+        self._eviction_thread.start()
+
+    def wait_for_backup_eviction(self, timeout=None):
+        # For teardown (tests, the latency harness): the worker drains queued runs itself, so joining it is enough.
+        with self._eviction_lock: thread = self._eviction_thread
+        if thread is not None: thread.join(timeout)
+        return thread is None or not thread.is_alive()
+
+    def format_retention_report(self, kept, evicted):
+        policy, _ = self.load_retention_state()
+        fmt_size = lambda n: f"{n / 1024:.1f} KiB"
+        lines = ["Policy: " + ", ".join(f"{k}={v}" for k, v in policy.items()),
+                 f"Keeping {len(kept)} backup(s) ({fmt_size(sum(e[2] for e in kept))}), evicting {len(evicted)} ({fmt_size(sum(e[2] for e in evicted))}).", ""]
+        lines += [f"KEEP   {f}  [{', '.join(r)}]" for f, _, _, r in kept]
+        lines += [f"EVICT  {f}  [{', '.join(r)}]" for f, _, _, r in evicted]
+        return "\n".join(lines)
+
     def revert_to_defaults_from_readme(self):
-        if not self.readme_defaults: self._log("No readme defaults available.", "ERROR"); messagebox.showerror("Error", "Readme defaults not available."); return False
+        if not self.readme_defaults: self._log("No readme defaults available.", "ERROR"); self._notify("error", "Error", "Readme defaults not available."); return False
         msg = f"Replace current settings with defaults from Readme (Version: {self.game_version})?\nA backup will be made."
-        if messagebox.askyesno("Revert to Defaults", msg):
-            if self.backup_file(JSON_FILE, reason="before_revert_to_readme_defaults"):
-                defaults_copy = json.loads(json.dumps(self.readme_defaults))
-                if self._save_json(defaults_copy, JSON_FILE):
-                    self.settings = defaults_copy 
-                    self._log("Settings reverted to Readme defaults."); messagebox.showinfo("Success", "Settings reverted."); return True
-                else: messagebox.showerror("Error", "Failed to save reverted settings.")
-            else: messagebox.showwarning("Backup Failed", "Revert cancelled: backup failed.")
+        if self._ask("Revert to Defaults", msg):
+            defaults_copy = json.loads(json.dumps(self.readme_defaults)); backed_up = saved = False
+            try:
+                with config_file_lock(self.json_path): # The backup is of exactly the file being replaced
+                    backed_up = self.backup_file(self.json_path, reason="before_revert_to_readme_defaults")
+                    saved = backed_up and self._save_json(defaults_copy, self.json_path)
+                    if saved: self._remember_disk_state()
+            except OSError as e: self._log(f"Revert failed: {e}", "ERROR"); self._notify("error", "Error", str(e)); return False
+            if not backed_up: self._notify("warning", "Backup Failed", "Revert cancelled: backup failed.")
+            elif saved:
+                self.settings = defaults_copy; self._compact_journal()
+                self._log("Settings reverted to Readme defaults."); self._notify("info", "Success", "Settings reverted."); return True
+            else: self._notify("error", "Error", "Failed to save reverted settings.")
         return False
 
+    # --- World Save Snapshots ---
+    def save_snapshot_path(self, backup_filename):
+        return os.path.join(self.backup_dir, SAVE_SNAPSHOT_DIR, os.path.splitext(os.path.basename(backup_filename))[0])
+
+    def has_save_snapshot(self, backup_filename):
+        return os.path.exists(os.path.join(self.save_snapshot_path(backup_filename), SAVE_SNAPSHOT_MANIFEST))
+
+    def _latest_save_snapshot(self):
+        # (snapshot_dir, manifest) of the newest complete snapshot, or (None, None).
+        snapshots_root = os.path.join(self.backup_dir, SAVE_SNAPSHOT_DIR)
+        if not os.path.isdir(snapshots_root): return None, None
+        candidates = []
+        for entry in os.scandir(snapshots_root):
+            manifest_path = os.path.join(entry.path, SAVE_SNAPSHOT_MANIFEST)
+            if entry.is_dir() and os.path.exists(manifest_path): candidates.append((os.path.getmtime(manifest_path), entry.path))
+        for _, snapshot_dir in sorted(candidates, reverse=True):
+            manifest = self._load_json(os.path.join(snapshot_dir, SAVE_SNAPSHOT_MANIFEST))
+            if isinstance(manifest, dict) and isinstance(manifest.get("files"), dict): return snapshot_dir, manifest
+        return None, None
+
+    def snapshot_save_directory(self, backup_path):
+        # Snapshots saveDirectory next to a config backup. Files unchanged since the previous snapshot
+        # (same size/mtime, or same hash) are hardlinked to it; only changed files are copied.
+        save_dir = self.resolve_path(self.get_setting_value(["saveDirectory"], ""))
+        if not save_dir or not os.path.isdir(save_dir): log_message_gui(f"Save directory '{save_dir}' not found. No world snapshot taken.", "WARNING"); return None
+        snapshot_dir = self.save_snapshot_path(backup_path); partial_dir = snapshot_dir + ".partial"
+        prev_dir, prev_manifest = self._latest_save_snapshot()
+        prev_files = prev_manifest["files"] if prev_manifest else {}
+        try:
+            shutil.rmtree(partial_dir, ignore_errors=True); os.makedirs(partial_dir)
+            current = scan_directory_files(save_dir)
+            files, to_hash = {}, []
+            for rel, st in current.items():
+                prev = prev_files.get(rel)
+                if prev and prev.get("size") == st.st_size and prev.get("mtime_ns") == st.st_mtime_ns: files[rel] = dict(prev)
+                else: to_hash.append(rel)
+            with ThreadPoolExecutor(max_workers=SAVE_SNAPSHOT_HASH_WORKERS) as pool:
+                for rel, digest in zip(to_hash, pool.map(lambda r: sha256_file(os.path.join(save_dir, r)), to_hash)):
+                    files[rel] = {"size": current[rel].st_size, "mtime_ns": current[rel].st_mtime_ns, "sha256": digest}
+            linked = copied = 0
+            for rel, meta in files.items():
+                dest = os.path.join(partial_dir, *rel.split("/")); os.makedirs(os.path.dirname(dest), exist_ok=True)
+                prev = prev_files.get(rel)
+                if prev and prev.get("sha256") == meta["sha256"]:
+                    try: os.link(os.path.join(prev_dir, *rel.split("/")), dest); linked += 1; continue
+                    except OSError: pass # Cross-device or no hardlink support: fall back to a copy
+                shutil.copy2(os.path.join(save_dir, *rel.split("/")), dest); copied += 1
+            manifest = {"source": os.path.abspath(save_dir), "config_backup": os.path.basename(backup_path), "created": datetime.now().isoformat(timespec="seconds"), "files": files}
+            with open(os.path.join(partial_dir, SAVE_SNAPSHOT_MANIFEST), "w", encoding="utf-8") as f: json.dump(manifest, f, indent=1)
+            shutil.rmtree(snapshot_dir, ignore_errors=True); os.replace(partial_dir, snapshot_dir)
+            log_message_gui(f"World snapshot '{snapshot_dir}': {copied} file(s) copied, {linked} hardlinked, {len(to_hash)} hashed.")
+            return snapshot_dir
+        except Exception as e:
+            shutil.rmtree(partial_dir, ignore_errors=True)
+            log_message_gui(f"World snapshot failed: {e}", "ERROR"); return None
+
+    def restore_save_snapshot(self, backup_filename):
+        # Makes saveDirectory match the snapshot; files already identical (size/mtime) are left alone.
+        snapshot_dir = self.save_snapshot_path(backup_filename)
+        manifest = self._load_json(os.path.join(snapshot_dir, SAVE_SNAPSHOT_MANIFEST)) if self.has_save_snapshot(backup_filename) else None
+        if not isinstance(manifest, dict): log_message_gui(f"No world snapshot for '{backup_filename}'.", "ERROR"); return False
+        save_dir = self.resolve_path(self.get_setting_value(["saveDirectory"], ""))
+        if not save_dir: log_message_gui("saveDirectory is not set. World not restored.", "ERROR"); return False
+        try:
+            os.makedirs(save_dir, exist_ok=True)
+            current = scan_directory_files(save_dir); restored = removed = 0
+            for rel, meta in manifest["files"].items():
+                st = current.get(rel)
+                if st and st.st_size == meta["size"] and st.st_mtime_ns == meta["mtime_ns"]: continue
+                dest = os.path.join(save_dir, *rel.split("/")); os.makedirs(os.path.dirname(dest), exist_ok=True)
+                if os.path.exists(dest): os.remove(dest) # Never write through a hardlink shared with a snapshot
+                shutil.copy2(os.path.join(snapshot_dir, *rel.split("/")), dest); restored += 1
+            for rel in current.keys() - manifest["files"].keys():
+                os.remove(os.path.join(save_dir, *rel.split("/"))); removed += 1
+            log_message_gui(f"World restored from '{snapshot_dir}': {restored} file(s) restored, {removed} removed.")
+            return True
+        except Exception as e: log_message_gui(f"World restore failed: {e}", "ERROR"); return False
+
     def list_backup_files(self):
-        if not os.path.exists(BACKUP_DIR): return []
+        if not os.path.exists(self.backup_dir): return []
         backups = []
         try:
-            for fname in os.listdir(BACKUP_DIR):
-                if fname.startswith(os.path.splitext(JSON_FILE)[0]) and fname.endswith(".old"):
-                    match = re.search(r'_(\d{8}_\d{6})', fname); dt = datetime.min
-                    if match:
-                        try: dt = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
-                        except ValueError: 
-                            try: dt = datetime.fromtimestamp(os.path.getmtime(os.path.join(BACKUP_DIR, fname)))
-                            except: pass 
-                    else: 
-                        try: dt = datetime.fromtimestamp(os.path.getmtime(os.path.join(BACKUP_DIR, fname)))
+            for fname in os.listdir(self.backup_dir):
+                if fname.startswith(os.path.splitext(os.path.basename(self.json_path))[0]) and fname.endswith(".old"):
+                    dt = parse_backup_name(fname)[0] or datetime.min
+                    if dt == datetime.min:
+                        try: dt = datetime.fromtimestamp(os.path.getmtime(os.path.join(self.backup_dir, fname)))
                         except: pass 
                     backups.append((fname, dt))
             backups.sort(key=lambda item: item[1], reverse=True)
             return backups
         except Exception as e: self._log(f"Error listing backups: {e}", "ERROR"); return []
 
-    def restore_from_backup_file(self, backup_filename):
-        backup_filepath = os.path.join(BACKUP_DIR, backup_filename)
-        if not os.path.exists(backup_filepath): self._log(f"Backup file '{backup_filename}' not found.", "ERROR"); messagebox.showerror("Error", f"Backup file '{backup_filename}' not found."); return False
-        reason_suffix = f"before_restoring_{os.path.splitext(backup_filename)[0]}"
-        if self.backup_file(JSON_FILE, reason=reason_suffix):
+    def compare_backups(self, backup_filename, other_backup_filename=None, live_settings=None):
+        # Diff of backup -> other backup, or -> live settings (default: self.settings) when other_backup_filename is None. None if unreadable.
+        old, old_hashes = self.snapshot_cache.get(os.path.join(self.backup_dir, backup_filename))
+        if old is None: return None
+        if other_backup_filename: new, new_hashes = self.snapshot_cache.get(os.path.join(self.backup_dir, other_backup_filename))
+        else:
+            new = self.settings if live_settings is None else live_settings
+            new_hashes = compute_subtree_hashes(new)
+        if new is None: return None
+        return diff_settings(old, new, old_hashes, new_hashes)
+
+    def backup_before_restore(self, backup_filename, with_world=False):
+        # Backs up the current config, and with_world snapshots the world next to it. Safe on a worker thread.
+        # Returns (pre_restore_backup or False, world_snapshot_ok).
+        pre_restore_backup = self.backup_file(self.json_path, reason=f"before_restoring_{os.path.splitext(backup_filename)[0]}", schedule_eviction=False) # Evict only after the restore is done
+        return pre_restore_backup, bool(pre_restore_backup and with_world and self.snapshot_save_directory(pre_restore_backup))
+
+    def restore_config_from_backup(self, backup_filename, pre_restore_backup):
+        # Swaps the backup in under the config lock and reloads it. Raises on failure; returns False if the result does not load.
+        with config_file_lock(self.json_path):
+            if sha256_file(self.json_path) != sha256_file(pre_restore_backup): # Saved by someone else since our backup
+                self.backup_file(self.json_path, reason=f"before_restoring_{os.path.splitext(backup_filename)[0]}", schedule_eviction=False)
+            copy_file_atomic(os.path.join(self.backup_dir, backup_filename), self.json_path); self._remember_disk_state()
+        restored = self.base_settings
+        if not restored: return False
+        self.settings = json.loads(json.dumps(restored)); self._compact_journal()
+        return True
+
+    def restore_from_backup_file(self, backup_filename, restore_world=False):
+        # Synchronous restore for the API and scripts; the GUI runs the same steps with the world work off the Tk thread.
+        if not os.path.exists(os.path.join(self.backup_dir, backup_filename)): self._log(f"Backup file '{backup_filename}' not found.", "ERROR"); self._notify("error", "Error", f"Backup file '{backup_filename}' not found."); return False
+        pre_restore_backup, world_snapshot_ok = self.backup_before_restore(backup_filename, restore_world)
+        if pre_restore_backup:
             try:
-                shutil.copy2(backup_filepath, JSON_FILE)
-                restored = self._load_json(JSON_FILE)
-                if restored:
-                    self.settings = restored
-                    self._log(f"Restored '{backup_filename}'."); messagebox.showinfo("Restore Success", f"Restored from '{backup_filename}'."); return True
-                else: messagebox.showerror("Restore Error", "Failed to load settings after restoring.")
-            except Exception as e: self._log(f"Error restoring: {e}", "ERROR"); messagebox.showerror("Restore Error", f"Failed: {e}")
-        else: messagebox.showwarning("Backup Failed", "Restore cancelled: backup of current settings failed.")
+                if restore_world and not world_snapshot_ok:
+                    if not self._ask("World Snapshot Failed", "Could not snapshot the current world first. Restore anyway?"): return False
+                if self.restore_config_from_backup(backup_filename, pre_restore_backup):
+                    if restore_world and not self.restore_save_snapshot(backup_filename):
+                        self._notify("warning", "Restore Warning", f"Settings restored from '{backup_filename}', but the world save could not be restored."); return True
+                    self._log(f"Restored '{backup_filename}'{' (config and world)' if restore_world else ''}."); self._notify("info", "Restore Success", f"Restored from '{backup_filename}'."); return True
+                else: self._notify("error", "Restore Error", "Failed to load settings after restoring.")
+            except Exception as e: self._log(f"Error restoring: {e}", "ERROR"); self._notify("error", "Restore Error", f"Failed: {e}")
+            finally: self._schedule_backup_eviction()
+        else: self._notify("warning", "Backup Failed", "Restore cancelled: backup of current settings failed.")
         return False
     
     def add_user_group(self):
@@ -468,15 +2042,64 @@ class SettingsManager:
         user_groups = self.settings.get('userGroups', [])
         if isinstance(user_groups, list) and 0 <= group_index < len(user_groups):
             group_name = user_groups[group_index].get('name', f"Group at index {group_index}")
-            if messagebox.askyesno("Delete Group", f"Are you sure you want to delete group: '{group_name}'?"):
+            if self._ask("Delete Group", f"Are you sure you want to delete group: '{group_name}'?"):
                 del user_groups[group_index] 
                 self._log(f"Deleted user group: {group_name}")
                 return True 
         else:
             self._log(f"Failed to delete user group at index {group_index}. Invalid index or data.", "ERROR")
-            messagebox.showerror("Error", "Could not delete group. Invalid index or data.")
+            self._notify("error", "Error", "Could not delete group. Invalid index or data.")
         return False
 
+    # --- Edit Journal Replay ---
+    def offer_journal_replay(self):
+        if self.journal is None: return False
+        records = self.journal.orphaned_records()
+        if not records: self.journal.discard_orphans(); return False
+        msg = f"Found {len(records)} unsaved edit(s) from a previous session that did not exit cleanly.\n\nReplay them over the current '{self.json_path}'? They will not be written to disk until you save."
+        if self._ask("Recover Unsaved Edits", msg):
+            applied = self.apply_journal_records(records)
+            for record in records: self.journal.append(record) # Adopted before the orphans are deleted, so a second crash keeps them
+            self.journal.discard_orphans()
+            self._log(f"Recovered {applied} of {len(records)} unsaved edit(s) from the journal."); return applied > 0
+        self.journal.discard_orphans(); self._log("Discarded unsaved edits from the previous session.")
+        return False
+
+    def rebase_journal(self):
+        # The notebook was rebuilt from self.settings, so earlier records may point at rows that are gone
+        # (groups added or deleted before the rebuild). Replace them with the current difference from disk.
+        if self.journal is None: return
+        self.journal.compact()
+        base = self.base_settings or {}
+        for key, value in self.settings.items():
+            if key not in base or base[key] != value: self.journal.append({"op": "set", "path": [key], "value": value})
+
+    def apply_journal_records(self, records):
+        applied = 0
+        for record in records:
+            try:
+                if record["op"] == "set": self.set_setting_value(list(record["path"]), record["value"])
+                elif record["op"] == "add_group": self.add_user_group()
+                elif record["op"] == "delete_group":
+                    user_groups = self.settings.get("userGroups")
+                    if not (isinstance(user_groups, list) and 0 <= record["index"] < len(user_groups)): continue
+                    del user_groups[record["index"]]
+                else: continue
+                applied += 1
+            except Exception as e: self._log(f"Skipping unreplayable journal record {record}: {e}", "WARNING")
+        return applied
+
+
+# --- Batch Backups ---
+def backup_config_file(json_path, reason):
+    # For batch tools without an editor session (migrations, patches): backs the file up into its own BACKUP_DIR
+    # with the editor's naming, then applies that folder's retention policy if one was saved. Returns the backup path or False.
+    manager = SettingsManager(root_dir=os.path.dirname(os.path.abspath(json_path)), interactive=False, load=False)
+    manager.json_path = os.path.abspath(json_path) # May not be named JSON_FILE
+    backup_path = manager.backup_file(manager.json_path, reason, schedule_eviction=False)
+    if backup_path and manager.retention_policy_enabled(): manager.evict_old_backups()
+    return backup_path
+
 
 # --- Tkinter GUI Application ---
 class EnshroudedConfigEditorApp:
@@ -497,16 +2120,20 @@ class EnshroudedConfigEditorApp:
         self.settings_manager = SettingsManager(status_var=self.status_var)
         self.update_title() 
 
-        self.tk_vars = {}; self.path_to_description_map = {}
+        self.fields = {} # Path tuple -> FieldBinding, for every field on the built tabs
         self.tab_preset_labels = {} 
+        self.tab_frames = {}; self.built_tabs = set(); self._loading_vars = False; self.search_index = None
+        self.journaled_paths = set() # Paths with an edit in the journal since the last save
+        self.log_indexes = {} # Log file path -> LogFileIndex, kept across viewer windows
 
         self._create_menu()
+        self._create_search_bar()
         self._create_notebook_with_tabs() 
         self._create_status_bar()
         self._create_action_buttons()
         self.load_settings_into_gui() 
         self.status_var.set(f"Settings loaded. Game Version: {self.settings_manager.game_version}")
-        self.settings_changed = False 
+        self.settings_changed = self.settings_manager.recovered_edits # Recovered edits are pending until saved
         self.update_title()
 
 
@@ -514,20 +2141,21 @@ class EnshroudedConfigEditorApp:
         if self.settings_changed:
             response = messagebox.askyesnocancel("Unsaved Changes", "You have unsaved changes. Save before exiting?")
             if response is True: 
-                if self.save_all_gui_settings(): self.root.destroy()
-            elif response is False: self.root.destroy()
-        else: self.root.destroy()
+                if self.save_all_gui_settings(): self.settings_manager.journal.close(); self.root.destroy()
+            elif response is False: self.settings_manager.journal.compact(); self.settings_manager.journal.close(); self.root.destroy() # Edits deliberately discarded
+        else: self.settings_manager.journal.close(); self.root.destroy()
 
     def mark_settings_changed(self, event=None, path_keys_modified=None): 
+        if self._loading_vars: return # Values are being pushed into the GUI, not edited
         if not self.settings_changed:
             self.settings_changed = True
             self.update_title()
+        if path_keys_modified: self._journal_field_edit(path_keys_modified)
         
         # If a gameSetting is changed (i.e., path_keys_modified starts with "gameSettings"),
         # and preset is not "Custom", set it to "Custom"
         if path_keys_modified and len(path_keys_modified) > 0 and path_keys_modified[0] == "gameSettings":
-            preset_path_str = ".".join(GAME_PRESET_PATH)
-            preset_var = self.tk_vars.get(preset_path_str)
+            preset_var = self._preset_var()
             if preset_var and preset_var.get() != "Custom":
                 preset_var.set("Custom") # This will trigger its own trace and call on_preset_changed
                 self.settings_manager._log("Individual game setting changed, preset automatically set to 'Custom'.", "INFO")
@@ -536,7 +2164,21 @@ class EnshroudedConfigEditorApp:
                 # or ensure their trace also considers this.
                 # For safety, explicitly update the label visibility based on the new "Custom" state.
                 self.on_preset_changed() 
+            elif not preset_var and self.settings_manager.get_setting_value(GAME_PRESET_PATH) != "Custom":
+                # World tab not built yet, so switch the preset in the settings it will be loaded from
+                self.settings_manager.set_setting_value(GAME_PRESET_PATH, "Custom")
+                self.settings_manager._log("Individual game setting changed, preset automatically set to 'Custom'.", "INFO")
+                self._update_preset_labels()
+
 
+    def _journal_field_edit(self, path_keys):
+        binding = self.fields.get(tuple(path_keys))
+        if binding is None or binding.codec == "readonly": return
+        try: value = binding.from_gui()
+        except ValueError: return # Incomplete input (e.g. mid-typing); the next valid keystroke is journaled
+        if binding.path not in self.journaled_paths and value == self.settings_manager.get_setting_value(binding.path): return
+        self.journaled_paths.add(binding.path)
+        self.settings_manager.journal.append({"op": "set", "path": list(binding.path), "value": value})
 
     def update_title(self):
         title = f"{APP_TITLE_BASE} - v{self.settings_manager.game_version}"
@@ -552,25 +2194,81 @@ class EnshroudedConfigEditorApp:
         actionmenu = tk.Menu(menubar, tearoff=0)
         actionmenu.add_command(label="Load Defaults (from Readme)", command=self.load_defaults_gui)
         actionmenu.add_command(label="Manual Backup Current Settings", command=self.manual_backup_gui)
+        actionmenu.add_command(label="Backup Settings + World Snapshot", command=self.world_snapshot_backup_gui)
         actionmenu.add_command(label="Restore Specific Backup...", command=self.restore_backup_gui)
+        actionmenu.add_command(label="Backup Retention...", command=self.backup_retention_gui)
+        actionmenu.add_separator()
+        actionmenu.add_command(label="Import User Groups...", command=self.import_user_groups_gui)
+        actionmenu.add_command(label="Export User Groups...", command=self.export_user_groups_gui)
+        actionmenu.add_command(label="Export Unsaved Edits as Patch...", command=self.export_patch_gui)
+        actionmenu.add_command(label="Apply Patch...", command=self.apply_patch_gui)
+        actionmenu.add_separator()
+        actionmenu.add_command(label="View Server Logs...", command=self.log_viewer_gui)
+        actionmenu.add_command(label="Fleet Settings Query...", command=self.fleet_query_gui)
         menubar.add_cascade(label="Actions", menu=actionmenu)
         self.root.config(menu=menubar)
 
     def _refresh_notebook_and_vars(self):
         if hasattr(self, 'notebook') and self.notebook.winfo_exists(): self.notebook.destroy()
-        self.tk_vars.clear(); self.path_to_description_map.clear(); self.tab_preset_labels.clear()
+        self.fields.clear(); self.tab_preset_labels.clear(); self.journaled_paths.clear()
+        self.settings_manager.rebase_journal() # GUI edits not in settings are dropped with the old widgets
         self._create_notebook_with_tabs() 
         self.load_settings_into_gui() 
         self.settings_changed = False; self.update_title() 
 
+    def _create_search_bar(self):
+        search_frame = ttk.Frame(self.root, padding=(10,5,10,0)); search_frame.pack(side=tk.TOP, fill=tk.X)
+        ttk.Label(search_frame, text="Search Settings:").pack(side="left")
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=50); search_entry.pack(side="left", padx=5, fill="x", expand=True)
+        ToolTip(search_entry, "Type to search setting names, tooltips, JSON paths and user group names. Enter or double-click jumps to the setting.")
+        self.search_results_lb = tk.Listbox(self.root, height=8)
+        self.search_results = []
+        def on_search(*_):
+            query = self.search_var.get()
+            if query.strip() and self.search_index is None:
+                self.search_index = SettingsSearchIndex(self.tabs_config, self.settings_manager.get_setting_value(["userGroups"], []))
+            self.search_results = self.search_index.search(query) if query.strip() else []
+            self.search_results_lb.delete(0, tk.END)
+            for entry in self.search_results: self.search_results_lb.insert(tk.END, f"{entry['tab']} > {entry['label']}    [{entry['path']}]")
+            if self.search_results: self.search_results_lb.pack(side=tk.TOP, fill=tk.X, padx=10, after=search_frame)
+            else: self.search_results_lb.pack_forget()
+        def on_pick(event=None):
+            sel = self.search_results_lb.curselection()
+            idx = sel[0] if sel else 0
+            if idx < len(self.search_results):
+                entry = self.search_results[idx]; self.search_results_lb.pack_forget()
+                self.jump_to_setting(entry["tab"], entry["path_keys"])
+        self.search_var.trace_add("write", on_search)
+        search_entry.bind("<Return>", on_pick); search_entry.bind("<Down>", lambda e: (self.search_results_lb.focus_set(), self.search_results_lb.selection_set(0)) if self.search_results else None)
+        search_entry.bind("<Escape>", lambda e: self.search_results_lb.pack_forget())
+        self.search_results_lb.bind("<Double-Button-1>", on_pick); self.search_results_lb.bind("<Return>", on_pick)
+
+    def jump_to_setting(self, tab_name, path_keys):
+        self._ensure_tab_built(tab_name)
+        for i in range(len(self.notebook.tabs())):
+            if self.notebook.tab(i, "text") == tab_name: self.notebook.select(i); break
+        binding = self.fields.get(tuple(path_keys))
+        widget = binding.widget if binding else None
+        if not widget or not widget.winfo_exists(): return
+        self.root.update_idletasks()
+        canvas = widget
+        while canvas is not None and not isinstance(canvas, tk.Canvas): canvas = canvas.master
+        if canvas is not None:
+            content = canvas.nametowidget(canvas.itemcget(canvas.find_all()[0], "window"))
+            height = max(1, content.winfo_height())
+            canvas.yview_moveto(max(0.0, (widget.winfo_rooty() - content.winfo_rooty() - 20) / height))
+        widget.focus_set()
+        self.status_var.set(f"Jumped to {binding.label} on the {tab_name} tab.")
+
     def _create_notebook_with_tabs(self): 
         if hasattr(self, 'notebook') and self.notebook.winfo_exists(): pass 
         else: self.notebook = ttk.Notebook(self.root); self.notebook.pack(expand=True, fill="both", padx=10, pady=5)
         
         if hasattr(self, 'notebook') and self.notebook.winfo_exists():
             for i in reversed(range(len(self.notebook.tabs()))): self.notebook.forget(i)
-        self.tk_vars.clear(); self.path_to_description_map.clear(); self.tab_preset_labels.clear()
-
+        self.fields.clear(); self.tab_preset_labels.clear()
+        self.tab_frames.clear(); self.built_tabs.clear()
 
         self.tabs_config = {
             "General": general_settings_menu_def, "Player": player_settings_menu_def,
@@ -592,19 +2290,46 @@ class EnshroudedConfigEditorApp:
                                         command=lambda tn=tab_name, md=menu_def: self._randomize_tab_settings(tn, md))
                 random_btn.pack(pady=(0,10), anchor="nw") 
 
-            if menu_def == "user_groups_tab": self._populate_user_groups_tab(tab_frame_container) 
-            else: self._populate_tab(tab_frame_container, menu_def) 
+            self.tab_frames[tab_name] = tab_frame_container # Populated on first view, see _ensure_tab_built
         
+        self.search_index = None # Rebuilt on the next search, since user groups may have changed
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+        self._ensure_tab_built(self.notebook.tab(self.notebook.select(), "text"))
         self.on_preset_changed() # Call after all tabs and their labels are created
 
+    def _on_tab_changed(self, event=None):
+        if self.notebook.select(): self._ensure_tab_built(self.notebook.tab(self.notebook.select(), "text"))
+
+    def _ensure_tab_built(self, tab_name):
+        # Tabs are populated lazily; the Server Roles tab in particular can hold hundreds of groups' worth of widgets.
+        if tab_name in self.built_tabs or tab_name not in self.tab_frames: return
+        self.built_tabs.add(tab_name)
+        menu_def, existing_paths = self.tabs_config[tab_name], set(self.fields)
+        if menu_def == "user_groups_tab": self._populate_user_groups_tab(self.tab_frames[tab_name])
+        else: self._populate_tab(self.tab_frames[tab_name], menu_def, tab_name)
+        self._load_fields_from_settings([b for p, b in self.fields.items() if p not in existing_paths])
+        self._update_preset_labels()
+
+
+    def _preset_var(self):
+        binding = self.fields.get(tuple(GAME_PRESET_PATH))
+        return binding.var if binding else None
 
     def on_preset_changed(self, event=None): 
-        preset_path_str = ".".join(GAME_PRESET_PATH)
-        preset_var = self.tk_vars.get(preset_path_str)
+        preset_var = self._preset_var()
 
-        if not preset_var: return # Should not happen if GUI is built correctly
+        if not preset_var: self._update_preset_labels(); return # World tab not built yet
 
-        is_custom = preset_var.get() == "Custom"
+        self._update_preset_labels()
+        
+        # Only mark as changed if it's a user interaction (event is not None)
+        # or if explicitly called after an automatic change.
+        if event is not None or (event is None and self.settings_changed is False) : # Avoid re-triggering if already marked by another setting
+             self.mark_settings_changed(path_keys_modified=GAME_PRESET_PATH)
+
+    def _update_preset_labels(self):
+        preset_var = self._preset_var()
+        is_custom = (preset_var.get() if preset_var else self.settings_manager.get_setting_value(GAME_PRESET_PATH)) == "Custom"
         
         for tab_name_iter, label_widget in self.tab_preset_labels.items():
             if label_widget and label_widget.winfo_exists(): 
@@ -612,11 +2337,6 @@ class EnshroudedConfigEditorApp:
                     label_widget.config(text="Info: Individual game settings might be overridden by the selected preset if not 'Custom'.")
                 else:
                     label_widget.config(text="") 
-        
-        # Only mark as changed if it's a user interaction (event is not None)
-        # or if explicitly called after an automatic change.
-        if event is not None or (event is None and self.settings_changed is False) : # Avoid re-triggering if already marked by another setting
-             self.mark_settings_changed(path_keys_modified=GAME_PRESET_PATH)
 
 
 
@@ -629,7 +2349,7 @@ class EnshroudedConfigEditorApp:
         canvas.pack(side="left", fill="both", expand=True); scrollbar.pack(side="right", fill="y")
         return scrollable_frame
 
-    def _populate_tab(self, parent_tab_frame, menu_def): 
+    def _populate_tab(self, parent_tab_frame, menu_def, tab_name): 
         
         # Find first non-button child to determine where to insert scrollable frame
         insert_after_widget = None
@@ -647,12 +2367,7 @@ class EnshroudedConfigEditorApp:
         row_idx = 0
 
         for _, (path_keys, label_text, tooltip_text) in sorted(menu_def.items()): 
-            path_str = ".".join(map(str, path_keys))
-            self.path_to_description_map[path_str] = label_text 
-            
-            setting_type, specific_config = get_setting_config_by_path(path_keys)
-            current_value = self.settings_manager.get_setting_value(path_keys)
-            desc_hint = tooltip_text.lower() # Use tooltip for hints now
+            binding = FieldBinding(path_keys, label_text, tooltip_text, tab_name, self.settings_manager.get_setting_value(path_keys))
 
             label_widget = ttk.Label(content_frame, text=label_text + ":")
             label_widget.grid(row=row_idx, column=0, sticky="w", padx=5, pady=3)
@@ -663,48 +2378,41 @@ class EnshroudedConfigEditorApp:
             widget_frame.grid(row=row_idx, column=1, sticky="ew", padx=5, pady=3)
             content_frame.grid_columnconfigure(1, weight=1)
             
-            var = None
-            widget_for_binding = None
-
-            if "(path)" in desc_hint: 
-                var = tk.StringVar(); entry = ttk.Entry(widget_frame, textvariable=var, width=35)
-                entry.pack(side="left", fill="x", expand=True); widget_for_binding = entry
-                ttk.Button(widget_frame, text="Browse...", command=lambda v=var: self._browse_directory(v)).pack(side="left", padx=(5,0))
-            elif setting_type == "string_choice" and specific_config:
-                var = tk.StringVar(); 
-                cb = ttk.Combobox(widget_frame, textvariable=var, values=specific_config["options"], state="readonly", width=33)
-                cb.pack(side="left", fill="x", expand=True); widget_for_binding = cb
+            if binding.codec == "path": 
+                binding.var = tk.StringVar(); binding.widget = ttk.Entry(widget_frame, textvariable=binding.var, width=35)
+                binding.widget.pack(side="left", fill="x", expand=True)
+                ttk.Button(widget_frame, text="Browse...", command=lambda v=binding.var: self._browse_directory(v)).pack(side="left", padx=(5,0))
+            elif binding.codec == "choice":
+                binding.var = tk.StringVar(); 
+                binding.widget = ttk.Combobox(widget_frame, textvariable=binding.var, values=binding.config["options"], state="readonly", width=33)
+                binding.widget.pack(side="left", fill="x", expand=True)
                 if path_keys == GAME_PRESET_PATH: 
-                    cb.bind("<<ComboboxSelected>>", self.on_preset_changed)
-
-            elif setting_type == "factor" and specific_config:
-                var = tk.StringVar() 
-                entry = ttk.Entry(widget_frame, textvariable=var, width=10) 
-                entry.pack(side="left"); widget_for_binding = entry
-                ttk.Label(widget_frame, text=f"% (Range: {int(specific_config['min_float']*100)}-{int(specific_config['max_float']*100)}%)").pack(side="left", padx=(3,0))
-            elif "true/false" in desc_hint:
-                var = tk.BooleanVar(); cb = ttk.Checkbutton(widget_frame, variable=var); cb.pack(side="left"); widget_for_binding = cb
-            elif "integer" in desc_hint or setting_type == "duration" or "float" in desc_hint: 
-                var = tk.StringVar(); entry = ttk.Entry(widget_frame, textvariable=var, width=35)
-                entry.pack(side="left", fill="x", expand=True); widget_for_binding = entry
-            elif "string" in desc_hint or isinstance(current_value, str) or current_value is None:
-                var = tk.StringVar(); entry = ttk.Entry(widget_frame, textvariable=var, width=35)
-                entry.pack(side="left", fill="x", expand=True); widget_for_binding = entry
-            else: 
-                var = tk.StringVar(); var.set(str(current_value)[:50]); 
-                entry = ttk.Entry(widget_frame, textvariable=var, state="readonly", width=35)
-                entry.pack(side="left", fill="x", expand=True) 
+                    binding.widget.bind("<<ComboboxSelected>>", self.on_preset_changed)
+
+            elif binding.codec == "factor":
+                binding.var = tk.StringVar() 
+                binding.widget = ttk.Entry(widget_frame, textvariable=binding.var, width=10) 
+                binding.widget.pack(side="left")
+                ttk.Label(widget_frame, text=f"% (Range: {int(binding.config['min_float']*100)}-{int(binding.config['max_float']*100)}%)").pack(side="left", padx=(3,0))
+            elif binding.codec == "bool":
+                binding.var = tk.BooleanVar(); binding.widget = ttk.Checkbutton(widget_frame, variable=binding.var); binding.widget.pack(side="left")
+            elif binding.codec == "readonly": 
+                binding.var = tk.StringVar()
+                ttk.Entry(widget_frame, textvariable=binding.var, state="readonly", width=35).pack(side="left", fill="x", expand=True) 
+            else: # duration, int, float, str
+                binding.var = tk.StringVar(); binding.widget = ttk.Entry(widget_frame, textvariable=binding.var, width=35)
+                binding.widget.pack(side="left", fill="x", expand=True)
             
-            if var: self.tk_vars[path_str] = var
-            if widget_for_binding and path_keys != GAME_PRESET_PATH: 
-                # If it's a gameSetting, mark_settings_changed will handle preset switch
-                is_game_setting = path_keys[0] == "gameSettings"
-                
-                if isinstance(widget_for_binding, ttk.Checkbutton):
-                    widget_for_binding.config(command=lambda pk=path_keys: self.mark_settings_changed(path_keys_modified=pk))
-                else: 
-                    var.trace_add("write", lambda n,i,m,pk=path_keys,v=var: self.mark_settings_changed(path_keys_modified=pk) if hasattr(v, 'get') and v.get() is not None else None)
+            self.fields[binding.path] = binding
+            if binding.widget is not None and path_keys != GAME_PRESET_PATH: self._bind_change_tracking(binding)
             row_idx += 1
+
+    def _bind_change_tracking(self, binding):
+        # If it's a gameSetting, mark_settings_changed will handle preset switch
+        if isinstance(binding.widget, ttk.Checkbutton):
+            binding.widget.config(command=lambda pk=list(binding.path): self.mark_settings_changed(path_keys_modified=pk))
+        else: 
+            binding.var.trace_add("write", lambda n,i,m,pk=list(binding.path),v=binding.var: self.mark_settings_changed(path_keys_modified=pk) if hasattr(v, 'get') and v.get() is not None else None)
     
     def _populate_user_groups_tab(self, parent_tab_frame): 
         for widget in parent_tab_frame.winfo_children(): widget.destroy()
@@ -734,15 +2442,12 @@ class EnshroudedConfigEditorApp:
 
             row_idx = 0
             for _, (sub_path, label_text, tooltip_text) in sorted(user_groups_settings_def_template.items()):
-                full_path = ["userGroups", group_idx] + sub_path
-                path_str = ".".join(map(str, full_path))
+                binding = FieldBinding(["userGroups", group_idx] + sub_path, label_text, tooltip_text, "Server Roles", group_data.get(sub_path[0]))
                 
                 final_tooltip = tooltip_text
                 if sub_path == ["password"]: 
                     final_tooltip += "\n\nReminder: Change default passwords for security!"
 
-                self.path_to_description_map[path_str] = label_text 
-                
                 label_widget = ttk.Label(group_lf, text=label_text + ":")
                 label_widget.grid(row=row_idx, column=0, sticky="w", padx=5, pady=3)
                 ToolTip(label_widget, final_tooltip)
@@ -750,35 +2455,92 @@ class EnshroudedConfigEditorApp:
                 widget_frame = ttk.Frame(group_lf)
                 widget_frame.grid(row=row_idx, column=1, sticky="ew", padx=5, pady=3); group_lf.grid_columnconfigure(1, weight=1)
                 
-                var = None; widget_for_binding = None
-                if "true/false" in tooltip_text.lower(): 
-                    var = tk.BooleanVar(); cb = ttk.Checkbutton(widget_frame, variable=var); cb.pack(side="left"); widget_for_binding = cb
+                if binding.codec == "bool": 
+                    binding.var = tk.BooleanVar(); binding.widget = ttk.Checkbutton(widget_frame, variable=binding.var); binding.widget.pack(side="left")
                 else: 
-                    var = tk.StringVar(); entry = ttk.Entry(widget_frame, textvariable=var, width=30); entry.pack(side="left", fill="x", expand=True); widget_for_binding = entry
+                    binding.var = tk.StringVar(); binding.widget = ttk.Entry(widget_frame, textvariable=binding.var, width=30); binding.widget.pack(side="left", fill="x", expand=True)
                 
-                if var: self.tk_vars[path_str] = var
-                if widget_for_binding:
-                    if isinstance(widget_for_binding, ttk.Checkbutton):
-                        widget_for_binding.config(command=lambda pk=full_path: self.mark_settings_changed(path_keys_modified=pk))
-                    else:
-                        var.trace_add("write", lambda n,i,m,pk=full_path,v=var: self.mark_settings_changed(path_keys_modified=pk) if hasattr(v,'get') and v.get() is not None else None)
+                self.fields[binding.path] = binding
+                self._bind_change_tracking(binding)
 
                 row_idx += 1
     
     def add_new_user_group_gui(self):
         if self.settings_manager.add_user_group():
-            self._refresh_notebook_and_vars() 
+            self._refresh_notebook_and_vars() # Journals the new group 
             for i in range(len(self.notebook.tabs())): 
                 if self.notebook.tab(i, "text") == "Server Roles": self.notebook.select(i); break
             self.status_var.set("New user group added. Configure and save."); self.mark_settings_changed()
 
     def delete_user_group_gui(self, group_index):
         if self.settings_manager.delete_user_group(group_index):
-            self._refresh_notebook_and_vars() 
+            self._refresh_notebook_and_vars() # Journals the deletion 
             for i in range(len(self.notebook.tabs())): 
                 if self.notebook.tab(i, "text") == "Server Roles": self.notebook.select(i); break
             self.status_var.set("User group deleted. Save settings to make permanent."); self.mark_settings_changed()
 
+    def import_user_groups_gui(self):
+        path = filedialog.askopenfilename(title="Import User Groups", filetypes=[("CSV or JSON Lines", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")])
+        if not path: return
+        try: existing = list(self._settings_with_gui_edits().get("userGroups") or []) # Match against the groups as currently edited
+        except ValueError as e: messagebox.showerror("Input Error", str(e)); return
+        self.status_var.set(f"Reading user groups from '{os.path.basename(path)}'...")
+        def on_done(result):
+            if result is None: self.status_var.set("User group import failed."); messagebox.showerror("Import Failed", f"Could not read '{path}'. See the log for details."); return
+            groups, report = result
+            summary = (f"{report['added']} group(s) to add, {report['updated']} to update, {report['unchanged']} unchanged, "
+                       f"{report['duplicates']} duplicate row(s) merged, {report['rejected']} row(s) rejected.")
+            if report["errors"]: summary += "\n\nRejected rows:\n" + "\n".join(report["errors"][:15]) + ("\n..." if report["rejected"] > 15 else "")
+            if not (report["added"] or report["updated"]): self.status_var.set("Nothing to import."); messagebox.showinfo("Import User Groups", summary); return
+            if not messagebox.askyesno("Import User Groups", summary + "\n\nApply these changes? Your other unsaved edits are kept."): self.status_var.set("User group import cancelled."); return
+            try: current = self._settings_with_gui_edits() # Fresh copy, so edits made while the file was read survive too
+            except ValueError as e: messagebox.showerror("Input Error", str(e)); return
+            current["userGroups"] = groups; self.settings_manager.settings = current
+            self._refresh_notebook_and_vars() # One rebuild (and one journal record) for the whole batch
+            self.status_var.set(f"Imported user groups: {report['added']} added, {report['updated']} updated. Save to make permanent."); self.mark_settings_changed()
+        self._run_in_background(self.root, lambda: plan_user_group_import(path, existing), on_done)
+
+    def export_user_groups_gui(self):
+        path = filedialog.asksaveasfilename(title="Export User Groups", defaultextension=".csv", filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")])
+        if not path: return
+        try: count = export_user_groups(self.settings_manager.get_setting_value(["userGroups"], []) or [], path)
+        except Exception as e: self.settings_manager._log(f"User group export failed: {e}", "ERROR"); messagebox.showerror("Export Failed", str(e)); return
+        self.status_var.set(f"Exported {count} user group(s) to '{os.path.basename(path)}'.")
+
+    def _settings_with_gui_edits(self):
+        # Copy of the settings with every field's current GUI value, as a save would write them. Raises ValueError.
+        settings = json.loads(json.dumps(self.settings_manager.settings))
+        for binding in self.fields.values():
+            if binding.codec != "readonly": self.settings_manager.set_setting_value(list(binding.path), binding.from_gui(), target_dict=settings)
+        return settings
+
+    def export_patch_gui(self):
+        try: pending = self._settings_with_gui_edits()
+        except ValueError as e: messagebox.showerror("Input Error", str(e)); return
+        patch = settings_to_json_patch(self.settings_manager.base_settings or {}, pending,
+                                       with_tests=messagebox.askyesno("Export Patch", "Guard each change with a 'test' of the value on disk?\n\nChoose No to apply the patch to servers whose current values differ."))
+        if not patch: messagebox.showinfo("Export Patch", "There are no unsaved edits to export."); return
+        path = filedialog.asksaveasfilename(title="Export Unsaved Edits as Patch", defaultextension=".json", filetypes=[("JSON Patch", "*.json"), ("All files", "*.*")])
+        if not path: return
+        try: write_json_atomic(patch, path)
+        except OSError as e: self.settings_manager._log(f"Patch export failed: {e}", "ERROR"); messagebox.showerror("Export Failed", str(e)); return
+        self.status_var.set(f"Exported {len(patch)} patch operation(s) to '{os.path.basename(path)}'.")
+
+    def apply_patch_gui(self):
+        path = filedialog.askopenfilename(title="Apply Patch", filetypes=[("JSON Patch", "*.json"), ("All files", "*.*")])
+        if not path: return
+        try:
+            with open(path, "r", encoding="utf-8") as f: compiled = compile_json_patch(json.load(f))
+            current = self._settings_with_gui_edits()
+            patched = apply_json_patch(current, compiled)
+        except (OSError, ValueError) as e: messagebox.showerror("Patch Not Applied", f"'{os.path.basename(path)}' was not applied; nothing was changed.\n\n{e}"); return
+        new_errors = [e for e in validate_settings(patched, self.settings_manager.readme_defaults) if e not in validate_settings(current, self.settings_manager.readme_defaults)]
+        if new_errors:
+            messagebox.showerror("Patch Not Applied", "The patch would make these settings invalid:\n\n" + "\n".join(f"{path_to_str(p)}: {m}" for p, m in new_errors[:15])); return
+        self.settings_manager.settings = patched
+        self._refresh_notebook_and_vars() # One rebuild (and journal rebase) for the whole patch
+        self.status_var.set(f"Applied {len(compiled)} patch operation(s) from '{os.path.basename(path)}'. Save to make permanent."); self.mark_settings_changed()
+
     def _browse_directory(self, tk_var): directory = filedialog.askdirectory();_ = tk_var.set(directory) if directory else None; self.mark_settings_changed()
     def _create_status_bar(self): ttk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN, anchor="w").pack(side=tk.BOTTOM, fill=tk.X, padx=2, pady=2)
     def _create_action_buttons(self):
@@ -786,96 +2548,58 @@ class EnshroudedConfigEditorApp:
         ttk.Button(bf, text="Save All Settings", command=self.save_all_gui_settings).pack(side=tk.RIGHT, padx=5)
 
     def load_settings_into_gui(self):
-        for path_str, tk_var in self.tk_vars.items():
-            path_keys = [int(p) if p.isdigit() else p for p in path_str.split('.')]
-            value = self.settings_manager.get_setting_value(path_keys)
-            setting_type, specific_config = get_setting_config_by_path(path_keys)
-            try:
-                if setting_type == "duration" and isinstance(value, (int, float)): tk_var.set(str(nanoseconds_to_minutes_gui(value)))
-                elif setting_type == "factor" and isinstance(value, (int, float)): tk_var.set(float_to_percent_str(value))
-                elif isinstance(tk_var, tk.BooleanVar): tk_var.set(bool(value) if value is not None else False)
-                else: tk_var.set(str(value) if value is not None else "") 
-            except Exception as e:
-                self.settings_manager._log(f"Error loading {path_str} into GUI: {value} ({type(value)}). Err: {e}", "ERROR")
-                if isinstance(tk_var, tk.StringVar): tk_var.set("") 
-                elif isinstance(tk_var, tk.BooleanVar): tk_var.set(False)
-        
+        self._load_fields_from_settings(list(self.fields.values()))
         self.on_preset_changed() 
         self.settings_changed = False 
         self.update_title()
         self.status_var.set(f"Settings loaded. Game Version: {self.settings_manager.game_version}")
 
+    def _load_fields_from_settings(self, bindings):
+        self._loading_vars = True
+        try:
+            for binding in bindings:
+                value = self.settings_manager.get_setting_value(binding.path)
+                try: binding.var.set(binding.to_gui(value))
+                except Exception as e:
+                    self.settings_manager._log(f"Error loading {path_to_str(binding.path)} into GUI: {value} ({type(value)}). Err: {e}", "ERROR")
+                    binding.var.set(False if isinstance(binding.var, tk.BooleanVar) else "")
+        finally: self._loading_vars = False
 
     def save_all_gui_settings(self):
         self.status_var.set("Saving settings...")
-        for path_str, tk_var in self.tk_vars.items():
-            path_keys = [int(p) if p.isdigit() else p for p in path_str.split('.')]
-            gui_val_str = str(tk_var.get()) 
-            desc_label = self.path_to_description_map.get(path_str, "") 
-            tooltip_text_for_type_hint = "" # Get the full tooltip for type hints
-            for menu_collection in [general_settings_menu_def, player_settings_menu_def, world_settings_menu_def, enemy_settings_menu_def, resource_settings_menu_def, experience_settings_menu_def]:
-                for _, item_tuple_val in menu_collection.items():
-                    if item_tuple_val[0] == path_keys: tooltip_for_type_hint = item_tuple_val[2].lower(); break
-                if tooltip_for_type_hint: break
-            if not tooltip_for_type_hint and path_keys[0] == "userGroups":
-                 for _, item_tuple_val in user_groups_settings_def_template.items():
-                     if item_tuple_val[0] == path_keys[2:]: tooltip_for_type_hint = item_tuple_val[2].lower(); break
-
-
-            setting_type, specific_config = get_setting_config_by_path(path_keys)
-            final_value = None
+        for binding in self.fields.values():
+            if binding.codec == "readonly": continue
             try:
-                if setting_type == "duration":
-                    if not gui_val_str.strip(): messagebox.showerror("Input Error", f"Minutes for {desc_label} empty."); return
-                    final_value = minutes_to_nanoseconds_gui(gui_val_str)
-                    if final_value is None: messagebox.showerror("Input Error", f"Invalid minutes for {desc_label}: '{gui_val_str}'."); return
-                    mins = int(gui_val_str)
-                    if not (specific_config["min_minutes"] <= mins <= specific_config["max_minutes"]):
-                        messagebox.showerror("Input Error", f"{desc_label} ({mins} min) out of range."); return
-                elif setting_type == "factor":
-                    if not gui_val_str.strip(): messagebox.showerror("Input Error", f"Percentage for {desc_label} empty."); return
-                    final_value = percent_str_to_float(gui_val_str)
-                    if final_value is None: messagebox.showerror("Input Error", f"Invalid percent for {desc_label}: '{gui_val_str}'."); return
-                    min_p, max_p = int(specific_config['min_float']*100), int(specific_config['max_float']*100)
-                    if not (specific_config["min_float"] <= final_value <= specific_config["max_float"]): 
-                        messagebox.showerror("Input Error", f"{desc_label} ({gui_val_str}%) out of range ({min_p}%-{max_p}%)."); return
-                elif isinstance(tk_var, tk.BooleanVar): final_value = bool(tk_var.get()) 
-                elif "integer" in tooltip_for_type_hint: final_value = int(gui_val_str) if gui_val_str.strip() else 0 
-                elif "float" in tooltip_for_type_hint: final_value = float(gui_val_str) if gui_val_str.strip() else 0.0
-                else: final_value = gui_val_str 
-                self.settings_manager.set_setting_value(path_keys, final_value)
-            except ValueError as e: messagebox.showerror("Input Error", f"Invalid value for {desc_label}: '{gui_val_str}'. Error: {e}"); return
-            except Exception as e: messagebox.showerror("Error", f"Processing {desc_label}: {e}"); return
+                self.settings_manager.set_setting_value(list(binding.path), binding.from_gui())
+            except ValueError as e: messagebox.showerror("Input Error", str(e)); return
+            except Exception as e: messagebox.showerror("Error", f"Processing {binding.label}: {e}"); return
         
         if self.settings_manager.save_all_settings(): 
-            self.settings_changed = False; self.update_title()
+            if self.settings_manager.last_save_merged: self._refresh_notebook_and_vars() # Show the other editor's changes too
+            self.settings_changed = False; self.journaled_paths.clear(); self.update_title()
             self.status_var.set(f"Settings saved! Version: {self.settings_manager.game_version}")
+            return True
+        return False
         
     def _randomize_tab_settings(self, tab_name, menu_def):
         self.status_var.set(f"Randomizing settings for {tab_name} tab...")
         randomized_settings_for_assessment = {}
 
-        for _, (path_keys, _, tooltip_text) in sorted(menu_def.items()): # Use tooltip for hints
-            path_str = ".".join(map(str, path_keys))
-            tk_var = self.tk_vars.get(path_str)
-            if not tk_var: continue 
-
-            setting_type, specific_config = get_setting_config_by_path(path_keys)
-            original_value_for_assessment = self.settings_manager.get_setting_value(path_keys) 
+        for binding in [b for b in self.fields.values() if b.tab == tab_name]:
+            specific_config = binding.config
+            original_value_for_assessment = self.settings_manager.get_setting_value(binding.path) 
             
-            if path_keys == ["name"] or path_keys == ["saveDirectory"] or \
-               path_keys == ["logDirectory"] or path_keys == ["ip"] or \
-               path_keys == ["queryPort"]:
-                randomized_settings_for_assessment[path_str] = original_value_for_assessment
+            if binding.path in (("name",), ("saveDirectory",), ("logDirectory",), ("ip",), ("queryPort",)):
+                randomized_settings_for_assessment[binding.path] = original_value_for_assessment
                 continue
 
             new_value_for_gui = None; actual_new_value = None
 
-            if setting_type == "duration" and specific_config:
+            if binding.codec == "duration" and specific_config:
                 rand_minutes = random.randint(specific_config["min_minutes"], specific_config["max_minutes"])
                 new_value_for_gui = str(rand_minutes)
                 actual_new_value = minutes_to_nanoseconds_gui(str(rand_minutes))
-            elif setting_type == "factor" and specific_config:
+            elif binding.codec == "factor":
                 val_range = specific_config["max_float"] - specific_config["min_float"]
                 inset = val_range * 0.1 
                 rand_min = specific_config["min_float"] + (random.random() * inset)
@@ -887,24 +2611,24 @@ class EnshroudedConfigEditorApp:
                 rand_float = max(specific_config["min_float"], min(specific_config["max_float"], rand_float))
                 new_value_for_gui = float_to_percent_str(rand_float)
                 actual_new_value = round(rand_float, 6)
-            elif setting_type == "string_choice" and specific_config:
+            elif binding.codec == "choice":
                 chosen_option = random.choice(specific_config["options"])
                 new_value_for_gui = chosen_option; actual_new_value = chosen_option
-            elif "true/false" in tooltip_text.lower(): 
+            elif binding.codec == "bool": 
                 chosen_bool = random.choice([True, False])
                 new_value_for_gui = chosen_bool; actual_new_value = chosen_bool
-            elif path_keys == ["slotCount"]: 
+            elif binding.path == ("slotCount",): 
                 actual_new_value = random.randint(1, 16); new_value_for_gui = str(actual_new_value)
             else:
-                randomized_settings_for_assessment[path_str] = original_value_for_assessment
+                randomized_settings_for_assessment[binding.path] = original_value_for_assessment
                 continue 
 
             if new_value_for_gui is not None:
-                tk_var.set(new_value_for_gui)
-                randomized_settings_for_assessment[path_str] = actual_new_value
-                self.mark_settings_changed(path_keys_modified=path_keys) 
+                binding.var.set(new_value_for_gui)
+                randomized_settings_for_assessment[binding.path] = actual_new_value
+                self.mark_settings_changed(path_keys_modified=list(binding.path)) 
             else: 
-                randomized_settings_for_assessment[path_str] = original_value_for_assessment
+                randomized_settings_for_assessment[binding.path] = original_value_for_assessment
         
         self._assess_and_warn_difficulty(tab_name, randomized_settings_for_assessment)
         self.status_var.set(f"Settings for {tab_name} randomized. Review and Save.")
@@ -915,12 +2639,12 @@ class EnshroudedConfigEditorApp:
         hard_indicators = []; total_impact_score = 0;
         DIFFICULTY_THRESHOLD = 3 
 
-        for path_str, rand_val in randomized_values_map.items():
-            path_keys = [int(p) if p.isdigit() else p for p in path_str.split('.')]
+        for path_tuple, rand_val in randomized_values_map.items():
+            binding, path_keys = self.fields[path_tuple], list(path_tuple)
             normal_val = self.settings_manager.get_setting_value(path_keys, target_dict=normal_settings) 
             if normal_val is None: continue 
 
-            setting_type, specific_config = get_setting_config_by_path(path_keys)
+            setting_type, specific_config = binding.setting_type, binding.config
             impact_score = 0 # Default to neutral
 
             if setting_type == "factor" and specific_config:
@@ -965,11 +2689,11 @@ class EnshroudedConfigEditorApp:
         # A simple heuristic: if the sum of scores (where positive means harder) exceeds threshold
         
         effective_difficulty_score = 0
-        for path_str_check, rand_val_check in randomized_values_map.items():
-            path_keys_check = [int(p) if p.isdigit() else p for p in path_str_check.split('.')]
+        for path_tuple_check, rand_val_check in randomized_values_map.items():
+            path_keys_check = list(path_tuple_check)
             normal_val_check = self.settings_manager.get_setting_value(path_keys_check, target_dict=normal_settings)
             if normal_val_check is None: continue
-            _, specific_conf_check = get_setting_config_by_path(path_keys_check)
+            specific_conf_check = self.fields[path_tuple_check].config
 
             if specific_conf_check and "impact_score_hard" in specific_conf_check:
                 normal_float_check = specific_conf_check.get("normal_float", 1.0)
@@ -997,38 +2721,693 @@ class EnshroudedConfigEditorApp:
             self.status_var.set("Readme defaults applied. Save to make permanent."); self.mark_settings_changed()
         
     def manual_backup_gui(self):
-        if self.settings_manager.backup_file(JSON_FILE, reason="manual_gui_backup"):
+        if self.settings_manager.backup_file(self.settings_manager.json_path, reason="manual_gui_backup"):
             messagebox.showinfo("Backup", "Current settings backed up."); self.status_var.set("Manual backup created.")
         else: messagebox.showerror("Backup Failed", "Could not create manual backup."); self.status_var.set("Manual backup failed.")
 
+    def world_snapshot_backup_gui(self):
+        backup_path = self.settings_manager.backup_file(self.settings_manager.json_path, reason="manual_world_snapshot")
+        if not backup_path: messagebox.showerror("Backup Failed", "Could not create settings backup."); return
+        self.status_var.set("Settings backed up. Snapshotting world save...")
+        def on_done(snapshot_dir):
+            if snapshot_dir: self.status_var.set("Settings and world snapshot backed up."); messagebox.showinfo("Backup", f"Settings and world snapshot backed up to:\n{snapshot_dir}")
+            else: self.status_var.set("World snapshot failed."); messagebox.showerror("Backup Failed", "Settings were backed up, but the world snapshot failed. Check saveDirectory.")
+        self._run_in_background(self.root, lambda: self.settings_manager.snapshot_save_directory(backup_path), on_done)
+
     def restore_backup_gui(self):
         backups = self.settings_manager.list_backup_files()
         if not backups: messagebox.showinfo("Restore Backup", "No backup files found."); return
-        restore_win = tk.Toplevel(self.root); restore_win.title("Select Backup"); restore_win.geometry("650x400"); restore_win.transient(self.root); restore_win.grab_set()
-        tk.Label(restore_win, text="Select backup (newest first):").pack(pady=10)
-        lb_frame = ttk.Frame(restore_win); lb_frame.pack(pady=5, padx=10, fill="both", expand=True)
-        lb = tk.Listbox(lb_frame, width=90, height=15); scroll = ttk.Scrollbar(lb_frame, orient="vertical", command=lb.yview)
+        restore_win = tk.Toplevel(self.root); restore_win.title("Select Backup"); restore_win.geometry("1150x500"); restore_win.transient(self.root); restore_win.grab_set()
+        tk.Label(restore_win, text="Select backup (newest first). Select one to compare with current settings, or two to compare with each other:").pack(pady=10)
+        panes = ttk.PanedWindow(restore_win, orient=tk.HORIZONTAL); panes.pack(pady=5, padx=10, fill="both", expand=True)
+        lb_frame = ttk.Frame(panes); panes.add(lb_frame, weight=1)
+        preview_frame = ttk.LabelFrame(panes, text="Compare", padding="5"); panes.add(preview_frame, weight=1)
+        preview_box = scrolledtext.ScrolledText(preview_frame, wrap=tk.NONE, width=60, height=15, state=tk.DISABLED)
+        preview_box.pack(fill="both", expand=True)
+        lb = tk.Listbox(lb_frame, width=90, height=15, selectmode=tk.EXTENDED, exportselection=False); scroll = ttk.Scrollbar(lb_frame, orient="vertical", command=lb.yview)
         lb.configure(yscrollcommand=scroll.set)
-        for fname, dt in backups:
-            r_match = re.search(r'\d{8}_\d{6}_(.*)\.old$', fname)
-            r_disp = f" (Reason: {r_match.group(1).replace('_', ' ') if r_match else 'N/A'})"
-            lb.insert(tk.END, f"{fname} ({dt.strftime('%Y-%m-%d %H:%M:%S')}{r_disp})")
+        def fill_listbox():
+            _, pinned = self.settings_manager.load_retention_state()
+            lb.delete(0, tk.END)
+            for fname, dt in backups:
+                reason = parse_backup_name(fname)[1]
+                r_disp = f" (Reason: {reason.replace('_', ' ') if reason else 'N/A'})"
+                lb.insert(tk.END, f"{fname} ({dt.strftime('%Y-%m-%d %H:%M:%S')}{r_disp}){' [WORLD]' if self.settings_manager.has_save_snapshot(fname) else ''}{' [PINNED]' if fname in pinned else ''}")
+        fill_listbox()
         lb.pack(side="left", fill="both", expand=True); scroll.pack(side="right", fill="y")
+        pending_preview = [None]
+        def update_preview():
+            # Runs once the selection settles; parsed backups and subtree hashes come from the manager's LRU cache.
+            pending_preview[0] = None
+            if not restore_win.winfo_exists(): return
+            names = [lb.get(i).split(" ")[0] for i in lb.curselection()[:2]]
+            if not names: text = ""
+            else:
+                older, newer = (names[1], names[0]) if len(names) == 2 else (names[0], None) # Listbox is newest first
+                live, live_label = None, "current settings, including unsaved edits"
+                if newer is None:
+                    try: live = self._settings_with_gui_edits() # What the restore would overwrite
+                    except ValueError: live_label = "current settings (last loaded/saved; some unsaved edits are invalid)"
+                diffs = self.settings_manager.compare_backups(older, newer, live)
+                header = f"{older}\n  -> {newer or live_label}\n\n"
+                text = header + (format_settings_diff(diffs) if diffs is not None else "Could not parse backup.")
+            preview_box.config(state=tk.NORMAL); preview_box.delete("1.0", tk.END); preview_box.insert(tk.END, text); preview_box.config(state=tk.DISABLED)
+        def schedule_preview(event=None):
+            if pending_preview[0]: restore_win.after_cancel(pending_preview[0])
+            pending_preview[0] = restore_win.after(60, update_preview)
+        lb.bind("<<ListboxSelect>>", schedule_preview)
         def on_restore():
             sel = lb.curselection()
             if not sel: messagebox.showwarning("No Selection", "Please select a backup.", parent=restore_win); return
             fname = lb.get(sel[0]).split(" ")[0]
-            if messagebox.askyesno("Confirm Restore", f"Restore from:\n{fname}?\nCurrent settings backed up first.", parent=restore_win):
-                if self.settings_manager.restore_from_backup_file(fname):
-                    self._refresh_notebook_and_vars(); 
-                    self.status_var.set(f"Restored from {fname}."); self.mark_settings_changed() 
+            with_world = world_var.get() and self.settings_manager.has_save_snapshot(fname)
+            if messagebox.askyesno("Confirm Restore", f"Restore {'settings and world save' if with_world else 'settings'} from:\n{fname}?\nCurrent {'settings and world are' if with_world else 'settings are'} backed up first.", parent=restore_win):
                 restore_win.destroy()
+                if not with_world:
+                    if self.settings_manager.restore_from_backup_file(fname):
+                        self._refresh_notebook_and_vars(); 
+                        self.status_var.set(f"Restored from {fname}."); self.mark_settings_changed() 
+                else: self._restore_with_world_gui(fname)
+        def on_toggle_pin():
+            sel = lb.curselection()
+            if not sel: messagebox.showwarning("No Selection", "Please select a backup.", parent=restore_win); return
+            fname = lb.get(sel[0]).split(" ")[0]
+            _, pinned = self.settings_manager.load_retention_state()
+            if self.settings_manager.set_backup_pinned(fname, fname not in pinned):
+                fill_listbox(); lb.selection_set(sel[0]); lb.see(sel[0]); schedule_preview()
+                self.status_var.set(f"{'Unpinned' if fname in pinned else 'Pinned'} backup {fname}.")
         btn_frame = ttk.Frame(restore_win); btn_frame.pack(pady=10)
+        world_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(btn_frame, text="Also restore world save [WORLD]", variable=world_var).pack(side="left", padx=5)
         ttk.Button(btn_frame, text="Restore Selected", command=on_restore).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Pin/Unpin Selected", command=on_toggle_pin).pack(side="left", padx=5)
         ttk.Button(btn_frame, text="Cancel", command=restore_win.destroy).pack(side="left", padx=5)
 
+    def _restore_with_world_gui(self, fname):
+        # Same steps as SettingsManager.restore_from_backup_file, but snapshotting and restoring the (possibly
+        # multi-GB) world run through _run_in_background so the editor stays responsive.
+        manager = self.settings_manager
+        self.status_var.set("Backing up current settings and world save...")
+        def on_world_restored(ok):
+            manager._schedule_backup_eviction()
+            if ok: manager._log(f"Restored '{fname}' (config and world)."); self.status_var.set(f"Restored settings and world from {fname}."); messagebox.showinfo("Restore Success", f"Restored from '{fname}'.")
+            else: self.status_var.set("World restore failed."); messagebox.showwarning("Restore Warning", f"Settings restored from '{fname}', but the world save could not be restored.")
+        def on_prepared(prepared):
+            pre_restore_backup, world_snapshot_ok = prepared or (False, False)
+            if not pre_restore_backup: self.status_var.set("Restore cancelled."); messagebox.showwarning("Backup Failed", "Restore cancelled: backup of current settings failed."); return
+            if not world_snapshot_ok and not messagebox.askyesno("World Snapshot Failed", "Could not snapshot the current world first. Restore anyway?"):
+                self.status_var.set("Restore cancelled."); manager._schedule_backup_eviction(); return
+            try: restored = manager.restore_config_from_backup(fname, pre_restore_backup)
+            except Exception as e: manager._log(f"Error restoring: {e}", "ERROR"); restored = None; messagebox.showerror("Restore Error", f"Failed: {e}")
+            if restored is False: messagebox.showerror("Restore Error", "Failed to load settings after restoring.")
+            if not restored: self.status_var.set("Restore failed."); manager._schedule_backup_eviction(); return
+            self._refresh_notebook_and_vars(); self.mark_settings_changed()
+            self.status_var.set(f"Settings restored from {fname}. Restoring world save...")
+            self._run_in_background(self.root, lambda: manager.restore_save_snapshot(fname), on_world_restored)
+        self._run_in_background(self.root, lambda: manager.backup_before_restore(fname, with_world=True), on_prepared)
+
+    def backup_retention_gui(self):
+        ret_win = tk.Toplevel(self.root); ret_win.title("Backup Retention"); ret_win.geometry("750x500"); ret_win.transient(self.root); ret_win.grab_set()
+        policy, pinned = self.settings_manager.load_retention_state()
+        policy_frame = ttk.LabelFrame(ret_win, text="Retention Policy (0 disables a rule; pinned backups never expire)", padding="10")
+        policy_frame.pack(fill="x", padx=10, pady=(10,5))
+        policy_labels = {"keep_last": "Keep Last N", "keep_daily": "Daily Backups", "keep_weekly": "Weekly Backups",
+                         "keep_monthly": "Monthly Backups", "max_total_bytes": "Max Total Bytes"}
+        policy_vars = {}
+        for col, (key, label_text) in enumerate(policy_labels.items()):
+            ttk.Label(policy_frame, text=label_text + ":").grid(row=0, column=col, sticky="w", padx=5)
+            policy_vars[key] = tk.StringVar(value=str(policy[key]))
+            ttk.Entry(policy_frame, textvariable=policy_vars[key], width=12).grid(row=1, column=col, sticky="w", padx=5)
+        report_box = scrolledtext.ScrolledText(ret_win, wrap=tk.NONE, height=20)
+        report_box.pack(fill="both", expand=True, padx=10, pady=5)
+        def show_report(kept, evicted, header):
+            report_box.config(state=tk.NORMAL); report_box.delete("1.0", tk.END)
+            report_box.insert(tk.END, header + "\n" + self.settings_manager.format_retention_report(kept, evicted)); report_box.config(state=tk.DISABLED)
+        def on_save_policy():
+            new_policy = {}
+            for key, var in policy_vars.items():
+                try: new_policy[key] = int(var.get()); assert new_policy[key] >= 0
+                except (ValueError, AssertionError): messagebox.showerror("Input Error", f"{policy_labels[key]} must be a whole number >= 0.", parent=ret_win); return
+            if self.settings_manager.save_retention_state(new_policy, self.settings_manager.load_retention_state()[1]):
+                show_report(*self.settings_manager.evict_old_backups(dry_run=True), "Policy saved. Dry run:")
+        def on_evict_now():
+            if messagebox.askyesno("Evict Backups", "Delete all backups marked EVICT?", parent=ret_win):
+                show_report(*self.settings_manager.evict_old_backups(), "Eviction complete. Result:")
+                self.status_var.set("Backup eviction complete.")
+        btn_frame = ttk.Frame(ret_win); btn_frame.pack(pady=10)
+        ttk.Button(btn_frame, text="Save Policy", command=on_save_policy).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Evict Now", command=on_evict_now).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Close", command=ret_win.destroy).pack(side="left", padx=5)
+        enabled = self.settings_manager.retention_policy_enabled()
+        show_report(*self.settings_manager.evict_old_backups(dry_run=True),
+                    f"Dry run ({len(pinned)} pinned):" if enabled else f"No policy saved yet, so nothing is evicted automatically. Dry run of the suggested policy ({len(pinned)} pinned):")
+
+    def _run_in_background(self, owner, func, on_done, poll_ms=50):
+        # Runs func() on a worker thread and hands its result to on_done on the Tk thread while owner is alive.
+        result = {}
+        def worker():
+            try: result["value"] = func()
+            except Exception as e: result["error"] = e
+        thread = threading.Thread(target=worker, daemon=True); thread.start()
+        def check():
+            if not owner.winfo_exists(): return
+            if thread.is_alive(): owner.after(poll_ms, check); return
+            if "error" in result: self.settings_manager._log(f"Background task failed: {result['error']}", "ERROR"); on_done(None)
+            else: on_done(result["value"])
+        owner.after(poll_ms, check)
+
+    def fleet_query_gui(self):
+        try: store = FleetStore(FLEET_DB_FILE, log=self.settings_manager._log)
+        except (RuntimeError, OSError) as e: messagebox.showerror("Fleet Settings Query", str(e)); return
+        fleet_win = tk.Toplevel(self.root); fleet_win.title(f"Fleet Settings Query - {os.path.abspath(FLEET_DB_FILE)}"); fleet_win.geometry("950x550")
+        ingest_frame = ttk.Frame(fleet_win, padding="5"); ingest_frame.pack(fill="x")
+        status_var = tk.StringVar(value="Ingest server folders, then query. Only changed files are re-read.")
+        def ingest(roots):
+            status_var.set(f"Ingesting {', '.join(roots)}...")
+            def on_done(stats):
+                if stats is None: status_var.set("Ingest failed. See the log."); return
+                status_var.set(f"Ingest: {stats['ingested']} ingested, {stats['unchanged']} unchanged, {stats['removed']} removed, {stats['failed']} failed.")
+            self._run_in_background(fleet_win, lambda: store.ingest(roots), on_done)
+        def ingest_folder():
+            folder = filedialog.askdirectory(title="Server folder containing enshrouded_server.json", parent=fleet_win)
+            if folder: ingest({os.path.basename(os.path.normpath(folder)): folder})
+        current_root = os.path.abspath(self.settings_manager.root_dir or ".")
+        ttk.Button(ingest_frame, text="Ingest This Server", command=lambda: ingest({os.path.basename(current_root): current_root})).pack(side="left")
+        ttk.Button(ingest_frame, text="Ingest Server Folder...", command=ingest_folder).pack(side="left", padx=5)
+        ttk.Label(ingest_frame, textvariable=status_var).pack(side="left", padx=10)
+
+        query_frame = ttk.Frame(fleet_win, padding="5"); query_frame.pack(fill="x")
+        query_var = tk.StringVar(value="gameSettings.enemyDamageFactor > 2"); history_var = tk.BooleanVar(value=False)
+        query_entry = ttk.Entry(query_frame, textvariable=query_var, width=60); query_entry.pack(side="left")
+        ttk.Checkbutton(query_frame, text="Include backup history", variable=history_var).pack(side="left", padx=5)
+        ttk.Button(query_frame, text="Query", command=lambda: run_query()).pack(side="left", padx=5)
+        ToolTip(query_entry, "path, or path OP value with OP one of = != > >= < <= ~ (contains).\nExamples: gameSettings.enemyDamageFactor > 2, userGroups[Admin].password = AdminPassword")
+
+        columns = ("server", "kind", "taken_at", "setting", "value")
+        table_frame = ttk.Frame(fleet_win); table_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        tree = ttk.Treeview(table_frame, columns=columns, show="headings")
+        for col, width in zip(columns, (140, 70, 150, 300, 220)): tree.heading(col, text=col.replace("_", " ").title()); tree.column(col, width=width, anchor="w")
+        tree_scroll = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview); tree.configure(yscrollcommand=tree_scroll.set)
+        tree.pack(side="left", fill="both", expand=True); tree_scroll.pack(side="right", fill="y")
+
+        def run_query():
+            try:
+                start = time.perf_counter(); results = store.query(query_var.get(), include_history=history_var.get())
+            except (ValueError, sqlite3.Error) as e: status_var.set(f"Query failed: {e}"); return
+            tree.delete(*tree.get_children())
+            for r in results: tree.insert("", "end", values=(r["server"], r["kind"], r["taken_at"], r["setting"], json.dumps(r["value"])))
+            status_var.set(f"{len(results)} match(es) in {(time.perf_counter() - start) * 1000:.1f} ms{' (limit reached)' if len(results) >= FLEET_QUERY_LIMIT else ''}.")
+        query_entry.bind("<Return>", lambda e: run_query())
+
+    def log_viewer_gui(self):
+        log_dir = self.settings_manager.resolve_path(self.settings_manager.get_setting_value(["logDirectory"], "./logs"))
+        if not os.path.isdir(log_dir): messagebox.showinfo("Server Logs", f"Log directory '{log_dir}' not found."); return
+        try: log_files = sorted((e.path for e in os.scandir(log_dir) if e.is_file() and e.name.lower().endswith(LOG_FILE_EXTENSIONS)), key=os.path.getmtime, reverse=True)
+        except OSError as e: messagebox.showerror("Server Logs", f"Could not list '{log_dir}': {e}"); return
+        if not log_files: messagebox.showinfo("Server Logs", f"No log files found in '{log_dir}'."); return
+
+        log_win = tk.Toplevel(self.root); log_win.title(f"Server Logs - {log_dir}"); log_win.geometry("1000x650")
+        top_frame = ttk.Frame(log_win, padding="5"); top_frame.pack(fill="x")
+        file_var = tk.StringVar(value=log_files[0]); follow_var = tk.BooleanVar(value=True); index_status = tk.StringVar()
+        ttk.Label(top_frame, text="Log File:").pack(side="left")
+        file_cb = ttk.Combobox(top_frame, textvariable=file_var, values=log_files, state="readonly", width=60); file_cb.pack(side="left", padx=5)
+        ttk.Checkbutton(top_frame, text="Follow", variable=follow_var, command=lambda: open_file() if follow_var.get() else None).pack(side="left", padx=5)
+        ttk.Label(top_frame, textvariable=index_status).pack(side="right")
+
+        search_frame = ttk.Frame(log_win, padding="5"); search_frame.pack(fill="x")
+        query_var = tk.StringVar()
+        query_entry = ttk.Entry(search_frame, textvariable=query_var, width=40); query_entry.pack(side="left")
+        ttk.Button(search_frame, text="Search", command=lambda: run_search(query_var.get())).pack(side="left", padx=5)
+        for kind in LOG_EVENT_PATTERNS: ttk.Button(search_frame, text=kind, command=lambda k=kind: run_search(k)).pack(side="left", padx=2)
+        query_entry.bind("<Return>", lambda e: run_search(query_var.get()))
+
+        panes = ttk.PanedWindow(log_win, orient=tk.VERTICAL); panes.pack(fill="both", expand=True, padx=5, pady=5)
+        log_text = scrolledtext.ScrolledText(panes, wrap=tk.NONE, height=25, state=tk.DISABLED); panes.add(log_text, weight=3)
+        results_frame = ttk.Frame(panes); panes.add(results_frame, weight=1)
+        results_lb = tk.Listbox(results_frame, height=8); results_scroll = ttk.Scrollbar(results_frame, orient="vertical", command=results_lb.yview)
+        results_lb.configure(yscrollcommand=results_scroll.set)
+        results_lb.pack(side="left", fill="both", expand=True); results_scroll.pack(side="right", fill="y")
+        state = {"index": None, "offset": 0, "indexing": False, "results": []}
+
+        def set_log_text(text, append=False):
+            log_text.config(state=tk.NORMAL)
+            if not append: log_text.delete("1.0", tk.END)
+            log_text.insert(tk.END, text)
+            extra_lines = int(log_text.index("end-1c").split(".")[0]) - LOG_VIEWER_MAX_LINES
+            if extra_lines > 0: log_text.delete("1.0", f"{extra_lines + 1}.0")
+            log_text.config(state=tk.DISABLED)
+
+        def start_indexing():
+            index = state["index"]
+            if state["indexing"] or index is None: return
+            state["indexing"] = True; index_status.set("Indexing...")
+            def on_indexed(_):
+                state["indexing"] = False
+                if state["index"] is index: index_status.set(f"Indexed {index.line_count:,} lines")
+            self._run_in_background(log_win, index.update, on_indexed)
+
+        def open_file(event=None):
+            path = file_var.get()
+            if state["index"] is None or state["index"].filepath != path: # Result line numbers only mean something in their own file
+                state["results"] = []; results_lb.delete(0, tk.END)
+            state["index"] = self.log_indexes.setdefault(path, LogFileIndex(path)); state["indexing"] = False
+            try: text, state["offset"] = state["index"].read_new_bytes(0)
+            except OSError as e: set_log_text(f"Could not read '{path}': {e}"); return
+            set_log_text(text); log_text.see(tk.END); start_indexing()
+
+        def poll():
+            if not log_win.winfo_exists(): return
+            if follow_var.get() and state["index"] is not None:
+                try: text, state["offset"] = state["index"].read_new_bytes(state["offset"])
+                except OSError: text = ""
+                if text: set_log_text(text, append=True); log_text.see(tk.END); start_indexing()
+            log_win.after(LOG_VIEWER_POLL_MS, poll)
+
+        def run_search(query):
+            index = state["index"]
+            if index is None or not query.strip(): return
+            index_status.set(f"Searching '{query}'...")
+            def on_results(results):
+                if state["index"] is not index: return # The user switched files while searching
+                results = results or []; state["results"] = results; results_lb.delete(0, tk.END)
+                for line_no, line in results: results_lb.insert(tk.END, f"{line_no + 1}: {line[:300]}")
+                index_status.set(f"{len(results)} match(es) for '{query}' (indexed {index.line_count:,} lines)")
+            self._run_in_background(log_win, lambda: index.search(query), on_results)
+
+        def on_result_select(event=None):
+            sel = results_lb.curselection()
+            if not sel or state["index"] is None: return
+            line_no = state["results"][sel[0]][0]; follow_var.set(False)
+            context = state["index"].read_lines(max(0, line_no - 20), 41)
+            set_log_text("\n".join(f"{n + 1}: {line}" for n, line in context))
+            log_text.tag_remove("hit", "1.0", tk.END)
+            hit_row = line_no - context[0][0] + 1 if context else 1
+            log_text.tag_add("hit", f"{hit_row}.0", f"{hit_row}.end"); log_text.tag_config("hit", background="lightyellow"); log_text.see(f"{hit_row}.0")
+            stamp = state["index"].timestamp_near(line_no)
+            if stamp: index_status.set(f"Line {line_no + 1} (near {stamp})")
+
+        file_cb.bind("<<ComboboxSelected>>", open_file); results_lb.bind("<<ListboxSelect>>", on_result_select)
+        open_file(); log_win.after(LOG_VIEWER_POLL_MS, poll)
+
+# --- Settings API Server ---
+class SettingsApiServer:
+    # Minimal HTTP/1.1 JSON API over SettingsManager for one or more server roots. Disk work runs in worker
+    # threads so the event loop never blocks; writes to a root are serialized by its asyncio.Lock while reads
+    # go straight to the file and never create or rewrite it. ETags are content hashes of enshrouded_server.json;
+    # If-Match guards writes and If-None-Match makes GETs conditional.
+    REASONS = {200: "OK", 201: "Created", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               409: "Conflict", 412: "Precondition Failed", 413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+    def __init__(self, roots, host=API_DEFAULT_HOST, port=API_DEFAULT_PORT):
+        self.roots = {name: os.path.abspath(path) for name, path in roots.items()}
+        self.host = host; self.port = port
+        self._managers = {}; self._readers = {}; self._locks = {}
+
+    async def serve_forever(self):
+        self._locks = {name: asyncio.Lock() for name in self.roots}
+        server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        log_message_gui(f"Settings API listening on http://{self.host}:{self.port} for root(s): {', '.join(self.roots)}")
+        async with server: await server.serve_forever()
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), API_IDLE_TIMEOUT)
+                if not request_line: break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""): break
+                    key, _, value = line.decode("latin-1").partition(":"); headers[key.strip().lower()] = value.strip()
+                try: method, target, version = request_line.decode("latin-1").split()
+                except ValueError: await self._respond(writer, 400, {"error": "malformed request line"}, keep_alive=False); break
+                try: length = int(headers.get("content-length") or 0)
+                except ValueError: length = -1
+                if length < 0: await self._respond(writer, 400, {"error": "invalid Content-Length"}, keep_alive=False); break
+                if length > API_MAX_BODY_BYTES: await self._respond(writer, 413, {"error": "request body too large"}, keep_alive=False); break
+                body = await reader.readexactly(length) if length else b""
+                try: status, payload, etag = await self._dispatch(method.upper(), target.split("?", 1)[0], headers, body)
+                except Exception as e:
+                    log_message_gui(f"Settings API error on {method} {target}: {e}", "ERROR"); status, payload, etag = 500, {"error": str(e)}, None
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, etag, keep_alive)
+                if not keep_alive: break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError): pass
+        finally:
+            writer.close()
+            try: await writer.wait_closed()
+            except ConnectionError: pass
+
+    async def _respond(self, writer, status, payload, etag=None, keep_alive=True):
+        body = b"" if status == 304 else json.dumps(payload, indent=2).encode("utf-8") # 304 never carries a body
+        head = [f"HTTP/1.1 {status} {self.REASONS.get(status, '')}"] + (["Content-Type: application/json", f"Content-Length: {len(body)}"] if status != 304 else [])
+        head.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        if etag: head.append(f"ETag: {etag}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, method, path, headers, body):
+        parts = [p for p in path.split("/") if p]
+        if parts == ["roots"] and method == "GET": return 200, {"roots": sorted(self.roots)}, None
+        if len(parts) != 3 or parts[0] != "roots": return 404, {"error": f"no such endpoint: {path}"}, None
+        name, resource = parts[1], parts[2]
+        if name not in self.roots: return 404, {"error": f"unknown server root '{name}'"}, None
+        try: data = json.loads(body) if body.strip() else None
+        except json.JSONDecodeError as e: return 400, {"error": f"invalid JSON body: {e}"}, None
+        if_match = headers.get("if-match")
+        routes = {("settings", "GET"): lambda n, d, m: self._get_settings(n, headers.get("if-none-match")),
+                  ("settings", "PATCH"): self._patch_settings, ("validate", "POST"): self._validate, ("backups", "GET"): self._list_backups,
+                  ("backups", "POST"): self._create_backup, ("restore", "POST"): self._restore}
+        handler = routes.get((resource, method))
+        if handler is None:
+            if any(r == resource for r, _ in routes): return 405, {"error": f"{method} not allowed on {resource}"}, None
+            return 404, {"error": f"no such endpoint: {path}"}, None
+        return await handler(name, data, if_match)
+
+    async def _manager(self, name):
+        # Managers are created on first use (readme parsing, migration) and reused; callers hold the root's lock.
+        # Returns None when the root has no config: the API never creates one with default passwords.
+        if name not in self._managers:
+            if not await asyncio.to_thread(os.path.exists, os.path.join(self.roots[name], JSON_FILE)): return None
+            self._managers[name] = await asyncio.to_thread(SettingsManager, None, self.roots[name], False)
+        return self._managers[name]
+
+    async def _reader(self, name):
+        # For reads: a load=False manager only knows the paths, backups and readme defaults, so a GET can
+        # neither create a missing config nor migrate an existing one. Settings are read straight from the file.
+        if name not in self._readers:
+            def make():
+                manager = SettingsManager(None, self.roots[name], False, load=False); manager.load_readme_defaults()
+                return manager
+            self._readers[name] = await asyncio.to_thread(make)
+        return self._readers[name]
+
+    @staticmethod
+    def _missing(name): return 404, {"error": f"'{JSON_FILE}' not found in root '{name}'"}, None
+
+    @staticmethod
+    def _read_config(json_path):
+        with open(json_path, "rb") as f: raw = f.read()
+        return json.loads(raw), f'"{hashlib.sha256(raw).hexdigest()[:32]}"'
+
+    @staticmethod
+    def _etag(manager): return f'"{manager.loaded_sha256[:32]}"' if manager.loaded_sha256 else None
+
+    async def _get_settings(self, name, if_none_match):
+        manager = await self._reader(name)
+        try: settings, etag = await asyncio.to_thread(self._read_config, manager.json_path)
+        except FileNotFoundError: return self._missing(name)
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]: return 304, None, etag
+        return 200, settings, etag
+
+    async def _patch_settings(self, name, data, if_match):
+        # Body: {"dotted.path": value, ...} with numeric list indices (e.g. "userGroups.0.password"), or an
+        # RFC 6902 JSON Patch list, which is applied all-or-nothing.
+        if isinstance(data, list):
+            try: compiled = compile_json_patch(data)
+            except ValueError as e: return 400, {"error": str(e)}, None
+        elif not isinstance(data, dict) or not data: return 400, {"error": "body must be a JSON patch or a non-empty object of path -> value"}, None
+        else: changes = [([int(k) if k.isdigit() else k for k in dotted.split(".")], value) for dotted, value in data.items()]
+        async with self._locks[name]:
+            manager = await self._manager(name)
+            if manager is None: return self._missing(name)
+            def apply():
+                if not manager.reload_settings(): return 500, {"error": f"could not read '{JSON_FILE}'"}, None
+                etag = self._etag(manager)
+                if if_match and if_match != etag: return 412, {"error": "settings changed since they were read"}, etag
+                before = validate_settings(manager.settings, manager.readme_defaults)
+                if isinstance(data, list):
+                    try: manager.apply_json_patch(compiled)
+                    except ValueError as e: return 409, {"error": str(e)}, etag
+                else:
+                    for path_keys, value in changes: manager.set_setting_value(path_keys, value)
+                new_errors = [e for e in validate_settings(manager.settings, manager.readme_defaults) if e not in before]
+                if new_errors: return 422, {"errors": [{"path": path_to_str(p), "error": m} for p, m in new_errors]}, etag
+                if not manager.save_all_settings(): return 500, {"error": "could not save settings (see server log)"}, etag
+                return 200, manager.settings, self._etag(manager)
+            return await asyncio.to_thread(apply)
+
+    async def _validate(self, name, data, if_match):
+        # Validates the posted settings, or the config on disk when the body is empty.
+        manager = await self._reader(name)
+        if data is None:
+            try: data, _ = await asyncio.to_thread(self._read_config, manager.json_path)
+            except FileNotFoundError: return self._missing(name)
+        errors = validate_settings(data, manager.readme_defaults)
+        return 200, {"valid": not errors, "errors": [{"path": path_to_str(p), "error": m} for p, m in errors]}, None
+
+    async def _list_backups(self, name, data, if_match):
+        manager = await self._reader(name)
+        def collect():
+            _, pinned = manager.load_retention_state()
+            return [{"backup": f, "created": dt.isoformat(timespec="seconds") if dt != datetime.min else None,
+                     "pinned": f in pinned, "world_snapshot": manager.has_save_snapshot(f)} for f, dt in manager.list_backup_files()]
+        return 200, {"backups": await asyncio.to_thread(collect)}, None
+
+    async def _create_backup(self, name, data, if_match):
+        async with self._locks[name]:
+            manager = await self._manager(name)
+            if manager is None: return self._missing(name)
+            backup_path = await asyncio.to_thread(manager.backup_file, manager.json_path, "api_backup")
+        if not backup_path: return 500, {"error": "backup failed"}, None
+        return 201, {"backup": os.path.basename(backup_path)}, None
+
+    async def _restore(self, name, data, if_match):
+        backup = data.get("backup") if isinstance(data, dict) else None
+        if not isinstance(backup, str) or os.path.basename(backup) != backup: return 400, {"error": "body must name a backup file: {\"backup\": ...}"}, None
+        async with self._locks[name]:
+            manager = await self._manager(name)
+            if manager is None: return self._missing(name)
+            def restore():
+                if not manager.reload_settings(): return 500, {"error": f"could not read '{JSON_FILE}'"}, None
+                etag = self._etag(manager)
+                if if_match and if_match != etag: return 412, {"error": "settings changed since they were read"}, etag
+                if backup not in {f for f, _ in manager.list_backup_files()}: return 404, {"error": f"unknown backup '{backup}'"}, etag
+                if not manager.restore_from_backup_file(backup, restore_world=bool(data.get("restore_world"))): return 500, {"error": "restore failed"}, etag
+                return 200, manager.settings, self._etag(manager)
+            return await asyncio.to_thread(restore)
+
+def serve_settings_api(roots, host=API_DEFAULT_HOST, port=API_DEFAULT_PORT):
+    try: asyncio.run(SettingsApiServer(roots, host, port).serve_forever())
+    except KeyboardInterrupt: log_message_gui("Settings API stopped.")
+    except OSError as e: log_message_gui(f"Settings API could not start: {e}", "ERROR"); return 1
+    return 0
+
+# --- Server Supervisor ---
+def parse_restart_window(text):
+    # "04:00-06:30" -> ((4, 0), (6, 30)); windows may wrap past midnight.
+    match = re.match(r"^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$", text or "")
+    if not match: raise ValueError(f"Invalid restart window '{text}': use HH:MM-HH:MM")
+    start, end = (int(match.group(1)), int(match.group(2))), (int(match.group(3)), int(match.group(4)))
+    if not all(h < 24 and m < 60 for h, m in (start, end)): raise ValueError(f"Invalid restart window '{text}'")
+    return start, end
+
+def in_restart_window(windows, now):
+    if not windows: return True
+    current = (now.hour, now.minute)
+    return any(start <= current < end if start <= end else (current >= start or current < end) for start, end in windows)
+
+class ProcSampler:
+    # CPU% and RSS of one process from /proc (Linux); sample() returns None where /proc is unavailable.
+    def __init__(self):
+        self.available = os.path.isdir("/proc/self")
+        self.clock_ticks = os.sysconf("SC_CLK_TCK") if self.available else 100
+        self.page_size = os.sysconf("SC_PAGE_SIZE") if self.available else 4096
+        self._last = {} # pid -> (cpu_ticks, monotonic)
+
+    def sample(self, pid):
+        if not self.available: return None
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f: stat = f.read().decode("ascii", "replace")
+            with open(f"/proc/{pid}/statm", "rb") as f: rss_pages = int(f.read().split()[1])
+        except (OSError, ValueError, IndexError): return None
+        fields = stat[stat.rfind(")") + 2:].split() # The command name may contain spaces
+        ticks, now = int(fields[11]) + int(fields[12]), time.monotonic() # utime + stime
+        last = self._last.get(pid); self._last = {pid: (ticks, now)}
+        cpu = round((ticks - last[0]) / self.clock_ticks / (now - last[1]) * 100, 1) if last and now > last[1] else None
+        return {"t": datetime.now().isoformat(timespec="seconds"), "pid": pid, "cpu_percent": cpu, "rss_bytes": rss_pages * self.page_size}
+
+class ServerSupervisor:
+    # Runs the dedicated server command, watches enshrouded_server.json, and restarts only when a semantic diff
+    # touches a path outside the exempt set. Restarts wait for a restart window with no recent player joins
+    # (from the log index); crashes restart immediately with backoff. CPU/RSS samples and restart downtime
+    # go into rolling buffers that are written to SUPERVISOR_METRICS_FILE.
+    def __init__(self, root_dir, server_cmd, restart_windows=(), quiet_minutes=SUPERVISOR_DEFAULT_QUIET_MINUTES, exempt_paths=()):
+        self.root_dir = os.path.abspath(root_dir)
+        self.json_path = os.path.join(self.root_dir, JSON_FILE)
+        self.server_cmd = shlex.split(server_cmd) if isinstance(server_cmd, str) else list(server_cmd)
+        self.restart_windows = [parse_restart_window(w) if isinstance(w, str) else w for w in restart_windows]
+        self.quiet_seconds = quiet_minutes * 60
+        self.exempt_paths = SUPERVISOR_RESTART_EXEMPT_PATHS | {tuple(p) for p in exempt_paths}
+        self.process = None; self.running_settings = None; self.config_stat = None
+        self.pending_changes = [] # Changed paths waiting for a restart window
+        self.samples = deque(maxlen=SUPERVISOR_METRICS_SAMPLES); self.restarts = deque(maxlen=SUPERVISOR_METRICS_SAMPLES)
+        self.sampler = ProcSampler(); self.crash_count = 0; self.crash_streak = 0; self.started_at = None
+        self.log_index = None; self._join_count = 0; self.last_join = None # monotonic time of the last observed join
+        self._stop = threading.Event()
+
+    def stop(self): self._stop.set()
+
+    # --- Process control ---
+    def _start_server(self):
+        self.process = subprocess.Popen(self.server_cmd, cwd=self.root_dir); self.started_at = time.monotonic()
+        log_message_gui(f"Supervisor: started server (pid {self.process.pid}): {' '.join(self.server_cmd)}")
+
+    def _stop_server(self):
+        if not self.process or self.process.poll() is not None: return
+        self.process.terminate()
+        try: self.process.wait(timeout=SUPERVISOR_STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            log_message_gui(f"Supervisor: server did not stop within {SUPERVISOR_STOP_TIMEOUT}s, killing it.", "WARNING")
+            self.process.kill(); self.process.wait()
+
+    def _restart_server(self, reason, changed_paths=(), down_since=None):
+        started = down_since or time.monotonic() # Crash downtime counts from when the exit was noticed
+        self._stop_server(); self._start_server()
+        downtime = round(time.monotonic() - started, 3)
+        self.running_settings = self._read_config() or self.running_settings; self.pending_changes = [] # The new process reads the current file
+        self.restarts.append({"t": datetime.now().isoformat(timespec="seconds"), "reason": reason, "downtime_s": downtime,
+                              "changed_paths": [path_to_str(p) for p in changed_paths]})
+        log_message_gui(f"Supervisor: restarted server ({reason}); downtime {downtime}s.")
+
+    # --- Config changes ---
+    def _read_config(self):
+        try:
+            with open(self.json_path, "r", encoding="utf-8") as f: return json.load(f)
+        except (OSError, ValueError) as e: log_message_gui(f"Supervisor: cannot read '{self.json_path}': {e}", "WARNING"); return None
+
+    def restart_paths(self, old, new):
+        # Paths whose change needs a restart. Formatting, key order and 1 vs 1.0 never do; exempt paths never do.
+        changed = {path for path, _, _, _ in diff_settings(old, new, compute_subtree_hashes(old), compute_subtree_hashes(new))}
+        return sorted((p for p in changed if not any(p[:len(e)] == e for e in self.exempt_paths)), key=path_to_str)
+
+    def _check_config(self):
+        try: st = os.stat(self.json_path); stat_key = (st.st_size, st.st_mtime_ns)
+        except OSError: return
+        if stat_key == self.config_stat: return
+        self.config_stat = stat_key
+        new_settings = self._read_config()
+        if new_settings is None or self.running_settings is None: return
+        was_pending, self.pending_changes = self.pending_changes, self.restart_paths(self.running_settings, new_settings) # Relative to what runs, so a revert cancels
+        if not self.pending_changes:
+            self.running_settings = new_settings
+            log_message_gui(f"Supervisor: config changed, {'pending restart cancelled' if was_pending else 'no restart needed'}."); return
+        log_message_gui(f"Supervisor: restart pending for {len(self.pending_changes)} changed setting(s): {', '.join(map(path_to_str, self.pending_changes[:10]))}")
+
+    # --- Player activity ---
+    def _update_player_activity(self):
+        log_dir = str((self.running_settings or {}).get("logDirectory") or "")
+        log_dir = os.path.join(self.root_dir, log_dir) if log_dir and not os.path.isabs(log_dir) else log_dir
+        try: newest = max((e.path for e in os.scandir(log_dir) if e.is_file() and e.name.lower().endswith(LOG_FILE_EXTENSIONS)), key=os.path.getmtime)
+        except (OSError, ValueError): return
+        if self.log_index is None or self.log_index.filepath != newest:
+            log_index = LogFileIndex(newest)
+            try: log_index.update() # Joins before we started watching don't count
+            except OSError: return # Rotated or deleted since the scan; retried on the next tick
+            self.log_index = log_index; self._join_count = len(log_index.events["Player Joins"]); return
+        try: self.log_index.update()
+        except OSError: return
+        joins = len(self.log_index.events["Player Joins"])
+        if joins > self._join_count: self.last_join = time.monotonic()
+        self._join_count = joins
+
+    def restart_allowed(self):
+        if not in_restart_window(self.restart_windows, datetime.now()): return False
+        return self.last_join is None or time.monotonic() - self.last_join >= self.quiet_seconds
+
+    # --- Metrics ---
+    def write_metrics(self):
+        downtimes = [r["downtime_s"] for r in self.restarts]
+        metrics = {"updated": datetime.now().isoformat(timespec="seconds"), "pid": self.process.pid if self.process else None,
+                   "pending_restart_paths": [path_to_str(p) for p in self.pending_changes], "crashes": self.crash_count,
+                   "total_restart_downtime_s": round(sum(downtimes), 3), "restarts": list(self.restarts), "samples": list(self.samples)}
+        try: write_json_atomic(metrics, os.path.join(self.root_dir, SUPERVISOR_METRICS_FILE))
+        except OSError as e: log_message_gui(f"Supervisor: could not write metrics: {e}", "WARNING")
+
+    def run(self):
+        self.running_settings = self._read_config()
+        try: st = os.stat(self.json_path); self.config_stat = (st.st_size, st.st_mtime_ns)
+        except OSError: pass
+        self._start_server()
+        next_sample = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                if self.process.poll() is not None: # Crashed or exited on its own: restart now, with backoff
+                    delay = SUPERVISOR_CRASH_BACKOFF[min(self.crash_streak, len(SUPERVISOR_CRASH_BACKOFF) - 1)]
+                    log_message_gui(f"Supervisor: server exited with code {self.process.returncode}; restarting in {delay}s.", "WARNING")
+                    self.crash_count += 1; self.crash_streak += 1; exited_at = time.monotonic()
+                    if self._stop.wait(delay): break
+                    self._restart_server("exited", down_since=exited_at); continue
+                if self.crash_streak and time.monotonic() - self.started_at >= SUPERVISOR_STABLE_UPTIME: self.crash_streak = 0
+                self._check_config(); self._update_player_activity()
+                if self.pending_changes and self.restart_allowed(): self._restart_server("config change", self.pending_changes)
+                if time.monotonic() >= next_sample:
+                    sample = self.sampler.sample(self.process.pid)
+                    if sample: self.samples.append(sample)
+                    self.write_metrics(); next_sample = time.monotonic() + SUPERVISOR_SAMPLE_SECONDS
+                self._stop.wait(SUPERVISOR_POLL_SECONDS)
+        finally:
+            self._stop_server(); self.write_metrics()
+            log_message_gui("Supervisor: stopped.")
+
+def run_supervisor(root_dir, server_cmd, restart_windows=(), quiet_minutes=SUPERVISOR_DEFAULT_QUIET_MINUTES, exempt_paths=()):
+    try: supervisor = ServerSupervisor(root_dir, server_cmd, restart_windows, quiet_minutes, exempt_paths)
+    except ValueError as e: log_message_gui(str(e), "ERROR"); return 2
+    try: supervisor.run()
+    except KeyboardInterrupt: pass
+    except OSError as e: log_message_gui(f"Supervisor: could not start the server: {e}", "ERROR"); return 1
+    return 0
+
 # --- Main Execution ---
-if __name__ == "__main__":
+def parse_root_args(values):
+    # ["eu-1=/srv/eu-1", "/srv/eu-2"] -> {"eu-1": "/srv/eu-1", "eu-2": "/srv/eu-2"}
+    return dict(v.split("=", 1) if "=" in v else (os.path.basename(os.path.abspath(v)), v) for v in values)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=APP_TITLE_BASE + ". Without options, opens the editor GUI.")
+    parser.add_argument("--build-templates", metavar="MANIFEST", help="Generate per-server configs from a layered template manifest and exit.")
+    parser.add_argument("--force", action="store_true", help="With --build-templates: rewrite every server, even if its inputs are unchanged.")
+    parser.add_argument("--migrate", metavar="CONFIG", nargs="+", help="Migrate server config files to a game version (backed up to old/ first) and exit.")
+    parser.add_argument("--to-version", metavar="VERSION", help="With --migrate: target game version (default: the version in the readme).")
+    parser.add_argument("--dry-run", action="store_true", help="With --migrate or --apply-patch: report what would change without writing.")
+    parser.add_argument("--serve", action="store_true", help="Run the local JSON settings API instead of the GUI.")
+    parser.add_argument("--root", metavar="NAME=DIR", action="append", default=[], help="With --serve, --fleet-ingest, --supervise or --apply-patch: a server root (repeatable; defaults to the current directory).")
+    parser.add_argument("--host", default=API_DEFAULT_HOST, help=f"With --serve: address to bind (default: {API_DEFAULT_HOST}).")
+    parser.add_argument("--port", type=int, default=API_DEFAULT_PORT, help=f"With --serve: port to listen on (default: {API_DEFAULT_PORT}).")
+    parser.add_argument("--fleet-ingest", action="store_true", help="Ingest the --root server folders (configs and backups) into the fleet database and exit.")
+    parser.add_argument("--fleet-query", metavar="QUERY", help="Query the fleet database, e.g. \"gameSettings.enemyDamageFactor > 2\" or \"userGroups[Admin].password = AdminPassword\".")
+    parser.add_argument("--fleet-db", default=FLEET_DB_FILE, help=f"Fleet database file (default: {FLEET_DB_FILE}).")
+    parser.add_argument("--history", action="store_true", help="With --fleet-query: include backups, not just current configs.")
+    parser.add_argument("--apply-patch", metavar="PATCH", help="Apply an RFC 6902 JSON patch to each --root's config (or config file), all-or-nothing per file, and exit.")
+    parser.add_argument("--supervise", action="store_true", help="Run the dedicated server under a supervisor that restarts it only for config changes that need it.")
+    parser.add_argument("--server-cmd", metavar="COMMAND", help="With --supervise: the server command line, run in the server root.")
+    parser.add_argument("--restart-window", metavar="HH:MM-HH:MM", action="append", default=[], help="With --supervise: only restart for config changes in this window (repeatable; default: any time).")
+    parser.add_argument("--quiet-minutes", type=float, default=SUPERVISOR_DEFAULT_QUIET_MINUTES, help="With --supervise: also wait until no player has joined for this long.")
+    parser.add_argument("--no-restart-path", metavar="PATH", action="append", default=[], help="With --supervise: a dotted setting path whose changes never need a restart (repeatable).")
+    args = parser.parse_args(argv)
+    if args.apply_patch:
+        if not args.root: parser.error("--apply-patch needs at least one --root")
+        targets = [v.split("=", 1)[1] if "=" in v else v for v in args.root]
+        targets = [os.path.join(t, JSON_FILE) if os.path.isdir(t) else t for t in targets]
+        return apply_json_patch_to_files(args.apply_patch, targets, dry_run=args.dry_run)
+    if args.supervise:
+        if not args.server_cmd: parser.error("--supervise needs --server-cmd")
+        root_dir = next(iter(parse_root_args(args.root[:1]).values()), ".")
+        return run_supervisor(root_dir, args.server_cmd, args.restart_window, args.quiet_minutes, [p.split(".") for p in args.no_restart_path])
+    if args.fleet_ingest or args.fleet_query:
+        roots = parse_root_args(args.root) if args.fleet_ingest else None
+        if args.fleet_ingest and not roots: parser.error("--fleet-ingest needs at least one --root NAME=DIR")
+        return run_fleet_command(args.fleet_db, roots, args.fleet_query, args.history)
+    if args.serve:
+        roots = parse_root_args(args.root) or {"default": "."}
+        return serve_settings_api(roots, args.host, args.port)
+    if args.build_templates: return build_config_templates(args.build_templates, force=args.force)
+    if args.migrate: return migrate_config_files(args.migrate, to_version=args.to_version, dry_run=args.dry_run)
+
     root = tk.Tk()
     app = EnshroudedConfigEditorApp(root)
     root.mainloop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import json
+from datetime import datetime, timedelta
+
+import ensh_config_gui as editor
+
+NO_RULES = {"keep_last": 0, "keep_daily": 0, "keep_weekly": 0, "keep_monthly": 0, "max_total_bytes": 0}
+
+
+def make_manager(tmp_path, backups, policy=None, pinned=(), size=10):
+    manager = editor.SettingsManager(root_dir=str(tmp_path), interactive=False, load=False)
+    backup_dir = tmp_path / editor.BACKUP_DIR; backup_dir.mkdir(parents=True, exist_ok=True)
+    for dt in backups: (backup_dir / f"enshrouded_server_{dt:%Y%m%d_%H%M%S_%f}_manual.old").write_bytes(b"x" * size)
+    state = {"pinned": list(pinned)}
+    if policy is not None: state["policy"] = dict(NO_RULES, **policy)
+    (backup_dir / editor.BACKUP_RETENTION_FILE).write_text(json.dumps(state), encoding="utf-8")
+    return manager
+
+
+def name_of(dt):
+    return f"enshrouded_server_{dt:%Y%m%d_%H%M%S_%f}_manual.old"
+
+
+def kept_names(manager):
+    return [fname for fname, _, _, _ in manager.plan_backup_eviction()[0]]
+
+
+def test_daily_tier_keeps_newest_backup_per_day(tmp_path):
+    start = datetime(2025, 3, 10, 8)
+    backups = [start + timedelta(days=day, hours=hour) for day in range(4) for hour in (0, 5)]
+    manager = make_manager(tmp_path, backups, {"keep_daily": 2})
+    assert kept_names(manager) == [name_of(start + timedelta(days=3, hours=5)), name_of(start + timedelta(days=2, hours=5))]
+
+
+def test_weekly_tier_uses_iso_weeks(tmp_path):
+    backups = [datetime(2025, 3, 3), datetime(2025, 3, 7), datetime(2025, 3, 10), datetime(2025, 3, 16), datetime(2025, 3, 17)]
+    manager = make_manager(tmp_path, backups, {"keep_weekly": 2})
+    assert kept_names(manager) == [name_of(datetime(2025, 3, 17)), name_of(datetime(2025, 3, 16))]
+
+
+def test_monthly_tier_keeps_newest_backup_per_month(tmp_path):
+    backups = [datetime(2025, 1, 5), datetime(2025, 1, 25), datetime(2025, 2, 3), datetime(2025, 3, 1), datetime(2025, 3, 2)]
+    manager = make_manager(tmp_path, backups, {"keep_monthly": 2})
+    assert kept_names(manager) == [name_of(datetime(2025, 3, 2)), name_of(datetime(2025, 2, 3))]
+
+
+def test_tiers_combine_and_report_every_reason(tmp_path):
+    backups = [datetime(2025, 3, 3), datetime(2025, 3, 17, 1), datetime(2025, 3, 17, 2)]
+    manager = make_manager(tmp_path, backups, {"keep_last": 1, "keep_daily": 1, "keep_weekly": 2})
+    kept, evicted = manager.plan_backup_eviction()
+    assert [(f, r) for f, _, _, r in kept] == [(name_of(backups[2]), ["newest", "last 1", "daily", "weekly"]), (name_of(backups[0]), ["weekly"])]
+    assert [f for f, _, _, _ in evicted] == [name_of(backups[1])]
+
+
+def test_pinned_backups_survive_every_rule(tmp_path):
+    backups = [datetime(2025, 3, day) for day in range(1, 6)]
+    manager = make_manager(tmp_path, backups, {"keep_last": 1, "max_total_bytes": 1}, pinned=[name_of(backups[0])])
+    assert sorted(kept_names(manager)) == sorted([name_of(backups[4]), name_of(backups[0])])
+
+
+def test_size_cap_drops_oldest_but_never_the_newest(tmp_path):
+    backups = [datetime(2025, 3, day) for day in range(1, 6)]
+    manager = make_manager(tmp_path, backups, {"keep_last": 5, "max_total_bytes": 25})
+    kept, evicted = manager.plan_backup_eviction()
+    assert [f for f, _, _, _ in kept] == [name_of(backups[4]), name_of(backups[3])]
+    assert all(r == ["over size budget"] for _, _, _, r in evicted) and len(evicted) == 3
+    assert kept_names(make_manager(tmp_path / "tiny", backups[:2], {"keep_last": 5, "max_total_bytes": 1})) == [name_of(backups[1])]
+
+
+def test_no_automatic_eviction_until_a_policy_is_saved(tmp_path):
+    backups = [datetime(2025, 3, 1) + timedelta(minutes=m) for m in range(30)]
+    manager = make_manager(tmp_path, backups)
+    manager.json_path = str(tmp_path / editor.JSON_FILE); (tmp_path / editor.JSON_FILE).write_text("{}", encoding="utf-8")
+    assert not manager.retention_policy_enabled()
+    assert len(manager.plan_backup_eviction()[1]) == 10 # The suggested policy is still reported as a dry run
+    assert editor.backup_config_file(manager.json_path, "manual")
+    assert len(manager.list_backup_files()) == 31
+    assert manager.set_backup_pinned(name_of(backups[0])) and not manager.retention_policy_enabled()
+    assert manager.save_retention_state(dict(NO_RULES, keep_last=5), {name_of(backups[0])}) and manager.retention_policy_enabled()
+    manager.evict_old_backups()
+    assert len(manager.list_backup_files()) == 6
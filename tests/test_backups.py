@@ -0,0 +1,56 @@
+import os
+from datetime import datetime
+
+import ensh_config_gui as editor
+
+
+def make_manager(tmp_path):
+    return editor.SettingsManager(root_dir=str(tmp_path), interactive=False)
+
+
+def test_backups_in_the_same_second_never_overwrite(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path)
+    frozen = datetime(2026, 1, 2, 3, 4, 5, 678901)
+    monkeypatch.setattr(editor, "datetime", type("FrozenDatetime", (datetime,), {"now": classmethod(lambda cls: frozen)}))
+    paths = [manager.backup_file(manager.json_path, "before_gui_save", schedule_eviction=False) for _ in range(3)]
+    assert len(set(paths)) == 3 and all(paths)
+    assert sorted(name for name, _ in manager.list_backup_files()) == sorted(os.path.basename(p) for p in paths)
+
+
+def test_parse_backup_name_reads_both_formats():
+    assert editor.parse_backup_name("enshrouded_server_20250101_120000_before_gui_save.old") == (datetime(2025, 1, 1, 12, 0, 0), "before_gui_save")
+    assert editor.parse_backup_name("enshrouded_server_20250101_120000_123456-2_manual.old") == (datetime(2025, 1, 1, 12, 0, 0, 123456), "manual")
+    assert editor.parse_backup_name("enshrouded_server_20250101_120000.old") == (datetime(2025, 1, 1, 12, 0, 0), None)
+    assert editor.parse_backup_name("notes.txt") == (None, None)
+
+
+def test_list_is_newest_first_across_formats(tmp_path):
+    manager = make_manager(tmp_path)
+    backup_dir = tmp_path / editor.BACKUP_DIR; backup_dir.mkdir(exist_ok=True)
+    for name in ("enshrouded_server_20250101_120000_old_style.old", "enshrouded_server_20250101_120000_500000_new_style.old"):
+        (backup_dir / name).write_text("{}", encoding="utf-8")
+    assert [name for name, _ in manager.list_backup_files()] == ["enshrouded_server_20250101_120000_500000_new_style.old", "enshrouded_server_20250101_120000_old_style.old"]
+
+
+def test_restore_and_revert_back_up_the_replaced_file(tmp_path):
+    manager = make_manager(tmp_path)
+    first = manager.backup_file(manager.json_path, "manual", schedule_eviction=False)
+    manager.set_setting_value(["name"], "Changed"); manager._save_json(manager.settings, manager.json_path); manager._remember_disk_state()
+    manager._ask = lambda *a: True
+    assert manager.restore_from_backup_file(os.path.basename(first))
+    assert manager.wait_for_backup_eviction(timeout=5)
+    assert manager.settings["name"] == "Enshrouded Server"
+    assert any("before_restoring" in name for name, _ in manager.list_backup_files())
+    assert manager.revert_to_defaults_from_readme()
+    assert any("before_revert" in name for name, _ in manager.list_backup_files())
+    assert not [n for n in os.listdir(tmp_path) if ".tmp" in n]
+
+
+def test_save_and_revert_report_an_unopenable_lock_file(tmp_path):
+    manager = make_manager(tmp_path)
+    notes = []; manager._notify = lambda kind, title, message: notes.append((kind, title)); manager._ask = lambda *a: True
+    os.mkdir(manager.json_path + editor.CONFIG_LOCK_SUFFIX) # open() on the lock path raises IsADirectoryError
+    manager.set_setting_value(["name"], "Changed")
+    assert manager.save_all_settings() is False
+    assert manager.revert_to_defaults_from_readme() is False
+    assert notes == [("error", "Save Error"), ("error", "Error")]
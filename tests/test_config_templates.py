@@ -0,0 +1,44 @@
+import json
+
+import ensh_config_gui as editor
+
+
+def write_json(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def make_manifest(tmp_path, servers):
+    write_json(tmp_path / "base.json", {"gameSettings": {"playerHealthFactor": 1.5}, "slotCount": 10})
+    write_json(tmp_path / "groups" / "eu.json", {"gameSettings": {"enemyDamageFactor": 2}, "userGroups": [{"name": "EU"}]})
+    write_json(tmp_path / "servers" / "eu-1.json", {"name": "EU One", "slotCount": 8})
+    manifest = tmp_path / "fleet.json"
+    write_json(manifest, {"readme": "missing_readme.txt", "base": "base.json", "groups": {"eu": "groups/eu.json"}, "servers": servers})
+    return manifest
+
+
+def test_layers_merge_in_order(tmp_path):
+    manifest = make_manifest(tmp_path, {"eu-1": {"group": "eu", "overlay": "servers/eu-1.json"}})
+    results = editor.ConfigTemplateBuilder(manifest).build()
+    assert results["written"] == ["eu-1"] and not results["errors"]
+    config = json.loads((tmp_path / "eu-1" / editor.JSON_FILE).read_text(encoding="utf-8"))
+    assert config["name"] == "EU One" and config["slotCount"] == 8 # Server overlay wins
+    assert config["gameSettings"]["playerHealthFactor"] == 1.5 # Base layer
+    assert config["gameSettings"]["enemyDamageFactor"] == 2 # Group layer
+    assert config["userGroups"] == [{"name": "EU"}] # Lists are replaced whole
+    assert "gameSettingsPreset" in config # Readme (fallback) defaults fill the rest
+
+
+def test_only_changed_servers_are_rewritten(tmp_path):
+    manifest = make_manifest(tmp_path, {"eu-1": {"group": "eu", "overlay": "servers/eu-1.json"}, "eu-2": {"group": "eu"}})
+    assert sorted(editor.ConfigTemplateBuilder(manifest).build()["written"]) == ["eu-1", "eu-2"]
+    write_json(tmp_path / "servers" / "eu-1.json", {"name": "Renamed"})
+    results = editor.ConfigTemplateBuilder(manifest).build()
+    assert results["written"] == ["eu-1"] and results["unchanged"] == ["eu-2"]
+    assert sorted(editor.ConfigTemplateBuilder(manifest).build(force=True)["written"]) == ["eu-1", "eu-2"]
+
+
+def test_unknown_group_is_reported(tmp_path):
+    manifest = make_manifest(tmp_path, {"x": {"group": "nope"}})
+    results = editor.ConfigTemplateBuilder(manifest, log=lambda *a: None).build()
+    assert results["written"] == [] and results["errors"][0][0] == "x"
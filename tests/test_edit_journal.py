@@ -0,0 +1,52 @@
+import os
+
+import ensh_config_gui as editor
+
+
+def test_running_editors_keep_separate_journals(tmp_path):
+    config = str(tmp_path / editor.JSON_FILE)
+    first, second = editor.EditJournal(config, str(tmp_path)), editor.EditJournal(config, str(tmp_path))
+    first.append({"op": "set", "path": ["name"], "value": "first"})
+    second.append({"op": "set", "path": ["name"], "value": "second"})
+    assert first.filepath != second.filepath
+    assert editor.EditJournal(config, str(tmp_path)).orphaned_records() == [] # Both owners are alive
+    second.compact() # A save in one editor keeps the other's edits
+    assert editor.EditJournal._read_records(first.filepath) == [{"op": "set", "path": ["name"], "value": "first"}]
+
+
+def test_crashed_editor_journal_is_replayed_once(tmp_path):
+    config = str(tmp_path / editor.JSON_FILE)
+    crashed = editor.EditJournal(config, str(tmp_path))
+    crashed.append({"op": "set", "path": ["slotCount"], "value": 4}); crashed.sync()
+    editor.unlock_file(crashed._owner); crashed._owner.close() # What the OS does when the process dies
+    other_config = editor.EditJournal(str(tmp_path / "other.json"), str(tmp_path))
+    assert other_config.orphaned_records() == []
+    survivor = editor.EditJournal(config, str(tmp_path))
+    assert survivor.orphaned_records() == [{"op": "set", "path": ["slotCount"], "value": 4}]
+    assert editor.EditJournal(config, str(tmp_path)).orphaned_records() == [] # Claimed by survivor
+    survivor.discard_orphans()
+    assert not os.path.exists(crashed.filepath)
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    journal = editor.EditJournal(str(tmp_path / editor.JSON_FILE), str(tmp_path))
+    journal.append({"op": "add_group"}); journal.close()
+    with open(journal.filepath, "a", encoding="utf-8") as f: f.write('{"op": "set", "pa')
+    assert editor.EditJournal._read_records(journal.filepath) == [{"op": "add_group"}]
+
+
+def test_clean_close_removes_empty_journal(tmp_path):
+    journal = editor.EditJournal(str(tmp_path / editor.JSON_FILE), str(tmp_path))
+    journal.append({"op": "add_group"}); journal.compact(); journal.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_rebase_drops_records_for_discarded_rows(tmp_path):
+    manager = editor.SettingsManager(root_dir=str(tmp_path), interactive=False)
+    manager.journal = editor.EditJournal(manager.json_path, str(tmp_path / "journals"))
+    manager.add_user_group(); manager.journal.append({"op": "add_group"})
+    manager.reload_settings() # The notebook is rebuilt from disk: the new group is gone
+    manager.rebase_journal()
+    assert editor.EditJournal._read_records(manager.journal.filepath) == []
+    manager.set_setting_value(["slotCount"], 5); manager.rebase_journal()
+    assert editor.EditJournal._read_records(manager.journal.filepath) == [{"op": "set", "path": ["slotCount"], "value": 5}]
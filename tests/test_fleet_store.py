@@ -0,0 +1,59 @@
+import json
+import os
+
+import pytest
+
+import ensh_config_gui as editor
+
+pytestmark = pytest.mark.skipif(editor.sqlite3 is None, reason="needs the sqlite3 module")
+
+
+def make_root(tmp_path, name, enemy_damage, backups=()):
+    root = tmp_path / name; (root / editor.BACKUP_DIR).mkdir(parents=True)
+    settings = editor.get_hardcoded_defaults()
+    settings["gameSettings"]["enemyDamageFactor"] = enemy_damage
+    settings["userGroups"] = [{"name": "Admin", "password": f"{name}-pw", "canKickBan": True, "reservedSlots": 0}]
+    (root / editor.JSON_FILE).write_text(json.dumps(settings), encoding="utf-8")
+    for backup_name in backups: (root / editor.BACKUP_DIR / backup_name).write_text(json.dumps(settings), encoding="utf-8")
+    return str(root)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return editor.FleetStore(str(tmp_path / "fleet.sqlite3"), log=lambda *a: None)
+
+
+def test_ingest_is_incremental_and_drops_missing_files(tmp_path, store):
+    backup = "enshrouded_server_20250101_120000_before_gui_save.old"
+    roots = {"eu-1": make_root(tmp_path, "eu-1", 2.5, [backup]), "eu-2": make_root(tmp_path, "eu-2", 1)}
+    assert store.ingest(roots)["ingested"] == 3
+    again = store.ingest(roots)
+    assert again["ingested"] == 0 and again["unchanged"] == 3
+    os.remove(os.path.join(roots["eu-1"], editor.BACKUP_DIR, backup))
+    assert store.ingest(roots)["removed"] == 1
+
+
+def test_queries_cover_values_groups_and_history(tmp_path, store):
+    store.ingest({"eu-1": make_root(tmp_path, "eu-1", 2.5, ["enshrouded_server_20250101_120000_manual.old"]), "eu-2": make_root(tmp_path, "eu-2", 1)})
+    assert [r["server"] for r in store.query("gameSettings.enemyDamageFactor > 2")] == ["eu-1"]
+    assert len(store.query("gameSettings.enemyDamageFactor > 2", include_history=True)) == 2
+    assert [r["server"] for r in store.query("userGroups[Admin].password = eu-2-pw")] == ["eu-2"]
+    with pytest.raises(ValueError): store.query("")
+
+
+def test_substring_query_matches_wildcards_literally(tmp_path, store):
+    store.ingest({"eu-1": make_root(tmp_path, "eu-1", 1), "eu-2": make_root(tmp_path, "eu-2", 1), "50%_off": make_root(tmp_path, "50%_off", 1)})
+    servers = lambda expression: sorted(r["server"] for r in store.query(expression))
+    assert servers("userGroups.password ~ EU-2") == ["eu-2"] # Still case-insensitive
+    assert servers("userGroups.password ~ _") == servers("userGroups.password ~ %") == ["50%_off"]
+    assert servers("userGroups.password ~ 0%_o") == servers("userGroups.password ~ off-pw") == ["50%_off"]
+    assert servers("userGroups.password ~ u_1") == servers("userGroups.password ~ 5%f") == []
+    assert len(servers("userGroups.password ~ -pw")) == 3
+
+
+def test_renamed_root_is_reassigned_not_rejected(tmp_path, store):
+    root = make_root(tmp_path, "eu-1", 3, ["enshrouded_server_20250101_120000_manual.old"])
+    store.ingest({"old-name": root})
+    stats = store.ingest({"new-name": root})
+    assert stats["failed"] == 0 and stats["unchanged"] == 2
+    assert {r["server"] for r in store.query("gameSettings.enemyDamageFactor", include_history=True)} == {"new-name"}
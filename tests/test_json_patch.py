@@ -0,0 +1,101 @@
+import json
+import os
+
+import pytest
+
+import ensh_config_gui as editor
+
+DOC = {"a": {"b~c/d": 1, "x": [1, 2, 3]}, "userGroups": [{"name": "A"}, {"name": "B"}], "flag": True}
+
+
+def apply(patch, doc=DOC):
+    return editor.apply_json_patch(doc, editor.compile_json_patch(patch))
+
+
+def test_add_appends_and_inserts_into_arrays():
+    result = apply([{"op": "add", "path": "/userGroups/-", "value": {"name": "C"}}, {"op": "add", "path": "/a/x/0", "value": 0}])
+    assert [g["name"] for g in result["userGroups"]] == ["A", "B", "C"] and result["a"]["x"] == [0, 1, 2, 3]
+
+
+def test_pointer_escapes_and_replace_keeps_key_order():
+    result = apply([{"op": "replace", "path": "/a/b~0c~1d", "value": 5}, {"op": "replace", "path": "/a", "value": {}}])
+    assert list(result) == ["a", "userGroups", "flag"] and result["a"] == {}
+    assert apply([{"op": "test", "path": "/a/b~0c~1d", "value": 1.0}]) == DOC
+
+
+def test_remove_move_and_copy():
+    result = apply([{"op": "move", "from": "/userGroups/0", "path": "/userGroups/-"}, {"op": "copy", "from": "/userGroups/0", "path": "/first"},
+                    {"op": "remove", "path": "/flag"}])
+    assert [g["name"] for g in result["userGroups"]] == ["B", "A"] and result["first"] == {"name": "B"} and "flag" not in result
+    result["first"]["name"] = "changed"
+    assert result["userGroups"][0]["name"] == "B" # Copies never alias
+
+
+@pytest.mark.parametrize("patch", [
+    [{"op": "test", "path": "/flag", "value": 1}], # true is not 1
+    [{"op": "remove", "path": "/userGroups/2"}],
+    [{"op": "add", "path": "/a/x/01", "value": 0}],
+    [{"op": "replace", "path": "/missing", "value": 1}],
+    [{"op": "add", "path": "/missing/child", "value": 1}],
+])
+def test_failing_operations_raise_and_leave_input_untouched(patch):
+    before = json.dumps(DOC)
+    with pytest.raises(ValueError): apply([{"op": "replace", "path": "/flag", "value": False}] + patch)
+    assert json.dumps(DOC) == before
+
+
+@pytest.mark.parametrize("patch", [{"op": "add"}, [{"op": "bogus", "path": ""}], [{"op": "move", "from": "/a", "path": "/a/b"}],
+                                   [{"op": "add", "path": "no-slash", "value": 1}], [{"op": "replace", "path": "/a"}]])
+def test_malformed_patches_are_rejected_at_compile_time(patch):
+    with pytest.raises(ValueError): editor.compile_json_patch(patch)
+
+
+@pytest.mark.parametrize("with_tests", [False, True])
+def test_settings_diff_round_trips(with_tests):
+    base = editor.get_hardcoded_defaults()
+    base["userGroups"] = [{"name": f"G{i}", "password": "p"} for i in range(5)]
+    new = json.loads(json.dumps(base))
+    new["userGroups"] = new["userGroups"][:2]; new["userGroups"][0]["password"] = "z"; new["name"] = "N"; del new["ip"]; new["gameSettings"]["extra"] = 1
+    patch = editor.settings_to_json_patch(base, new, with_tests=with_tests)
+    assert editor.apply_json_patch(base, editor.compile_json_patch(patch)) == new
+    assert any(op["op"] == "test" for op in patch) == with_tests
+
+
+def make_config(directory, **overrides):
+    directory.mkdir(parents=True)
+    settings = editor.get_hardcoded_defaults()
+    settings["gameSettings"]["fromHungerToStarving"] = editor.minutes_to_nanoseconds_gui("10")
+    settings["userGroups"] = [{"name": "Admin", "password": "old", "canKickBan": True, "canAccessInventories": True,
+                               "canEditBase": True, "canExtendBase": True, "reservedSlots": 0}]
+    settings.update(overrides)
+    editor.write_json_atomic(settings, str(directory / editor.JSON_FILE))
+    return str(directory / editor.JSON_FILE)
+
+
+def test_files_are_patched_all_or_nothing(tmp_path):
+    good, drifted = make_config(tmp_path / "good"), make_config(tmp_path / "drifted", slotCount=3)
+    patch = tmp_path / "patch.json"
+    patch.write_text(json.dumps([{"op": "test", "path": "/slotCount", "value": 16},
+                                 {"op": "replace", "path": "/userGroups/0/password", "value": "new"}]), encoding="utf-8")
+    drifted_before = open(drifted, "rb").read()
+    assert editor.apply_json_patch_to_files(str(patch), [good, drifted]) == 1
+    assert json.load(open(good, encoding="utf-8"))["userGroups"][0]["password"] == "new"
+    assert open(drifted, "rb").read() == drifted_before and not os.path.exists(tmp_path / "drifted" / editor.BACKUP_DIR)
+    assert editor.apply_json_patch_to_file(good, editor.compile_json_patch(json.loads(patch.read_text())))[0] == "unchanged"
+
+
+def test_invalid_results_are_refused(tmp_path):
+    config = make_config(tmp_path / "server")
+    status, message = editor.apply_json_patch_to_file(config, editor.compile_json_patch([{"op": "replace", "path": "/slotCount", "value": 99}]))
+    assert status == "invalid" and "slotCount" in message
+
+
+def test_patch_backups_follow_retention(tmp_path):
+    config = make_config(tmp_path / "server")
+    backup_dir = tmp_path / "server" / editor.BACKUP_DIR; backup_dir.mkdir()
+    policy = {"keep_last": 1, "keep_daily": 0, "keep_weekly": 0, "keep_monthly": 0, "max_total_bytes": 0}
+    (backup_dir / editor.BACKUP_RETENTION_FILE).write_text(json.dumps({"policy": policy, "pinned": []}), encoding="utf-8")
+    for slots in (10, 11, 12):
+        assert editor.apply_json_patch_to_file(config, editor.compile_json_patch([{"op": "replace", "path": "/slotCount", "value": slots}]))[0] == "changed"
+    backups = [n for n in os.listdir(backup_dir) if n.endswith(".old")]
+    assert len(backups) == 1 and editor.parse_backup_name(backups[0])[1] == editor.JSON_PATCH_BACKUP_REASON
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+import ensh_config_gui as editor
+
+
+@pytest.fixture(autouse=True)
+def small_strides(monkeypatch):
+    # Small chunks and checkpoints so a few hundred lines cross every boundary.
+    monkeypatch.setattr(editor, "LOG_INDEX_CHUNK_BYTES", 256)
+    monkeypatch.setattr(editor, "LOG_LINE_CHECKPOINT_EVERY", 4)
+    monkeypatch.setattr(editor, "LOG_TIMESTAMP_EVERY_N_LINES", 8)
+
+
+def log_line(n):
+    event = " Player Anna joined" if n % 50 == 7 else " ERROR something broke" if n % 30 == 3 else ""
+    return f"2025-03-01 10:{n // 60 % 60:02d}:{n % 60:02d} line {n}{event}\n"
+
+
+def write_log(path, lines, mode="w", tail=""):
+    with open(path, mode, encoding="utf-8", newline="") as f: f.write("".join(log_line(n) for n in lines) + tail)
+    return str(path)
+
+
+def test_index_matches_file_contents(tmp_path):
+    index = editor.LogFileIndex(write_log(tmp_path / "server.log", range(300)))
+    assert index.update() == 300 and index.line_count == 300
+    assert len(index.checkpoints) == 300 // 4 + 1 # Sparse: one offset per 4 lines, not per line
+    assert index.read_lines(0, 2) == [(0, log_line(0).rstrip("\n")), (1, log_line(1).rstrip("\n"))]
+    assert index.read_lines(123, 3) == [(n, log_line(n).rstrip("\n")) for n in (123, 124, 125)]
+    assert index.read_lines(298, 10) == [(n, log_line(n).rstrip("\n")) for n in (298, 299)]
+
+
+def test_update_indexes_only_appended_lines(tmp_path):
+    path = write_log(tmp_path / "server.log", range(100), tail="2025-03-01 11:00:00 partial")
+    index = editor.LogFileIndex(path)
+    assert index.update() == 100
+    assert index.read_lines(100, 1) == [] # The unfinished line is not indexed yet
+    with open(path, "a", encoding="utf-8") as f: f.write(" line\n")
+    write_log(path, range(101, 200), mode="a")
+    assert index.update() == 100 and index.update() == 0
+    assert index.read_lines(100, 2) == [(100, "2025-03-01 11:00:00 partial line"), (101, log_line(101).rstrip("\n"))]
+    fresh = editor.LogFileIndex(path); fresh.update()
+    assert fresh.checkpoints == index.checkpoints and fresh.timestamps == index.timestamps
+    assert all(fresh.events[kind] == index.events[kind] for kind in editor.LOG_EVENT_PATTERNS)
+
+
+def test_truncation_and_rotation_reset_the_index(tmp_path):
+    path = write_log(tmp_path / "server.log", range(200))
+    index = editor.LogFileIndex(path); index.update()
+    write_log(path, range(1000, 1010)) # Rotated: replaced by a shorter file
+    assert index.update() == 10 and index.line_count == 10
+    assert index.read_lines(0, 1) == [(0, log_line(1000).rstrip("\n"))]
+    assert index.timestamps[0] == (0, "2025-03-01 10:16:40")
+    open(path, "w").close()
+    assert index.update() == 0 and index.line_count == 0 and index.read_lines(0, 5) == []
+
+
+def test_event_search_returns_indexed_lines(tmp_path):
+    index = editor.LogFileIndex(write_log(tmp_path / "server.log", range(300))); index.update()
+    joins = index.search("Player Joins")
+    assert [n for n, _ in joins] == [n for n in range(300) if n % 50 == 7]
+    assert all("joined" in line for _, line in joins)
+    assert [n for n, _ in index.search("Errors")] == [n for n in range(300) if n % 30 == 3 and n % 50 != 7]
+    assert [n for n, _ in index.search("Player Joins", max_results=2)] == [207, 257]
+
+
+def test_free_text_search_finds_line_numbers_across_checkpoints(tmp_path):
+    index = editor.LogFileIndex(write_log(tmp_path / "server.log", range(300))); index.update()
+    assert [n for n, _ in index.search(r"line 2\d9\b")] == [209, 219, 229, 239, 249, 259, 269, 279, 289, 299]
+    assert [n for n, _ in index.search("LINE 5")] == [5] + list(range(50, 60))
+    assert [n for n, _ in index.search("broke", max_results=3)] == [3, 33, 63]
+    assert index.search("line 1[") == [] # Invalid regex falls back to a literal search
+
+
+def test_timestamp_near_uses_the_closest_earlier_checkpoint(tmp_path):
+    index = editor.LogFileIndex(write_log(tmp_path / "server.log", range(100))); index.update()
+    assert [n for n, _ in index.timestamps] == list(range(0, 100, 8))
+    assert index.timestamp_near(0) == "2025-03-01 10:00:00"
+    assert index.timestamp_near(15) == "2025-03-01 10:00:08"
+    assert index.timestamp_near(99) == "2025-03-01 10:01:36"
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.log"; path.write_bytes(b"")
+    index = editor.LogFileIndex(str(path))
+    assert index.update() == 0 and index.search("x") == [] and index.timestamp_near(5) is None
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+import ensh_config_gui as editor
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(editor, "MIGRATIONS", [])
+    editor.plan_migrations.cache_clear()
+    editor.register_migration("0.9.0.0", "scale up again", editor.convert_setting(["gameSettings", "factor"], lambda v: v * 1000))
+    editor.register_migration("0.8.0.0", "rename and scale", editor.rename_setting(["oldFactor"], ["gameSettings", "factor"]),
+                              editor.convert_setting(["gameSettings", "factor"], lambda v: v * 10))
+    yield
+    editor.plan_migrations.cache_clear()
+
+
+def test_plan_is_ordered_by_version_and_cached(registry):
+    plan = editor.plan_migrations(None, "0.9.0.0")
+    assert [version for version, _, _ in plan] == ["0.8.0.0", "0.8.0.0", "0.9.0.0"]
+    assert editor.plan_migrations("0.8.0.0", "0.9.0.0") == plan[2:]
+    hits = editor.plan_migrations.cache_info().hits
+    editor.plan_migrations(None, "0.9.0.0")
+    assert editor.plan_migrations.cache_info().hits == hits + 1
+
+
+def test_migrations_run_once_and_stamp(registry):
+    settings = {"oldFactor": 5, "gameSettings": {}}
+    assert len(editor.migrate_settings(settings, "0.9.0.0")) == 3
+    assert settings == {"gameSettings": {"factor": 50000}, editor.CONFIG_VERSION_KEY: "0.9.0.0"}
+    assert editor.migrate_settings(settings, "0.9.0.0") == [] and settings["gameSettings"]["factor"] == 50000
+
+
+def test_older_target_never_downgrades(registry):
+    settings = {"gameSettings": {"factor": 5}, editor.CONFIG_VERSION_KEY: "0.9.0.0"}
+    assert editor.migrate_settings(settings, "0.8.0.0") == []
+    assert settings[editor.CONFIG_VERSION_KEY] == "0.9.0.0"
+    editor.migrate_settings(settings, "0.9.0.0")
+    assert settings["gameSettings"]["factor"] == 5 # No convert ops re-run after an older readme opened the file
+
+
+def test_cli_backs_up_into_old_folder(registry, tmp_path):
+    path = tmp_path / editor.JSON_FILE
+    path.write_text(json.dumps({"oldFactor": 2}), encoding="utf-8")
+    assert editor.migrate_config_files([str(path)], "0.8.0.0") == 0
+    assert json.loads(path.read_text(encoding="utf-8"))["gameSettings"]["factor"] == 20
+    backups = os.listdir(tmp_path / editor.BACKUP_DIR)
+    assert len(backups) == 1 and "pre_migration" in backups[0] and backups[0].endswith(".old")
+    assert sorted(os.listdir(tmp_path)) == sorted([editor.BACKUP_DIR, editor.JSON_FILE, editor.JSON_FILE + editor.CONFIG_LOCK_SUFFIX])
+
+
+def test_opening_a_config_without_migrations_leaves_it_alone(tmp_path):
+    defaults = editor.get_hardcoded_defaults()
+    path = tmp_path / editor.JSON_FILE
+    path.write_text(json.dumps(defaults), encoding="utf-8")
+    before = path.read_bytes()
+    manager = editor.SettingsManager(root_dir=str(tmp_path), interactive=False)
+    assert path.read_bytes() == before and editor.CONFIG_VERSION_KEY not in manager.settings
+
+
+def test_cli_leaves_files_alone_when_no_step_applies(registry, tmp_path, monkeypatch):
+    path = tmp_path / editor.JSON_FILE
+    path.write_text(json.dumps({"gameSettings": {}}), encoding="utf-8") # Unstamped, nothing for the registered steps to do
+    before = path.read_bytes()
+    logged = []
+    monkeypatch.setattr(editor, "log_message_gui", lambda msg, level="INFO": logged.append(msg))
+    assert editor.migrate_config_files([str(path)], "0.9.0.0", dry_run=True) == 0
+    assert editor.migrate_config_files([str(path)], "0.9.0.0") == 0
+    monkeypatch.setattr(editor, "MIGRATIONS", []); editor.plan_migrations.cache_clear()
+    assert editor.migrate_config_files([str(path)], "0.9.0.0") == 0
+    assert path.read_bytes() == before and not (tmp_path / editor.BACKUP_DIR).exists()
+    assert all("0 would be migrated, 1 unchanged" in m or "0 migrated, 1 unchanged" in m for m in logged)
@@ -0,0 +1,68 @@
+import os
+
+import ensh_config_gui as editor
+
+
+def make_world(tmp_path, files):
+    save_dir = tmp_path / "savegame"
+    for rel, data in files.items():
+        path = save_dir / rel; path.parent.mkdir(parents=True, exist_ok=True); path.write_bytes(data)
+    manager = editor.SettingsManager(root_dir=str(tmp_path / "server"), interactive=False)
+    manager.set_setting_value(["saveDirectory"], str(save_dir))
+    manager._save_json(manager.settings, manager.json_path); manager._remember_disk_state()
+    return manager, save_dir
+
+
+def read_tree(root):
+    return {rel: open(os.path.join(root, *rel.split("/")), "rb").read() for rel in editor.scan_directory_files(str(root))}
+
+
+def snapshot(manager, reason):
+    backup = manager.backup_file(manager.json_path, reason, schedule_eviction=False)
+    return os.path.basename(backup), manager.snapshot_save_directory(backup)
+
+
+def test_unchanged_files_are_hardlinked_between_snapshots(tmp_path):
+    manager, save_dir = make_world(tmp_path, {"world.db": b"w" * 4096, "chars/anna.sav": b"a1", "chars/bob.sav": b"b1"})
+    _, first = snapshot(manager, "first")
+    (save_dir / "chars" / "anna.sav").write_bytes(b"a2-longer")
+    _, second = snapshot(manager, "second")
+    same_file = lambda rel: os.path.samefile(os.path.join(first, rel), os.path.join(second, rel))
+    assert same_file("world.db") and same_file("chars/bob.sav") and not same_file("chars/anna.sav")
+    assert read_tree(second) == {**read_tree(save_dir), editor.SAVE_SNAPSHOT_MANIFEST: read_tree(second)[editor.SAVE_SNAPSHOT_MANIFEST]}
+    assert read_tree(first)["chars/anna.sav"] == b"a1"
+    manifest = manager._load_json(os.path.join(second, editor.SAVE_SNAPSHOT_MANIFEST))
+    assert manifest["files"]["chars/anna.sav"]["sha256"] == editor.sha256_file(str(save_dir / "chars" / "anna.sav"))
+
+
+def test_touched_but_identical_files_are_still_linked(tmp_path):
+    manager, save_dir = make_world(tmp_path, {"world.db": b"same"})
+    _, first = snapshot(manager, "first")
+    os.utime(save_dir / "world.db", ns=(1, 1)) # Rehashed because the mtime changed, but the hash matches
+    _, second = snapshot(manager, "second")
+    assert os.path.samefile(os.path.join(first, "world.db"), os.path.join(second, "world.db"))
+
+
+def test_restore_makes_the_save_directory_match_the_snapshot(tmp_path):
+    original = {"world.db": b"w" * 4096, "chars/anna.sav": b"a1", "chars/bob.sav": b"b1"}
+    manager, save_dir = make_world(tmp_path, original)
+    name, first = snapshot(manager, "first")
+    (save_dir / "chars" / "anna.sav").write_bytes(b"a2"); (save_dir / "chars" / "bob.sav").unlink(); (save_dir / "new.tmp").write_bytes(b"x")
+    assert manager.restore_save_snapshot(name)
+    assert read_tree(save_dir) == original
+    assert os.stat(save_dir / "world.db").st_mtime_ns == os.stat(os.path.join(first, "world.db")).st_mtime_ns
+    (save_dir / "chars" / "bob.sav").write_bytes(b"edited after restore")
+    assert read_tree(first)["chars/bob.sav"] == b"b1" # Restored files never share an inode with the snapshot
+
+
+def test_restore_from_backup_restores_config_and_world(tmp_path):
+    manager, save_dir = make_world(tmp_path, {"world.db": b"before"})
+    name, _ = snapshot(manager, "first")
+    manager.set_setting_value(["name"], "Changed"); manager._save_json(manager.settings, manager.json_path); manager._remember_disk_state()
+    (save_dir / "world.db").write_bytes(b"after")
+    assert manager.restore_from_backup_file(name, restore_world=True)
+    assert manager.wait_for_backup_eviction(timeout=5)
+    assert manager.settings["name"] == "Enshrouded Server" and read_tree(save_dir) == {"world.db": b"before"}
+    pre_restore = [n for n, _ in manager.list_backup_files() if "before_restoring" in n]
+    assert len(pre_restore) == 1 and manager.has_save_snapshot(pre_restore[0])
+    assert read_tree(manager.save_snapshot_path(pre_restore[0]))["world.db"] == b"after"
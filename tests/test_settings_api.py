@@ -0,0 +1,90 @@
+import asyncio
+import http.client
+import json
+import threading
+
+import pytest
+
+import ensh_config_gui as editor
+
+
+@pytest.fixture
+def api(tmp_path):
+    root = tmp_path / "eu-1"; root.mkdir()
+    (root / editor.JSON_FILE).write_text(json.dumps(editor.get_hardcoded_defaults()), encoding="utf-8")
+    (tmp_path / "empty").mkdir()
+    server = editor.SettingsApiServer({"eu-1": str(root), "empty": str(tmp_path / "empty")}, port=0)
+    loop = asyncio.new_event_loop(); started = threading.Event(); state = {}
+    async def run():
+        server._locks = {name: asyncio.Lock() for name in server.roots}
+        state["server"] = await asyncio.start_server(server._handle_client, "127.0.0.1", 0)
+        state["port"] = state["server"].sockets[0].getsockname()[1]; started.set()
+    thread = threading.Thread(target=lambda: (loop.run_until_complete(run()), loop.run_forever()), daemon=True); thread.start()
+    assert started.wait(5)
+    yield state["port"], root, tmp_path / "empty"
+    loop.call_soon_threadsafe(loop.stop); thread.join(5)
+
+
+def request(port, method, path, body=None, headers=None, raw_body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    payload = raw_body if raw_body is not None else (json.dumps(body).encode() if body is not None else None)
+    conn.request(method, path, body=payload, headers=headers or {})
+    response = conn.getresponse(); data = response.read(); conn.close()
+    return response.status, response.getheader("ETag"), json.loads(data) if data else None
+
+
+def test_get_returns_settings_with_a_content_etag(api):
+    port, root, _ = api
+    status, etag, settings = request(port, "GET", "/roots/eu-1/settings")
+    assert status == 200 and settings["name"] == "Enshrouded Server"
+    assert etag == f'"{editor.sha256_file(str(root / editor.JSON_FILE))[:32]}"'
+
+
+def test_if_none_match_gives_304_until_the_file_changes(api):
+    port, root, _ = api
+    _, etag, _ = request(port, "GET", "/roots/eu-1/settings")
+    assert request(port, "GET", "/roots/eu-1/settings", headers={"If-None-Match": etag}) == (304, etag, None)
+    assert request(port, "GET", "/roots/eu-1/settings", headers={"If-None-Match": f'"other", {etag}'})[0] == 304
+    assert request(port, "PATCH", "/roots/eu-1/settings", {"name": "Renamed"}, {"If-Match": etag})[0] == 200
+    status, new_etag, settings = request(port, "GET", "/roots/eu-1/settings", headers={"If-None-Match": etag})
+    assert status == 200 and new_etag != etag and settings["name"] == "Renamed"
+
+
+def test_stale_if_match_is_refused_with_412(api):
+    port, root, _ = api
+    _, etag, _ = request(port, "GET", "/roots/eu-1/settings")
+    assert request(port, "PATCH", "/roots/eu-1/settings", {"slotCount": 10}, {"If-Match": etag})[0] == 200
+    status, current_etag, body = request(port, "PATCH", "/roots/eu-1/settings", {"slotCount": 12}, {"If-Match": etag})
+    assert status == 412 and current_etag != etag and "changed" in body["error"]
+    assert json.loads((root / editor.JSON_FILE).read_text(encoding="utf-8"))["slotCount"] == 10
+
+
+@pytest.mark.parametrize("raw_body, headers", [(b"{not json", {}), (b"{}", {"Content-Length": "abc"}), (b"", {"Content-Length": "-5"})])
+def test_bad_bodies_get_400(api, raw_body, headers):
+    port, _, _ = api
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.putrequest("PATCH", "/roots/eu-1/settings")
+    for key, value in ({"Content-Length": str(len(raw_body))} | headers).items(): conn.putheader(key, value)
+    conn.endheaders(); conn.send(raw_body)
+    response = conn.getresponse(); body = json.loads(response.read()); conn.close()
+    assert response.status == 400 and "error" in body
+
+
+def test_reads_never_create_a_missing_config(api):
+    port, _, empty = api
+    assert request(port, "GET", "/roots/empty/settings")[0] == 404
+    assert request(port, "POST", "/roots/empty/validate")[0] == 404
+    assert request(port, "PATCH", "/roots/empty/settings", {"name": "x"})[0] == 404
+    assert request(port, "POST", "/roots/empty/backups")[0] == 404
+    assert request(port, "GET", "/roots/empty/backups")[:1] == (200,)
+    assert request(port, "GET", "/roots/nope/settings")[0] == 404
+    assert not (empty / editor.JSON_FILE).exists()
+
+
+def test_reads_leave_an_unstamped_config_byte_for_byte(api):
+    port, root, _ = api
+    before = (root / editor.JSON_FILE).read_bytes()
+    assert request(port, "GET", "/roots/eu-1/settings")[0] == 200
+    assert request(port, "POST", "/roots/eu-1/validate")[0] == 200
+    assert request(port, "GET", "/roots/eu-1/backups")[2] == {"backups": []}
+    assert (root / editor.JSON_FILE).read_bytes() == before
@@ -0,0 +1,78 @@
+import json
+import os
+
+import ensh_config_gui as editor
+
+
+OLD = {"name": "A", "gameSettings": {"enemyDamageFactor": 1, "tombstoneMode": "AddBackpackMaterials"}, "userGroups": [{"name": "Admin"}, {"name": "Guest"}]}
+
+
+def test_diff_reports_added_removed_and_changed_paths():
+    new = json.loads(json.dumps(OLD))
+    new["gameSettings"]["enemyDamageFactor"] = 2; del new["gameSettings"]["tombstoneMode"]; new["slotCount"] = 16
+    new["userGroups"].pop(); new["userGroups"].append({"name": "Friend"}); new["userGroups"].append({"name": "Extra"})
+    assert sorted(editor.diff_settings(OLD, new)) == sorted([
+        (("gameSettings", "enemyDamageFactor"), "changed", 1, 2),
+        (("gameSettings", "tombstoneMode"), "removed", "AddBackpackMaterials", None),
+        (("userGroups", 1, "name"), "changed", "Guest", "Friend"),
+        (("userGroups", 2), "added", None, {"name": "Extra"}),
+        (("slotCount",), "added", None, 16)])
+
+
+def test_diff_treats_type_changes_as_changes():
+    assert editor.diff_settings({"a": 1}, {"a": 1.0}) == [(("a",), "changed", 1, 1.0)]
+    assert editor.diff_settings({"a": 1}, {"a": True}) == [(("a",), "changed", 1, True)]
+    assert editor.diff_settings({"a": {"b": 1}}, {"a": [1]}) == [(("a",), "changed", {"b": 1}, [1])]
+
+
+def test_subtree_hashes_are_order_independent_and_localised():
+    hashes = editor.compute_subtree_hashes(OLD)
+    reordered = editor.compute_subtree_hashes(dict(reversed(list(OLD.items()))))
+    assert hashes[()] == reordered[()]
+    changed = json.loads(json.dumps(OLD)); changed["gameSettings"]["enemyDamageFactor"] = 3
+    changed_hashes = editor.compute_subtree_hashes(changed)
+    assert changed_hashes[()] != hashes[()] and changed_hashes[("gameSettings",)] != hashes[("gameSettings",)]
+    assert changed_hashes[("userGroups",)] == hashes[("userGroups",)] and changed_hashes[("name",)] == hashes[("name",)]
+    assert editor.compute_subtree_hashes([1])[()] != editor.compute_subtree_hashes({"0": 1})[()]
+
+
+def test_diff_with_hashes_matches_plain_diff_and_skips_equal_subtrees(monkeypatch):
+    new = json.loads(json.dumps(OLD)); new["name"] = "B"
+    old_hashes, new_hashes = editor.compute_subtree_hashes(OLD), editor.compute_subtree_hashes(new)
+    assert editor.diff_settings(OLD, new, old_hashes, new_hashes) == editor.diff_settings(OLD, new) == [(("name",), "changed", "A", "B")]
+    visited, real_diff = [], editor.diff_settings
+    def spy(old, new, old_h=None, new_h=None, path=()): visited.append(path); return real_diff(old, new, old_h, new_h, path)
+    monkeypatch.setattr(editor, "diff_settings", spy)
+    spy(OLD, new, old_hashes, new_hashes)
+    assert ("gameSettings", "enemyDamageFactor") not in visited and ("userGroups", 0) not in visited
+
+
+def write_backup(path, data, mtime_ns=None):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    if mtime_ns is not None: os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_snapshot_cache_reuses_parsed_backups_until_the_file_changes(tmp_path):
+    cache = editor.BackupSnapshotCache(max_entries=4)
+    path = write_backup(tmp_path / "a.old", {"v": 1}, mtime_ns=1_000_000_000)
+    data, hashes = cache.get(path)
+    assert data == {"v": 1} and hashes == editor.compute_subtree_hashes({"v": 1})
+    assert cache.get(path)[0] is data
+    write_backup(tmp_path / "a.old", {"v": 2}, mtime_ns=2_000_000_000)
+    assert cache.get(path)[0] == {"v": 2}
+
+
+def test_snapshot_cache_evicts_least_recently_used(tmp_path):
+    cache = editor.BackupSnapshotCache(max_entries=2)
+    paths = [write_backup(tmp_path / f"{n}.old", {"n": n}) for n in range(3)]
+    first = cache.get(paths[0])[0]; cache.get(paths[1]); cache.get(paths[0]); cache.get(paths[2])
+    assert list(cache._entries) == [paths[0], paths[2]]
+    assert cache.get(paths[0])[0] is first
+
+
+def test_snapshot_cache_returns_nothing_for_missing_or_broken_files(tmp_path):
+    cache = editor.BackupSnapshotCache()
+    assert cache.get(str(tmp_path / "missing.old")) == (None, None)
+    (tmp_path / "broken.old").write_text("{not json", encoding="utf-8")
+    assert cache.get(str(tmp_path / "broken.old")) == (None, None)
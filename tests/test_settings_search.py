@@ -0,0 +1,55 @@
+import ensh_config_gui as editor
+
+TABS = {"General": editor.general_settings_menu_def, "Player": editor.player_settings_menu_def,
+        "World": editor.world_settings_menu_def, "Server Roles": "user_groups_tab"}
+GROUPS = [{"name": "Admin"}, {"name": "Friend"}]
+
+
+def labels(results):
+    return [entry["label"] for entry in results]
+
+
+def test_trigram_matches_labels_paths_and_tooltips():
+    index = editor.SettingsSearchIndex(TABS, GROUPS)
+    assert labels(index.search("slot count"))[0] == "Slot Count"
+    assert index.search("slotCount")[0]["path_keys"] == ("slotCount",)
+    assert index.search("dayTimeDuration")[0]["label"] == "Day Duration"
+    assert "Enable Item Durability" in labels(index.search("durability damage")) # "damage" only occurs in the tooltip
+    assert index.search("zzzqqq") == [] and index.search("   ") == []
+
+
+SMALL_TABS = {"Test": {1: (["a"], "Duration Bonus", "Extra time."), 2: (["b"], "Base Endurance", "Stamina."), 3: (["c"], "Other", "Affects duration.")}}
+
+
+def test_prefix_matches_rank_above_substring_and_tooltip_matches():
+    index = editor.SettingsSearchIndex(SMALL_TABS, [])
+    assert labels(index.search("dur")) == ["Duration Bonus", "Base Endurance", "Other"]
+    assert labels(index.search("dur", limit=1)) == ["Duration Bonus"]
+    assert labels(index.search("base dur")) == ["Base Endurance"] # Every word has to match
+
+
+def test_queries_shorter_than_three_characters_use_word_prefixes():
+    index = editor.SettingsSearchIndex(SMALL_TABS, [])
+    assert labels(index.search("b")) == ["Duration Bonus", "Base Endurance"]
+    assert labels(index.search("en")) == ["Base Endurance"]
+    assert index.search("ur") == [] # Only word prefixes are indexed below three characters
+    full = editor.SettingsSearchIndex(TABS, GROUPS)
+    assert "Slot Count" in labels(full.search("sl", limit=500)) and "Slot Count" in labels(full.search("s", limit=500))
+
+
+def test_user_groups_are_searchable_by_name():
+    index = editor.SettingsSearchIndex(TABS, GROUPS)
+    results = index.search("friend password")
+    assert results[0]["label"] == "Password (Friend)" and results[0]["path_keys"] == ("userGroups", 1, "password")
+    assert all(entry["group"] == "Friend" for entry in index.search("friend"))
+
+
+def test_rebuilding_after_edits_reflects_renamed_and_added_groups():
+    groups = [dict(g) for g in GROUPS]
+    assert editor.SettingsSearchIndex(TABS, groups).search("moderators") == []
+    groups[1]["name"] = "Moderators"; groups.append({"name": "Guest"})
+    rebuilt = editor.SettingsSearchIndex(TABS, groups)
+    assert rebuilt.search("moderators")[0]["path_keys"][:2] == ("userGroups", 1)
+    assert rebuilt.search("friend") == []
+    assert {e["path_keys"][1] for e in rebuilt.search("guest")} == {2}
+    assert editor.SettingsSearchIndex(TABS, "not a list").search("admin") == []
@@ -0,0 +1,75 @@
+import json
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+import ensh_config_gui as editor
+
+
+@pytest.fixture
+def supervisor(tmp_path):
+    settings = editor.get_hardcoded_defaults()
+    (tmp_path / editor.JSON_FILE).write_text(json.dumps(settings), encoding="utf-8")
+    sup = editor.ServerSupervisor(str(tmp_path), [sys.executable, "-c", "import time; time.sleep(60)"], exempt_paths=[["name"]])
+    sup.running_settings = sup._read_config()
+    yield sup
+    sup._stop_server()
+
+
+def write_config(supervisor, settings, mtime_offset):
+    editor.write_json_atomic(settings, supervisor.json_path)
+    os.utime(supervisor.json_path, ns=(0, 10**9 * mtime_offset)) # A distinct mtime per write, however fast the test runs
+
+
+def test_restart_paths_ignore_formatting_and_exempt_paths(supervisor):
+    old = supervisor.running_settings
+    new = json.loads(json.dumps(old)); new["name"] = "Renamed"; new[editor.CONFIG_VERSION_KEY] = "1.0"
+    assert supervisor.restart_paths(old, json.loads(json.dumps(old, indent=1))) == []
+    assert supervisor.restart_paths(old, new) == []
+    new["slotCount"] = 4
+    assert supervisor.restart_paths(old, new) == [("slotCount",)]
+
+
+def test_reverted_change_cancels_pending_restart(supervisor):
+    original = json.loads(json.dumps(supervisor.running_settings))
+    changed = json.loads(json.dumps(original)); changed["gameSettings"]["enemyDamageFactor"] = 3
+    write_config(supervisor, changed, 1); supervisor._check_config()
+    assert supervisor.pending_changes == [("gameSettings", "enemyDamageFactor")]
+    write_config(supervisor, original, 2); supervisor._check_config()
+    assert supervisor.pending_changes == []
+
+
+def test_restart_adopts_the_config_on_disk(supervisor):
+    supervisor._start_server()
+    changed = json.loads(json.dumps(supervisor.running_settings)); changed["slotCount"] = 4
+    write_config(supervisor, changed, 1); supervisor._check_config()
+    supervisor._restart_server("exited") # A crash restart also picks up the new file
+    assert supervisor.pending_changes == [] and supervisor.running_settings["slotCount"] == 4
+    assert supervisor.process.poll() is None and supervisor.restarts[-1]["reason"] == "exited"
+
+
+def test_log_rotated_between_scan_and_open_is_retried(supervisor, tmp_path, monkeypatch):
+    log_dir = tmp_path / "logs"; log_dir.mkdir()
+    supervisor.running_settings["logDirectory"] = str(log_dir)
+    (log_dir / "server.log").write_text("player joined\n", encoding="utf-8")
+    real_update = editor.LogFileIndex.update
+    def vanished(index): raise FileNotFoundError(index.filepath)
+    monkeypatch.setattr(editor.LogFileIndex, "update", vanished)
+    supervisor._update_player_activity() # Must not raise out of run(), which would stop the server
+    assert supervisor.log_index is None
+    monkeypatch.setattr(editor.LogFileIndex, "update", real_update)
+    supervisor._update_player_activity()
+    assert supervisor._join_count == 1 and supervisor.last_join is None # Joins before watching started don't count
+    with open(log_dir / "server.log", "a", encoding="utf-8") as f: f.write("player joined\n")
+    supervisor._update_player_activity()
+    assert supervisor._join_count == 2 and supervisor.last_join is not None
+
+
+def test_restart_windows_wrap_midnight():
+    window = [editor.parse_restart_window("23:00-02:00")]
+    assert editor.in_restart_window(window, datetime(2026, 1, 1, 1, 30))
+    assert not editor.in_restart_window(window, datetime(2026, 1, 1, 3, 0))
+    assert editor.in_restart_window([], datetime(2026, 1, 1, 12, 0))
+    with pytest.raises(ValueError): editor.parse_restart_window("25:00-26:00")
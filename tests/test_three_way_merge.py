@@ -0,0 +1,66 @@
+import json
+
+import ensh_config_gui as editor
+
+
+def group(name, **fields):
+    return {"name": name, "password": "pw", "reservedSlots": 0, **fields}
+
+
+BASE = {"name": "Server", "gameSettings": {"a": 1, "b": 2}, "userGroups": [group("Admin"), group("Friend"), group("Guest")]}
+
+
+def edit(**changes):
+    settings = json.loads(json.dumps(BASE))
+    for path, value in changes.items():
+        node = settings
+        *parents, last = path.split("__")
+        for key in parents: node = node[int(key)] if isinstance(node, list) else node[key]
+        node[int(last) if isinstance(node, list) else last] = value
+    return settings
+
+
+def test_disjoint_field_edits_merge_cleanly():
+    merged, conflicts = editor.three_way_merge(BASE, edit(gameSettings__a=10), edit(gameSettings__b=20, name="Renamed"))
+    assert conflicts == [] and merged["gameSettings"] == {"a": 10, "b": 20} and merged["name"] == "Renamed"
+
+
+def test_same_field_conflicts_and_prefer_mine_resolves():
+    mine, theirs = edit(gameSettings__a=10), edit(gameSettings__a=30)
+    merged, conflicts = editor.three_way_merge(BASE, mine, theirs)
+    assert [c[0] for c in conflicts] == [("gameSettings", "a")] and merged["gameSettings"]["a"] == 30
+    assert editor.three_way_merge(BASE, mine, theirs, prefer_mine=True)[0]["gameSettings"]["a"] == 10
+
+
+def test_different_user_groups_merge_per_group():
+    mine = edit(userGroups__0__password="mine")
+    theirs = edit(userGroups__2__reservedSlots=3)
+    merged, conflicts = editor.three_way_merge(BASE, mine, theirs)
+    assert conflicts == []
+    assert merged["userGroups"] == [group("Admin", password="mine"), group("Friend"), group("Guest", reservedSlots=3)]
+
+
+def test_same_group_field_conflicts_by_name():
+    merged, conflicts = editor.three_way_merge(BASE, edit(userGroups__1__password="a"), edit(userGroups__1__password="b"))
+    assert [c[0] for c in conflicts] == [("userGroups", "Friend", "password")]
+    assert editor.format_merge_conflicts(conflicts).startswith("- userGroups.Friend.password")
+
+
+def test_group_adds_and_deletes_from_both_sides():
+    mine = json.loads(json.dumps(BASE)); mine["userGroups"].append(group("Mod"))
+    theirs = json.loads(json.dumps(BASE)); del theirs["userGroups"][2]
+    merged, conflicts = editor.three_way_merge(BASE, mine, theirs)
+    assert conflicts == [] and [g["name"] for g in merged["userGroups"]] == ["Admin", "Friend", "Mod"]
+
+
+def test_delete_versus_edit_of_the_same_group_conflicts():
+    mine = json.loads(json.dumps(BASE)); del mine["userGroups"][0]
+    merged, conflicts = editor.three_way_merge(BASE, mine, edit(userGroups__0__password="new"))
+    assert [c[0] for c in conflicts] == [("userGroups", "Admin")] and merged["userGroups"][0]["password"] == "new"
+
+
+def test_duplicate_names_fall_back_to_whole_list():
+    base = {"userGroups": [group("A"), group("A")]}
+    mine = {"userGroups": [group("A", password="x"), group("A")]}
+    theirs = {"userGroups": [group("A"), group("A", password="y")]}
+    assert [c[0] for c in editor.three_way_merge(base, mine, theirs)[1]] == [("userGroups",)]
@@ -0,0 +1,64 @@
+import json
+
+import ensh_config_gui as editor
+
+EXISTING = [{"name": "Admin", "password": "secret", "canKickBan": True, "canAccessInventories": True, "canEditBase": True, "canExtendBase": True, "reservedSlots": 0},
+            {"name": "Friend", "password": "pal", "canKickBan": False, "canAccessInventories": True, "canEditBase": False, "canExtendBase": False, "reservedSlots": 2}]
+
+
+def write_jsonl(path, rows):
+    path.write_text("".join((row if isinstance(row, str) else json.dumps(row)) + "\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+
+def test_parse_row_normalizes_csv_strings():
+    group, error = editor.parse_user_group_row({"name": " Guest ", "password": "pw", "canKickBan": "yes", "canEditBase": "0", "reservedSlots": "3"})
+    assert error is None
+    assert group == {"name": "Guest", "password": "pw", "canKickBan": True, "canAccessInventories": False, "canEditBase": False, "canExtendBase": False, "reservedSlots": 3}
+
+
+def test_parse_row_keeps_existing_values_for_missing_fields():
+    group, error = editor.parse_user_group_row({"name": "Friend", "reservedSlots": 5}, EXISTING[1])
+    assert error is None and group == dict(EXISTING[1], reservedSlots=5)
+    assert EXISTING[1]["reservedSlots"] == 2
+
+
+def test_parse_row_rejects_invalid_rows():
+    cases = [(None, "not a JSON object"), ({"name": "X", "password": "p", "colour": "red"}, "unknown field(s): colour"),
+             ({"password": "p"}, "name is required"), ({"name": "New"}, "password is required for new group 'New'"),
+             ({"name": "X", "password": ""}, "password must be a non-empty string"), ({"name": "X", "password": "p", "canKickBan": "maybe"}, "canKickBan must be true or false"),
+             ({"name": "X", "password": "p", "reservedSlots": -1}, "reservedSlots must be a non-negative integer"),
+             ({"name": "X", "password": "p", "reservedSlots": True}, "reservedSlots must be a non-negative integer")]
+    for row, message in cases: assert editor.parse_user_group_row(row) == (None, message)
+
+
+def test_plan_counts_added_updated_unchanged_duplicates_and_rejected(tmp_path):
+    path = write_jsonl(tmp_path / "groups.jsonl", [
+        {"name": "Admin", "password": "secret"}, # Same values as before
+        {"name": "Friend", "reservedSlots": 4},
+        {"name": "Guest", "password": "g1"},
+        {"name": "Guest", "password": "g2"}, # Later rows win
+        {"name": "Nobody"}, "not json", ""])
+    groups, report = editor.plan_user_group_import(path, EXISTING)
+    assert {k: report[k] for k in ("added", "updated", "unchanged", "duplicates", "rejected")} == {"added": 1, "updated": 1, "unchanged": 1, "duplicates": 1, "rejected": 2}
+    assert report["errors"] == ["line 5: password is required for new group 'Nobody'", "line 6: not a JSON object"]
+    assert groups[0] == EXISTING[0] and groups[1]["reservedSlots"] == 4 and groups[2]["password"] == "g2" and len(groups) == 3
+    assert EXISTING[1]["reservedSlots"] == 2 # Input list untouched
+
+
+def test_duplicate_rows_that_end_up_unchanged_are_not_updates(tmp_path):
+    path = write_jsonl(tmp_path / "groups.jsonl", [{"name": "Friend", "reservedSlots": 9}, {"name": "Friend", "reservedSlots": 2}])
+    _, report = editor.plan_user_group_import(path, EXISTING)
+    assert (report["updated"], report["unchanged"], report["duplicates"]) == (0, 1, 1)
+
+
+def test_export_then_import_round_trips_as_unchanged(tmp_path):
+    for ext in ("csv", "jsonl"):
+        path = str(tmp_path / f"groups.{ext}")
+        assert editor.export_user_groups(EXISTING + ["not a group"], path) == 2
+        groups, report = editor.plan_user_group_import(path, EXISTING)
+        assert groups == EXISTING
+        assert (report["added"], report["updated"], report["unchanged"], report["rejected"]) == (0, 0, 2, 0)
+        fresh, report = editor.plan_user_group_import(path, [])
+        assert fresh == EXISTING and report["added"] == 2
+    assert not [p for p in tmp_path.iterdir() if ".tmp" in p.name]
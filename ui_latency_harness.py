@@ -0,0 +1,168 @@
+# UI latency regression harness for the Enshrouded Server Config Editor.
+# Drives EnshroudedConfigEditorApp under a virtual display (Xvfb is started when DISPLAY is unset) against
+# synthetic configs of growing size, writes a JSON report and exits non-zero when a budget is exceeded.
+#
+#   python ui_latency_harness.py --groups 3,100,500 --report ui_latency.json [--baseline old.json]
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from tkinter import messagebox
+
+import ensh_config_gui as editor
+
+# --- Constants ---
+DEFAULT_GROUP_COUNTS = (3, 100, 500)
+DEFAULT_REPEAT = 5
+DEFAULT_BASELINE_TOLERANCE = 1.25 # Fail when a median is more than 25% slower than the baseline report
+BASELINE_NOISE_FLOOR_MS = 5.0 # Regressions smaller than this are scheduler noise, not code
+XVFB_SCREEN = "1280x1024x24"
+XVFB_START_TIMEOUT = 10.0
+
+# Median budgets in milliseconds, checked at every config size.
+DEFAULT_THRESHOLDS_MS = {
+    "time_to_first_frame": 1500.0,
+    "tab_switch_first": 1000.0, # First visit builds the tab lazily
+    "tab_switch": 100.0,
+    "refresh_notebook": 1000.0,
+    "add_user_group": 1500.0,
+    "delete_user_group": 1500.0,
+    "randomize_tab": 300.0,
+    "save": 500.0,
+}
+
+# --- Virtual Display ---
+def start_virtual_display():
+    # Returns the Xvfb process, or None when a display is already available.
+    if os.environ.get("DISPLAY") or sys.platform.startswith("win") or sys.platform == "darwin": return None
+    xvfb = shutil.which("Xvfb")
+    if not xvfb: raise RuntimeError("DISPLAY is not set and Xvfb was not found. Install Xvfb or run under a display.")
+    display = next(n for n in range(99, 200) if not os.path.exists(f"/tmp/.X{n}-lock"))
+    proc = subprocess.Popen([xvfb, f":{display}", "-screen", "0", XVFB_SCREEN, "-nolisten", "tcp"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + XVFB_START_TIMEOUT
+    while not os.path.exists(f"/tmp/.X11-unix/X{display}"):
+        if proc.poll() is not None or time.monotonic() > deadline:
+            proc.kill(); raise RuntimeError(f"Xvfb did not start on display :{display}.")
+        time.sleep(0.05)
+    os.environ["DISPLAY"] = f":{display}"
+    return proc
+
+def auto_answer_dialogs():
+    # Every dialog is answered without a human: confirmations "yes", save-on-exit prompts "no".
+    for name in ("showinfo", "showwarning", "showerror"): setattr(messagebox, name, lambda *a, **k: "ok")
+    messagebox.askyesno = lambda *a, **k: True
+    messagebox.askyesnocancel = lambda *a, **k: False
+
+# --- Synthetic Configs ---
+def write_synthetic_config(directory, group_count):
+    settings = editor.get_hardcoded_defaults()
+    settings["gameSettings"]["fromHungerToStarving"] = editor.minutes_to_nanoseconds_gui("10")
+    settings["userGroups"] = [
+        {"name": f"Group{i:05d}", "password": f"Password{i}", "canKickBan": i % 7 == 0, "canAccessInventories": i % 2 == 0,
+         "canEditBase": i % 3 == 0, "canExtendBase": i % 5 == 0, "reservedSlots": i % 4}
+        for i in range(group_count)]
+    editor.write_json_atomic(settings, os.path.join(directory, editor.JSON_FILE))
+
+# --- Measurement ---
+def _timed(root, action):
+    start = time.perf_counter()
+    action(); root.update()
+    return (time.perf_counter() - start) * 1000.0
+
+def _summary(samples):
+    return {"median_ms": round(statistics.median(samples), 2), "max_ms": round(max(samples), 2), "samples": len(samples)}
+
+def measure_config_size(group_count, repeat):
+    samples = {metric: [] for metric in DEFAULT_THRESHOLDS_MS}
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix="ensh_ui_latency_") as work_dir:
+            previous_cwd = os.getcwd(); os.chdir(work_dir) # The editor works on the current directory
+            try:
+                write_synthetic_config(work_dir, group_count)
+                start = time.perf_counter()
+                root = editor.tk.Tk()
+                app = editor.EnshroudedConfigEditorApp(root)
+                root.update()
+                while not root.winfo_viewable(): root.update()
+                samples["time_to_first_frame"].append((time.perf_counter() - start) * 1000.0)
+                try: run_scenario(root, app, samples)
+                finally:
+                    app.settings_manager.wait_for_backup_eviction() # Before the temporary directory is deleted
+                    app.settings_manager.journal.compact(); app.settings_manager.journal.close() # Leave no journal behind in the user's home
+                    root.destroy()
+            finally: os.chdir(previous_cwd)
+    return {metric: _summary(values) for metric, values in samples.items() if values}
+
+def run_scenario(root, app, samples):
+    tab_ids = list(app.notebook.tabs())
+    for tab_id in tab_ids[1:]: samples["tab_switch_first"].append(_timed(root, lambda t=tab_id: app.notebook.select(t))) # The first tab is built at startup
+    for tab_id in tab_ids[1:] + tab_ids[:1]: samples["tab_switch"].append(_timed(root, lambda t=tab_id: app.notebook.select(t)))
+    samples["refresh_notebook"].append(_timed(root, app._refresh_notebook_and_vars))
+    samples["add_user_group"].append(_timed(root, app.add_new_user_group_gui))
+    group_count = len(app.settings_manager.get_setting_value(["userGroups"], []))
+    samples["delete_user_group"].append(_timed(root, lambda: app.delete_user_group_gui(group_count - 1)))
+    for tab_name, menu_def in app.tabs_config.items():
+        if menu_def == "user_groups_tab": continue
+        app._ensure_tab_built(tab_name)
+        samples["randomize_tab"].append(_timed(root, lambda tn=tab_name, md=menu_def: app._randomize_tab_settings(tn, md)))
+    samples["save"].append(_timed(root, app.save_all_gui_settings))
+
+# --- Thresholds ---
+def check_results(results, thresholds, baseline=None, tolerance=DEFAULT_BASELINE_TOLERANCE):
+    failures = []
+    for size, metrics in results.items():
+        for metric, summary in metrics.items():
+            budget = thresholds.get(metric)
+            if budget is not None and summary["median_ms"] > budget:
+                failures.append(f"{size} groups: {metric} median {summary['median_ms']} ms exceeds budget {budget} ms")
+            previous = ((baseline or {}).get(size) or {}).get(metric)
+            if previous and summary["median_ms"] > max(previous["median_ms"] * tolerance, previous["median_ms"] + BASELINE_NOISE_FLOOR_MS):
+                failures.append(f"{size} groups: {metric} median {summary['median_ms']} ms regressed from baseline {previous['median_ms']} ms")
+    return failures
+
+def load_json_file(path):
+    with open(path, "r", encoding="utf-8") as f: return json.load(f)
+
+# --- Main Execution ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure editor UI latency under a virtual display and fail on regressions.")
+    parser.add_argument("--groups", default=",".join(map(str, DEFAULT_GROUP_COUNTS)), help="Comma-separated user group counts for the synthetic configs.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per config size; medians are reported.")
+    parser.add_argument("--report", default="ui_latency_report.json", help="Where to write the JSON report.")
+    parser.add_argument("--thresholds", help="JSON file of {metric: median budget in ms}, overriding the built-in budgets.")
+    parser.add_argument("--baseline", help="Previous report; fail if a median regresses beyond --tolerance.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_BASELINE_TOLERANCE, help="Allowed slowdown factor versus --baseline.")
+    args = parser.parse_args(argv)
+
+    thresholds = dict(DEFAULT_THRESHOLDS_MS)
+    if args.thresholds: thresholds.update(load_json_file(args.thresholds))
+    baseline = load_json_file(args.baseline).get("results") if args.baseline else None
+    try: xvfb = start_virtual_display()
+    except RuntimeError as e: editor.log_message_gui(str(e), "ERROR"); return 2
+    auto_answer_dialogs()
+    try:
+        results = {}
+        for group_count in [int(g) for g in args.groups.split(",") if g.strip()]:
+            editor.log_message_gui(f"Measuring UI latency with {group_count} user group(s)...")
+            results[str(group_count)] = measure_config_size(group_count, max(1, args.repeat))
+    finally:
+        if xvfb: xvfb.terminate(); xvfb.wait()
+
+    failures = check_results(results, thresholds, baseline, args.tolerance)
+    report = {"created": editor.datetime.now().isoformat(timespec="seconds"),
+              "environment": {"python": platform.python_version(), "tk": str(editor.tk.TkVersion), "platform": platform.platform(), "repeat": args.repeat},
+              "thresholds_ms": thresholds, "results": results, "failures": failures, "passed": not failures}
+    editor.write_json_atomic(report, args.report)
+    for failure in failures: editor.log_message_gui(failure, "ERROR")
+    editor.log_message_gui(f"UI latency report written to '{args.report}': {'PASS' if not failures else f'{len(failures)} regression(s)'}.")
+    return 0 if not failures else 1
+
+if __name__ == "__main__":
+    sys.exit(main())